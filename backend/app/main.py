@@ -3,28 +3,43 @@ FastAPI Backend for Unlisted Edge Voice Calling Bot
 Updated for Bolna AI + Make.com Integration
 """
 
-from fastapi import FastAPI, Request, HTTPException, Header
+from fastapi import FastAPI, Request, HTTPException, Depends, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import logging
 from datetime import datetime
 import sys
 import os
-import hmac
-import hashlib
+import csv
+import io
+from itertools import islice
 from typing import Optional
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.settings import settings
-# from services.vector_store import vector_store
+from services.http_clients import http_clients
+from services.campaign_dialer import campaign_dialer
+from services.call_counter import call_counter
+from services.dnc_index import dnc_index
+from services.profanity_filter import profanity_filter
+from services.calling_window import calling_window
+from services.outbox import outbox
+from services.webhook_ingest import bolna_event, CallStartedEvent, CallEndedEvent, TranscriptEvent
+from services.idempotency import webhook_idempotency
+from services.transcript_buffer import transcript_buffer
+from services.vector_services import vector_store
+from services.embedding_cache import embedding_cache
+from services.answer_cache import answer_cache
+from services.lexical_index import lexical_index
+from services.latency_budget import latency_budget, latency_tracker, hedged, current_deadline
+from services.metrics import metrics, MetricsMiddleware
+from services.structured_logging import logging_pipeline
+from services.lead_store import lead_repository
+from services.call_records import call_records
+from services.sheets_sync import sheets_sync
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 # Create FastAPI app
@@ -44,25 +59,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ============================================================================
-# HELPER FUNCTIONS
-# ============================================================================
+# Request latency histograms for /metrics
+app.add_middleware(MetricsMiddleware)
 
-def verify_bolna_webhook(payload: bytes, signature: str) -> bool:
-    """
-    Verify Bolna webhook signature for security
-    """
-    if not settings.BOLNA_WEBHOOK_SECRET:
-        logger.warning("BOLNA_WEBHOOK_SECRET not set, skipping verification")
-        return True
-    
-    expected_signature = hmac.new(
-        settings.BOLNA_WEBHOOK_SECRET.encode(),
-        payload,
-        hashlib.sha256
-    ).hexdigest()
-    
-    return hmac.compare_digest(signature, expected_signature)
+# Gauges are read at scrape time
+metrics.gauge(
+    "calls_active",
+    "Calls with a live transcript stream",
+    lambda: transcript_buffer.stats()["active_calls"]
+)
+metrics.gauge("campaign_dials_in_flight", "Bolna create-call requests in progress", lambda: campaign_dialer.dialing)
+metrics.gauge(
+    "campaign_leads_waiting",
+    "Campaign leads not dialled yet",
+    lambda: {(state,): count for state, count in campaign_dialer.backlog().items()},
+    labels=("state",)
+)
+def _outbox_depth() -> dict:
+    outbox_stats = outbox.stats()
+    return {("pending",): outbox_stats["depth"], ("dead",): outbox_stats["dead"]}
+
+metrics.gauge("outbox_queue_depth", "Make.com deliveries in the outbox", _outbox_depth, labels=("state",))
+metrics.gauge("leads_pending_write", "Coalesced lead saves waiting for the next bulk write", lambda: lead_repository.stats()["pending"])
 
 # ============================================================================
 # HEALTH CHECK ROUTES
@@ -90,12 +108,15 @@ async def health_check():
             "bolna_configured": bool(settings.BOLNA_API_KEY),
             "openai_configured": bool(settings.OPENAI_API_KEY),
             "pinecone_configured": bool(settings.PINECONE_API_KEY),
+            "vector_backend": settings.VECTOR_BACKEND,
             "make_configured": bool(settings.MAKE_WEBHOOK_CALL_TRIGGER)
         },
         "calling_hours": {
             "start": settings.CALLING_HOURS_START,
             "end": settings.CALLING_HOURS_END,
-            "currently_allowed": settings.is_within_calling_hours()
+            "currently_allowed": calling_window.is_open(),
+            "next_allowed_at": calling_window.next_allowed().isoformat(),
+            "rules": calling_window.describe()
         },
         "timestamp": datetime.now().isoformat()
     }
@@ -106,172 +127,235 @@ async def health_check():
 
 @app.post("/webhooks/bolna/call-started")
 async def bolna_call_started(
-    request: Request,
-    x_bolna_signature: Optional[str] = Header(None)
+    event: CallStartedEvent = Depends(bolna_event(CallStartedEvent))
 ):
     """
     Handle call started event from Bolna
     """
+    if not webhook_idempotency.check_and_mark("call_started", event.call_id):
+        return {"status": "duplicate", "call_id": event.call_id}
+    
     try:
-        body = await request.body()
-        
-        # Verify webhook signature (if configured)
-        if x_bolna_signature and not verify_bolna_webhook(body, x_bolna_signature):
-            raise HTTPException(status_code=401, detail="Invalid webhook signature")
-        
-        data = await request.json()
-        logger.info(f"Call started: {data}")
-        
-        call_id = data.get("call_id")
-        customer_number = data.get("customer_number")
-        agent_id = data.get("agent_id")
-        
-        # Log call start
-        logger.info(f"Call {call_id} started with customer {customer_number}")
+        # Payloads go in as fields; the log pipeline serializes them off the event loop
+        logger.info(
+            "Call started",
+            extra={"event": "call_started", "call_id": event.call_id, "customer_number": event.customer_number, "payload": event.raw}
+        )
         
         # TODO: Store in database if needed
         
-        return {"status": "received", "call_id": call_id}
+        return {"status": "received", "call_id": event.call_id}
         
     except Exception as e:
+        webhook_idempotency.discard("call_started", event.call_id)
         logger.error(f"Error processing call started webhook: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/webhooks/bolna/call-ended")
 async def bolna_call_ended(
-    request: Request,
-    x_bolna_signature: Optional[str] = Header(None)
+    event: CallEndedEvent = Depends(bolna_event(CallEndedEvent))
 ):
     """
     Handle call ended event from Bolna
     Forwards data to Make.com for Google Sheets update
     """
+    # Bolna retries deliveries; only the first one is forwarded downstream
+    if not webhook_idempotency.check_and_mark("call_ended", event.call_id):
+        return {"status": "duplicate", "call_id": event.call_id}
+    
     try:
-        body = await request.body()
-        
-        # Verify webhook signature
-        if x_bolna_signature and not verify_bolna_webhook(body, x_bolna_signature):
-            raise HTTPException(status_code=401, detail="Invalid webhook signature")
+        logger.info("Call ended", extra={"event": "call_ended", "call_id": event.call_id, "payload": event.raw})
         
-        data = await request.json()
-        logger.info(f"Call ended: {data}")
+        # Bolna's transcript is authoritative; the locally streamed chunks are
+        # per-process and may be partial, so they only fill in a missing one
+        live = transcript_buffer.pop(event.call_id)
+        transcript = event.transcript
+        if not transcript and live and live.chunks:
+            transcript = live.text()
         
         # Extract key information
         call_data = {
-            "call_id": data.get("call_id"),
-            "customer_number": data.get("customer_number"),
-            "duration_seconds": data.get("duration"),
-            "status": data.get("status"),  # completed, failed, no-answer, etc.
-            "transcript": data.get("transcript", ""),
-            "recording_url": data.get("recording_url"),
-            "collected_data": data.get("collected_data", {}),
+            "call_id": event.call_id,
+            "customer_number": event.customer_number,
+            "duration_seconds": event.duration,
+            "status": event.status,  # completed, failed, no-answer, etc.
+            "transcript": transcript,
+            "recording_url": event.recording_url,
+            "collected_data": event.collected_data,
             "timestamp": datetime.now().isoformat()
         }
         
-        logger.info(f"Processed call data: {call_data}")
+        logger.info("Processed call data", extra={"event": "call_processed", "call_id": event.call_id, "call_data": call_data})
+        
+        # Local record and analytics rollups; a failure here must not stop the forward
+        try:
+            call_records.record({**call_data, "agent_id": event.agent_id})
+        except Exception as e:
+            logger.error(f"Error storing call record {event.call_id}: {str(e)}")
         
-        # Forward to Make.com webhook (if configured)
+        # Queue for Make.com (if configured); the outbox worker delivers and retries
+        queued = False
         if settings.MAKE_WEBHOOK_CALL_ENDED:
-            import httpx
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    settings.MAKE_WEBHOOK_CALL_ENDED,
-                    json=call_data,
-                    timeout=10.0
-                )
-                logger.info(f"Forwarded to Make.com: {response.status_code}")
+            outbox.enqueue(settings.MAKE_WEBHOOK_CALL_ENDED, call_data, topic="call_ended")
+            queued = True
         
-        return {"status": "processed", "call_id": call_data["call_id"]}
+        return {"status": "processed", "call_id": call_data["call_id"], "forward_queued": queued}
         
     except Exception as e:
+        webhook_idempotency.discard("call_ended", event.call_id)
         logger.error(f"Error processing call ended webhook: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/webhooks/bolna/transcript")
 async def bolna_transcript(
-    request: Request,
-    x_bolna_signature: Optional[str] = Header(None)
+    event: TranscriptEvent = Depends(bolna_event(TranscriptEvent))
 ):
     """
     Receive real-time transcript from Bolna
     """
     try:
-        body = await request.body()
-        
-        if x_bolna_signature and not verify_bolna_webhook(body, x_bolna_signature):
-            raise HTTPException(status_code=401, detail="Invalid webhook signature")
-        
-        data = await request.json()
-        logger.info(f"Transcript update: {data.get('text', '')[:100]}...")
+        logger.info("Transcript update", extra={"event": "transcript_chunk", "call_id": event.call_id, "text": event.text})
         
-        # Store transcript chunks if needed
-        return {"status": "received"}
+        stored = transcript_buffer.append(
+            event.call_id,
+            event.text,
+            sequence=event.sequence,
+            speaker=event.speaker
+        )
+        return {"status": "received" if stored else "duplicate"}
         
     except Exception as e:
         logger.error(f"Error processing transcript: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/calls/{call_id}/transcript")
+async def get_live_transcript(call_id: str):
+    """
+    Live transcript assembled from streamed chunks (until the call ends)
+    """
+    snapshot = transcript_buffer.snapshot(call_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="No live transcript for this call")
+    return snapshot
+
 # ============================================================================
 # CUSTOM FUNCTION ENDPOINTS (Called by Bolna during conversation)
 # ============================================================================
 
-# @app.post("/functions/search-knowledge")
-# async def search_knowledge(request: Request):
-#     """
-#     Semantic search in company knowledge base
-#     Called by Bolna when customer asks complex questions
-#     """
-#     try:
-#         data = await request.json()
-#         logger.info(f"Knowledge search request: {data}")
-        
-#         # Extract query (Bolna format may differ from Vapi)
-#         query = data.get("query") or data.get("parameters", {}).get("query", "")
-        
-#         if not query:
-#             return {
-#                 "error": "No query provided",
-#                 "result": "I need a specific question to help you with."
-#             }
-        
-#         # Search vector database
-#         results = vector_store.search(query, top_k=3)
-        
-#         if not results:
-#             return {
-#                 "result": "I don't have specific information about that. Let me connect you with our investment advisor for detailed information."
-#             }
-        
-#         # Format results for natural conversation
-#         answer_parts = []
-#         for result in results:
-#             if result['score'] > 0.75:  # Only use high-confidence results
-#                 answer_parts.append(result['text'])
-        
-#         if not answer_parts:
-#             return {
-#                 "result": "I found some related information, but I'd recommend speaking with our advisor for accurate details."
-#             }
-        
-#         # Combine top results
-#         combined_answer = " ".join(answer_parts[:2])  # Use top 2 results
-        
-#         logger.info(f"Returning answer from {len(answer_parts)} results")
-        
-#         return {
-#             "result": combined_answer,
-#             "confidence": results[0]['score'] if results else 0,
-#             "sources_used": len(answer_parts)
-#         }
-        
-#     except Exception as e:
-#         logger.error(f"Error in knowledge search: {str(e)}")
-#         return {
-#             "error": str(e),
-#             "result": "I'm having trouble accessing that information right now. Let me note your question and have an advisor call you back."
-#         }
+def compose_knowledge_answer(results: list) -> dict:
+    """
+    Turn vector search results into a spoken answer
+    """
+    if not results:
+        return {
+            "result": "I don't have specific information about that. Let me connect you with our investment advisor for detailed information."
+        }
+    
+    # Format results for natural conversation
+    answer_parts = []
+    for result in results:
+        if result['score'] > 0.75:  # Only use high-confidence results
+            answer_parts.append(result['text'])
+    
+    if not answer_parts:
+        return {
+            "result": "I found some related information, but I'd recommend speaking with our advisor for accurate details."
+        }
+    
+    # Combine top results
+    combined_answer = " ".join(answer_parts[:2])  # Use top 2 results
+    
+    logger.info(f"Returning answer from {len(answer_parts)} results")
+    
+    return {
+        "result": combined_answer,
+        "confidence": results[0]['score'] if results else 0,
+        "sources_used": len(answer_parts)
+    }
+
+# Seconds kept back from the budget for the keyword fallback
+KNOWLEDGE_FALLBACK_RESERVE = 0.2
+
+@app.post("/functions/search-knowledge")
+@latency_budget(
+    "search_knowledge",
+    settings.BUDGET_SEARCH_KNOWLEDGE_SECONDS,
+    {"result": "Let me check that for you and have our advisor share the exact details on a follow-up call."}
+)
+async def search_knowledge(request: Request):
+    """
+    Semantic search in company knowledge base
+    Called by Bolna when customer asks complex questions
+    """
+    try:
+        data = await request.json()
+        logger.info("Knowledge search request", extra={"event": "knowledge_search", "payload": data})
+        
+        # Extract query (Bolna format may differ from Vapi)
+        query = data.get("query") or data.get("parameters", {}).get("query", "")
+        
+        if not query:
+            return {
+                "error": "No query provided",
+                "result": "I need a specific question to help you with."
+            }
+        
+        # Same question asked before (exact text, then paraphrase)
+        cached = answer_cache.get_exact(query)
+        if cached is not None:
+            return {**cached, "cached": True}
+        
+        deadline = current_deadline()
+        
+        def time_left() -> float:
+            return max(0.0, deadline.remaining() - KNOWLEDGE_FALLBACK_RESERVE)
+        
+        try:
+            query_embedding = await hedged("embedding", vector_store.acreate_embedding, query, timeout=time_left())
+        except Exception as e:
+            # Embedding provider slow or degraded: answer from the keyword index
+            logger.warning(f"Embedding unavailable, using keyword search: {repr(e)}")
+            results = vector_store.lexical_search(query, top_k=3)
+            return compose_knowledge_answer(results)
+        
+        cached = answer_cache.get_similar(query_embedding)
+        if cached is not None:
+            logger.info(f"Semantic cache hit for query: {query[:50]}")
+            return {**cached, "cached": True}
+        
+        # Search vector database
+        try:
+            results = await hedged(
+                "vector_search",
+                vector_store.asearch,
+                query,
+                top_k=3,
+                query_embedding=query_embedding,
+                timeout=time_left()
+            )
+        except Exception as e:
+            logger.warning(f"Vector search too slow, using keyword search: {repr(e)}")
+            results = vector_store.lexical_search(query, top_k=3)
+        
+        answer = compose_knowledge_answer(results)
+        if results and results[0].get("retrieval") != "lexical":
+            # Only cache real vector answers, not keyword fallbacks or errors
+            answer_cache.put(query, query_embedding, answer)
+        return answer
+        
+    except Exception as e:
+        logger.error(f"Error in knowledge search: {str(e)}")
+        return {
+            "error": str(e),
+            "result": "I'm having trouble accessing that information right now. Let me note your question and have an advisor call you back."
+        }
 
 @app.post("/functions/save-lead-data")
+@latency_budget(
+    "save_lead_data",
+    settings.BUDGET_SAVE_LEAD_SECONDS,
+    {"result": "I've noted your interest. We'll follow up with you soon.", "status": "timeout"}
+)
 async def save_lead_data(request: Request):
     """
     Save customer information collected during call
@@ -279,7 +363,7 @@ async def save_lead_data(request: Request):
     """
     try:
         data = await request.json()
-        logger.info(f"Saving lead data: {data}")
+        logger.info("Saving lead data", extra={"event": "save_lead_data", "payload": data})
         
         # Extract lead information (adapt to Bolna's format)
         parameters = data.get("parameters", {})
@@ -288,7 +372,7 @@ async def save_lead_data(request: Request):
             "name": parameters.get("name"),
             "phone": parameters.get("phone"),
             "email": parameters.get("email"),
-            "interest_level": parameters.get("interest_level", "unknown"),
+            "interest_level": parameters.get("interest_level"),  # "unknown" until collected
             "budget": parameters.get("budget"),
             "preferred_sectors": parameters.get("sectors", []),
             "questions": parameters.get("questions", []),
@@ -297,15 +381,20 @@ async def save_lead_data(request: Request):
         }
         
         # Log the data
-        logger.info(f"Lead data collected: {lead_data}")
+        logger.info("Lead data collected", extra={"event": "lead_collected", "call_id": lead_data["call_id"], "lead": lead_data})
         
-        # TODO: Save to MongoDB or forward to Make.com
-        # For now, just acknowledge
+        # Queued for the next bulk write; repeated saves within a call are merged
+        lead_key = lead_repository.save(lead_data)
+        if lead_key is None:
+            logger.warning("Lead data without call_id or phone, not stored")
+        else:
+            # Written to the Leads sheet with the next batch (if GOOGLE_SHEETS_ID is set)
+            sheets_sync.queue_lead(lead_key)
         
         return {
             "result": "Thank you! I've noted all your details. Our investment advisor will contact you within 24 hours.",
             "lead_id": lead_data.get("call_id"),
-            "status": "saved"
+            "status": "saved" if lead_key else "not_saved"
         }
         
     except Exception as e:
@@ -316,6 +405,12 @@ async def save_lead_data(request: Request):
         }
 
 @app.post("/functions/check-compliance")
+@latency_budget(
+    "check_compliance",
+    settings.BUDGET_CHECK_COMPLIANCE_SECONDS,
+    # Same fail-open behaviour as a compliance check error
+    {"action": "continue", "safe": True, "error": "compliance_check_timeout"}
+)
 async def check_compliance(request: Request):
     """
     Check compliance rules: DNC list, calling hours, profanity
@@ -329,18 +424,20 @@ async def check_compliance(request: Request):
         text = parameters.get("text", "")
         
         # Check 1: Calling hours
-        if not settings.is_within_calling_hours():
+        if not calling_window.is_open():
             return {
                 "action": "end_call",
                 "safe": False,
                 "reason": "outside_calling_hours",
-                "response": "I apologize, but we're calling outside our business hours. We'll call you back between 9 AM and 7 PM IST. Thank you."
+                "next_allowed_at": calling_window.next_allowed().isoformat(),
+                "response": (
+                    "I apologize, but we're calling outside our business hours. "
+                    f"We'll call you back {calling_window.describe_next_window()}. Thank you."
+                )
             }
         
-        # Check 2: DNC list (placeholder - implement with actual DNC storage)
-        # TODO: Check against actual DNC list in database/Google Sheets
-        dnc_list = []  # Load from database/sheets
-        if phone in dnc_list:
+        # Check 2: DNC list
+        if settings.DNC_CHECK_ENABLED and phone and dnc_index.contains(phone):
             return {
                 "action": "end_call",
                 "safe": False,
@@ -348,14 +445,26 @@ async def check_compliance(request: Request):
                 "response": "I see you've requested not to be contacted. We'll remove your number. Apologies for the inconvenience."
             }
         
-        # Check 3: Profanity filter
+        # Check 3: Daily call limit per lead
+        # Calls placed through BolnaService.create_call are counted when dialled,
+        # so this only trips for a number dialled beyond the limit elsewhere
+        if phone and call_counter.count(phone) > settings.MAX_CALLS_PER_LEAD_PER_DAY:
+            return {
+                "action": "end_call",
+                "safe": False,
+                "reason": "daily_call_limit",
+                "response": "I apologize for calling you again today. We won't call you again today. Thank you for your time."
+            }
+        
+        # Check 4: Profanity filter
         if settings.PROFANITY_FILTER_ENABLED:
-            profane_words = ["fuck", "shit", "damn", "bastard"]  # Add more
-            if any(word in text.lower() for word in profane_words):
+            matches = profanity_filter.find(text)
+            if matches:
                 return {
                     "action": "end_politely",
                     "safe": False,
                     "reason": "profanity_detected",
+                    "categories": sorted({m.category for m in matches}),
                     "response": "I understand you're upset. If you'd prefer not to continue, that's completely fine. Have a good day."
                 }
         
@@ -374,26 +483,158 @@ async def check_compliance(request: Request):
             "error": str(e)
         }
 
+# ============================================================================
+# CAMPAIGN ENDPOINTS (Bulk dialing)
+# ============================================================================
+
+@app.post("/campaigns")
+async def create_campaign(request: Request):
+    """
+    Start a bulk dialing campaign from a JSON lead list
+    Used by the Make.com call-trigger scenario instead of one call per run
+    
+    Body: {"name": "...", "leads": [{"phone": "+91...", "name": "...", ...}]}
+    """
+    data = await request.json()
+    leads = data.get("leads") or []
+    
+    if not isinstance(leads, list) or not leads:
+        raise HTTPException(status_code=400, detail="No leads provided")
+    
+    try:
+        campaign = campaign_dialer.start(leads, name=data.get("name"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return campaign.progress()
+
+@app.post("/campaigns/upload")
+async def upload_campaign(
+    file: UploadFile = File(...),
+    name: Optional[str] = Form(None)
+):
+    """
+    Start a bulk dialing campaign from a CSV upload
+    The CSV needs a `phone` column; `name` and any other columns are optional
+    """
+    reader = csv.DictReader(io.TextIOWrapper(file.file, encoding="utf-8-sig"))
+    
+    if not reader.fieldnames:
+        raise HTTPException(status_code=400, detail="Empty CSV file")
+    
+    try:
+        campaign = campaign_dialer.start(reader, name=name or file.filename)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="No leads found in CSV file")
+    
+    return campaign.progress()
+
+@app.get("/campaigns/{campaign_id}")
+async def get_campaign(campaign_id: str, offset: int = 0, limit: int = 100):
+    """
+    Campaign progress plus a page of per-lead results
+    """
+    campaign = campaign_dialer.get(campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    return {
+        **campaign.progress(),
+        "results": list(islice(campaign.results, max(0, offset), max(0, offset) + max(0, min(limit, 1000))))
+    }
+
+@app.post("/campaigns/{campaign_id}/cancel")
+async def cancel_campaign(campaign_id: str):
+    """
+    Stop a running campaign
+    """
+    if not campaign_dialer.get(campaign_id):
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    return {"campaign_id": campaign_id, "cancelled": campaign_dialer.cancel(campaign_id)}
+
+# ============================================================================
+# CALL RECORDS & ANALYTICS
+# ============================================================================
+
+@app.get("/analytics")
+async def analytics(hours: int = 24, days: int = 30):
+    """
+    Call volume, connects, average duration and outcomes: all time, per hour,
+    per day and per agent (from rollups kept up to date on ingest)
+    """
+    return call_records.analytics(hours=max(1, min(hours, 24 * 7)), days=max(1, min(days, 366)))
+
+@app.get("/calls")
+async def list_calls(phone: Optional[str] = None, date: Optional[str] = None, limit: int = 50):
+    """
+    Recent calls to a phone number or on a date (YYYY-MM-DD)
+    """
+    limit = max(1, min(limit, 500))
+    if phone:
+        return {"calls": call_records.by_phone(phone, limit=limit)}
+    if date:
+        return {"calls": call_records.by_day(date, limit=limit)}
+    raise HTTPException(status_code=400, detail="Pass phone or date")
+
+@app.get("/calls/{call_id}")
+async def get_call_record(call_id: str):
+    """
+    Stored record of an ended call
+    """
+    record = call_records.get(call_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Call not found")
+    return record
+
+# ============================================================================
+# STATS ENDPOINT
+# ============================================================================
+
+@app.get("/stats")
+async def stats():
+    """
+    Internal queue and cache statistics
+    """
+    return {
+        "outbox": outbox.stats(),
+        "webhook_idempotency": webhook_idempotency.stats(),
+        "transcripts": transcript_buffer.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "lexical_index": lexical_index.stats(),
+        "latency": latency_tracker.snapshot(),
+        "http_clients": http_clients.stats(),
+        "logging": logging_pipeline.stats(),
+        "leads": lead_repository.stats(),
+        "sheets_sync": sheets_sync.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # ============================================================================
 # TESTING ENDPOINTS
 # ============================================================================
 
-# @app.get("/test/search")
-# async def test_search_endpoint(query: str):
-#     """
-#     Test endpoint for vector search (for debugging)
-#     Usage: /test/search?query=your question here
-#     """
-#     try:
-#         results = vector_store.search(query, top_k=3)
-#         return {
-#             "query": query,
-#             "results": results,
-#             "count": len(results)
-#         }
-#     except Exception as e:
-#         logger.error(f"Error in test search: {str(e)}")
-#         raise HTTPException(status_code=500, detail=str(e))
+@app.get("/test/search")
+async def test_search_endpoint(query: str):
+    """
+    Test endpoint for vector search (for debugging)
+    Usage: /test/search?query=your question here
+    """
+    try:
+        results = await vector_store.asearch(query, top_k=3)
+        return {
+            "query": query,
+            "results": results,
+            "count": len(results)
+        }
+    except Exception as e:
+        logger.error(f"Error in test search: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/test/webhook")
@@ -403,7 +644,7 @@ async def test_webhook(request: Request):
     """
     try:
         data = await request.json()
-        logger.info(f"Test webhook received: {data}")
+        logger.info("Test webhook received", extra={"event": "test_webhook", "payload": data})
         return {
             "status": "received",
             "data": data,
@@ -436,6 +677,8 @@ async def global_exception_handler(request: Request, exc: Exception):
 @app.on_event("startup")
 async def startup_event():
     """Run on application startup"""
+    # Configure logging (formatted, redacted and written off the event loop)
+    logging_pipeline.start()
     logger.info(f"Starting {settings.APP_NAME}...")
     logger.info(f"Version: 2.0.0 (Bolna AI)")
     logger.info(f"Debug mode: {settings.DEBUG}")
@@ -444,11 +687,25 @@ async def startup_event():
     logger.info(f"Pinecone configured: {bool(settings.PINECONE_API_KEY)}")
     logger.info(f"Make.com configured: {bool(settings.MAKE_WEBHOOK_CALL_TRIGGER)}")
     logger.info(f"Calling hours: {settings.CALLING_HOURS_START} - {settings.CALLING_HOURS_END} {settings.TIMEZONE}")
+    
+    await http_clients.startup()
+    await outbox.start()
+    await lead_repository.start()
+    await sheets_sync.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown"""
     logger.info(f"Shutting down {settings.APP_NAME}...")
+    
+    await campaign_dialer.aclose()
+    await sheets_sync.stop()
+    await lead_repository.stop()
+    await outbox.stop()
+    call_records.close()
+    await vector_store.aclose()
+    await http_clients.aclose()
+    logging_pipeline.stop()
 
 # ============================================================================
 # RUN APPLICATION
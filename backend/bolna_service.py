@@ -9,8 +9,12 @@ from typing import Dict, Optional, Any
 import sys
 import os
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config.settings import Settings
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from config.settings import settings
+from services.http_clients import http_clients
+from services.call_counter import call_counter
+from services.metrics import metrics
+from services.phone_numbers import normalize_phone
 
 
 logger = logging.getLogger(__name__)
@@ -21,24 +25,43 @@ class BolnaService:
     """
     
     def __init__(self):
-        """Initialize Bolna service with API credentials"""
-        self.api_key = Settings.BOLNA_API_KEY
-        self.api_url = Settings.BOLNA_API_URL
-        self.agent_id = Settings.BOLNA_AGENT_ID
-        
-        if not self.api_key:
-            logger.warning("BOLNA_API_KEY not set")
+        """
+        Initialize Bolna service settings
         
-        self.headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        Credentials are checked on first use, so importing the service
+        needs no API key.
+        """
+        self.api_url = settings.BOLNA_API_URL
+        self._headers: Optional[Dict[str, str]] = None
+    
+    @property
+    def api_key(self) -> str:
+        return settings.require("BOLNA_API_KEY")
+    
+    @property
+    def agent_id(self) -> str:
+        return settings.require("BOLNA_AGENT_ID")
+    
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Request headers (raises RuntimeError if BOLNA_API_KEY is missing)"""
+        if self._headers is None:
+            self._headers = {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            }
+        return self._headers
+    
+    def _client(self) -> httpx.AsyncClient:
+        """Shared, connection-pooled client for the Bolna API host"""
+        return http_clients.get(self.api_url)
     
     async def create_call(
         self,
         phone_number: str,
         customer_name: Optional[str] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        client: Optional[httpx.AsyncClient] = None
     ) -> Dict:
         """
         Initiate an outbound call via Bolna
@@ -47,15 +70,26 @@ class BolnaService:
             phone_number: Customer phone number (format: +91XXXXXXXXXX)
             customer_name: Optional customer name for personalization
             metadata: Additional data to attach to call
+            client: HTTP client to use instead of the shared pool
             
         Returns:
             Dict with call_id and status
+            
+        Raises:
+            CallLimitExceeded: if the lead reached MAX_CALLS_PER_LEAD_PER_DAY
+            InvalidPhoneNumber: if the number cannot be normalized
+            RuntimeError: if BOLNA_API_KEY / BOLNA_AGENT_ID are not configured
         """
+        phone_number = normalize_phone(phone_number) or phone_number
+        headers = self.headers
+        agent_id = self.agent_id
+        call_counter.check_and_increment(phone_number)
+        
         try:
             endpoint = f"{self.api_url}/call"
             
             payload = {
-                "agent_id": self.agent_id,
+                "agent_id": agent_id,
                 "recipient": {
                     "phone": phone_number,
                     "name": customer_name or "Customer"
@@ -63,22 +97,28 @@ class BolnaService:
                 "metadata": metadata or {}
             }
             
-            async with httpx.AsyncClient() as client:
+            client = client or self._client()
+            with metrics.outbound("bolna", "create_call"):
                 response = await client.post(
                     endpoint,
-                    headers=self.headers,
+                    headers=headers,
                     json=payload,
                     timeout=30.0
                 )
-                
                 response.raise_for_status()
-                result = response.json()
-                
-                logger.info(f"Call created successfully: {result.get('call_id')}")
-                return result
-                
+            result = response.json()
+            
+            logger.info(f"Call created successfully: {result.get('call_id')}")
+            return result
+            
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error creating call: {e.response.status_code} - {e.response.text}")
+            # Rejected by Bolna, so the lead was never dialled
+            call_counter.release(phone_number)
+            raise
+        except httpx.ConnectError as e:
+            logger.error(f"Could not reach Bolna to create call: {str(e)}")
+            call_counter.release(phone_number)
             raise
         except Exception as e:
             logger.error(f"Error creating call: {str(e)}")
@@ -97,16 +137,16 @@ class BolnaService:
         try:
             endpoint = f"{self.api_url}/call/{call_id}"
             
-            async with httpx.AsyncClient() as client:
+            client = self._client()
+            with metrics.outbound("bolna", "get_call_status"):
                 response = await client.get(
                     endpoint,
                     headers=self.headers,
                     timeout=10.0
                 )
-                
                 response.raise_for_status()
-                return response.json()
-                
+            return response.json()
+            
         except Exception as e:
             logger.error(f"Error getting call status: {str(e)}")
             raise
@@ -124,16 +164,16 @@ class BolnaService:
         try:
             endpoint = f"{self.api_url}/call/{call_id}/end"
             
-            async with httpx.AsyncClient() as client:
+            client = self._client()
+            with metrics.outbound("bolna", "end_call"):
                 response = await client.post(
                     endpoint,
                     headers=self.headers,
                     timeout=10.0
                 )
-                
                 response.raise_for_status()
-                return response.json()
-                
+            return response.json()
+            
         except Exception as e:
             logger.error(f"Error ending call: {str(e)}")
             raise
@@ -168,20 +208,20 @@ class BolnaService:
                 "language": "en-IN"
             }
             
-            async with httpx.AsyncClient() as client:
+            client = self._client()
+            with metrics.outbound("bolna", "create_agent"):
                 response = await client.post(
                     endpoint,
                     headers=self.headers,
                     json=payload,
                     timeout=30.0
                 )
-                
                 response.raise_for_status()
-                result = response.json()
-                
-                logger.info(f"Agent created: {result.get('agent_id')}")
-                return result
-                
+            result = response.json()
+            
+            logger.info(f"Agent created: {result.get('agent_id')}")
+            return result
+            
         except Exception as e:
             logger.error(f"Error creating agent: {str(e)}")
             raise
@@ -212,17 +252,17 @@ class BolnaService:
             if voice_id:
                 payload["voice_id"] = voice_id
             
-            async with httpx.AsyncClient() as client:
+            client = self._client()
+            with metrics.outbound("bolna", "update_agent"):
                 response = await client.patch(
                     endpoint,
                     headers=self.headers,
                     json=payload,
                     timeout=30.0
                 )
-                
                 response.raise_for_status()
-                return response.json()
-                
+            return response.json()
+            
         except Exception as e:
             logger.error(f"Error updating agent: {str(e)}")
             raise
@@ -237,16 +277,16 @@ class BolnaService:
         try:
             endpoint = f"{self.api_url}/voices"
             
-            async with httpx.AsyncClient() as client:
+            client = self._client()
+            with metrics.outbound("bolna", "list_voices"):
                 response = await client.get(
                     endpoint,
                     headers=self.headers,
                     timeout=10.0
                 )
-                
                 response.raise_for_status()
-                return response.json()
-                
+            return response.json()
+            
         except Exception as e:
             logger.error(f"Error listing voices: {str(e)}")
             raise
@@ -259,11 +299,18 @@ class BolnaService:
     ) -> Dict:
         """
         Synchronous version of create_call (for use in non-async contexts)
+        
+        Pooled clients are bound to the event loop that opened them, so the
+        call goes through a private client that lives only as long as the
+        temporary loop; the shared pool is left alone for a running app.
         """
         import asyncio
-        return asyncio.run(
-            self.create_call(phone_number, customer_name, metadata)
-        )
+        
+        async def _run():
+            async with httpx.AsyncClient(timeout=http_clients.timeout) as client:
+                return await self.create_call(phone_number, customer_name, metadata, client=client)
+        
+        return asyncio.run(_run())
 
 # Create singleton instance
 bolna_service = BolnaService()
\ No newline at end of file
@@ -3,35 +3,125 @@ Settings configuration for Bolna AI Voice Calling Bot
 Updated for Bolna AI + Make.com integration
 """
 
+import os
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import time
+from functools import lru_cache
 from dotenv import load_dotenv
 load_dotenv()
 
+# Repository root; data files live under <root>/data unless DATA_DIR says otherwise
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings naming a file or directory of local state; relative values are
+# resolved against DATA_DIR so scripts and the server agree whatever their CWD
+DATA_PATH_SETTINGS = (
+    "IDEMPOTENCY_DB_PATH",
+    "EMBEDDING_CACHE_PATH",
+    "LOCAL_VECTOR_DIR",
+    "VECTOR_MANIFEST_PATH",
+    "LEXICAL_INDEX_PATH",
+    "OUTBOX_PATH",
+    "SHEETS_STATE_PATH",
+    "CALL_COUNTER_DIR",
+    "DNC_INDEX_DIR",
+    "LEAD_STORE_PATH",
+    "CALL_RECORDS_PATH",
+)
+
+@lru_cache(maxsize=None)
+def _parse_hhmm(value: str) -> time:
+    """Parse "HH:MM" once per distinct value"""
+    from datetime import datetime
+    return datetime.strptime(value, "%H:%M").time()
+
+@lru_cache(maxsize=None)
+def get_timezone(name: str):
+    """pytz timezone, created once per name"""
+    import pytz
+    return pytz.timezone(name)
+
 class Settings(BaseSettings):
     """Application settings loaded from environment variables"""
     
+    # =========================================================================
+    # Local Storage
+    # =========================================================================
+    # Base directory for the *_PATH / *_DIR settings in DATA_PATH_SETTINGS
+    DATA_DIR: str = os.path.join(BASE_DIR, "data")
+    
     # =========================================================================
     # Bolna AI Configuration
     # =========================================================================
-    BOLNA_API_KEY: str
-    BOLNA_AGENT_ID: str
+    # API keys are optional at startup and checked on first use (see require())
+    BOLNA_API_KEY: Optional[str] = None
+    BOLNA_AGENT_ID: Optional[str] = None
     BOLNA_API_URL: str = "https://api.bolna.dev"
     BOLNA_PHONE_NUMBER: Optional[str] = None
     BOLNA_WEBHOOK_SECRET: Optional[str] = None
     
+    # Webhook retry deduplication (set IDEMPOTENCY_DB_PATH to persist across restarts/workers)
+    IDEMPOTENCY_MAX_ENTRIES: int = 100000
+    IDEMPOTENCY_TTL_SECONDS: float = 86400.0
+    IDEMPOTENCY_DB_PATH: Optional[str] = None
+    
+    # Live transcript assembly from /webhooks/bolna/transcript
+    TRANSCRIPT_MAX_CALLS: int = 1000
+    TRANSCRIPT_MAX_CHARS_PER_CALL: int = 200000
+    TRANSCRIPT_TTL_SECONDS: float = 3600.0
+    
     # =========================================================================
     # OpenAI Configuration
     # =========================================================================
-    OPENAI_API_KEY: str
+    OPENAI_API_KEY: Optional[str] = None
     OPENAI_MODEL: str = "gpt-4o-mini"
     OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-small"
+    EMBEDDING_DIMENSION: int = 1536
+    
+    # Query embedding cache (in-process LRU + SQLite; empty path = memory only)
+    EMBEDDING_CACHE_SIZE: int = 2048
+    EMBEDDING_CACHE_PATH: Optional[str] = "embedding_cache.db"
+    
+    # =========================================================================
+    # Vector Search Configuration
+    # =========================================================================
+    # "pinecone" (remote index) or "local" (in-process NumPy matrix)
+    VECTOR_BACKEND: str = "pinecone"
+    LOCAL_VECTOR_DIR: str = "vectors"
+    LOCAL_VECTOR_REFRESH_SECONDS: float = 2.0
+    
+    # Bulk ingestion (VectorStore.add_documents)
+    VECTOR_EMBED_BATCH_SIZE: int = 100
+    VECTOR_UPSERT_BATCH_SIZE: int = 100
+    VECTOR_INGEST_PARALLELISM: int = 4
+    
+    # Threads for blocking index calls made from async handlers
+    VECTOR_THREAD_POOL_SIZE: int = 4
+    
+    # Content hashes of indexed chunks (incremental re-indexing)
+    VECTOR_MANIFEST_PATH: str = "vector_manifest.json"
+    
+    # Knowledge-base document chunking (~4 characters per token)
+    CHUNK_MAX_TOKENS: int = 300
+    CHUNK_OVERLAP_TOKENS: int = 40
+    
+    # Retrieval mode: "vector" (BM25 only as fallback), "hybrid" (vector + BM25
+    # fused by reciprocal rank) or "lexical" (BM25 only)
+    SEARCH_MODE: str = "vector"
+    LEXICAL_INDEX_PATH: str = "lexical_index.json"
+    RRF_K: int = 60
+    
+    # Semantic answer cache for /functions/search-knowledge
+    ANSWER_CACHE_SIZE: int = 512
+    ANSWER_CACHE_THRESHOLD: float = 0.95  # cosine similarity to reuse an answer
+    ANSWER_CACHE_TTL_SECONDS: float = 86400.0
     
     # =========================================================================
     # Pinecone Configuration
     # =========================================================================
-    PINECONE_API_KEY: str
+    PINECONE_API_KEY: Optional[str] = None
     PINECONE_ENVIRONMENT: str = "gcp-starter"
     PINECONE_INDEX_NAME: str = "unlisted-edge-knowledge"
     
@@ -42,6 +132,17 @@ class Settings(BaseSettings):
     MAKE_WEBHOOK_CALL_ENDED: Optional[str] = None
     MAKE_API_KEY: Optional[str] = None
     
+    # Durable outbox for Make.com deliveries
+    OUTBOX_PATH: str = "outbox.db"
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_RETRY_BASE_SECONDS: float = 2.0
+    OUTBOX_RETRY_MAX_SECONDS: float = 300.0
+    OUTBOX_LEASE_SECONDS: float = 60.0
+    OUTBOX_POLL_SECONDS: float = 1.0
+    OUTBOX_REQUEST_TIMEOUT_SECONDS: float = 10.0
+    OUTBOX_DRAIN_TIMEOUT_SECONDS: float = 10.0
+    
     # =========================================================================
     # Google Sheets Configuration
     # =========================================================================
@@ -49,6 +150,41 @@ class Settings(BaseSettings):
     LEADS_SHEET_NAME: str = "Leads"
     ANALYTICS_SHEET_NAME: str = "Analytics"
     DNC_SHEET_NAME: str = "DNC_List"
+    GOOGLE_SHEETS_API_URL: str = "https://sheets.googleapis.com/v4"
+    # Service-account key file (needs google-auth) or a ready OAuth access token
+    GOOGLE_SERVICE_ACCOUNT_FILE: Optional[str] = None
+    GOOGLE_SHEETS_ACCESS_TOKEN: Optional[str] = None
+    
+    # Direct sync (on when GOOGLE_SHEETS_ID is set): rows are buffered and
+    # written with one append + one batchUpdate request per flush
+    SHEETS_FLUSH_INTERVAL_SECONDS: float = 10.0
+    SHEETS_BATCH_SIZE: int = 500
+    SHEETS_REQUESTS_PER_MINUTE: int = 50  # below the 60 requests/min/user quota
+    SHEETS_ANALYTICS_INTERVAL_SECONDS: float = 300.0
+    SHEETS_DNC_POLL_SECONDS: float = 300.0
+    SHEETS_STATE_PATH: str = "sheets_state.db"
+    
+    # =========================================================================
+    # Outbound HTTP Client Pool
+    # =========================================================================
+    HTTP2_ENABLED: bool = True
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    HTTP_DEFAULT_TIMEOUT_SECONDS: float = 30.0
+    
+    # =========================================================================
+    # Latency Budgets (mid-call /functions/* endpoints)
+    # =========================================================================
+    BUDGET_SEARCH_KNOWLEDGE_SECONDS: float = 2.5
+    BUDGET_SAVE_LEAD_SECONDS: float = 2.0
+    BUDGET_CHECK_COMPLIANCE_SECONDS: float = 0.5
+    
+    # Duplicate a slow embedding / vector call after its observed p95
+    HEDGE_MIN_SAMPLES: int = 20  # samples before p95 is trusted
+    HEDGE_DEFAULT_DELAY_SECONDS: float = 0.5
+    LATENCY_WINDOW: int = 1024
     
     # =========================================================================
     # Application Configuration
@@ -59,6 +195,16 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # "json" (one object per line) or "text"
+    LOG_QUEUE_SIZE: int = 10000  # records beyond this are dropped, never waited for
+    LOG_MAX_FIELD_CHARS: int = 2000
+    # Keys whose values are masked wherever they appear in logged payloads
+    LOG_REDACT_FIELDS: List[str] = [
+        "phone", "phone_number", "customer_number", "recipient_phone",
+        "email", "name", "customer_name"
+    ]
+    # Keep 1 in N records of high-volume events (by extra={"event": ...})
+    LOG_SAMPLE_EVERY: Dict[str, int] = {"transcript_chunk": 20}
     API_BASE_URL: Optional[str] = None
     
     # =========================================================================
@@ -67,13 +213,30 @@ class Settings(BaseSettings):
     CALLING_HOURS_START: str = "09:00"
     CALLING_HOURS_END: str = "19:00"
     TIMEZONE: str = "Asia/Kolkata"
+    # Per-weekday overrides, e.g. {"sat": "10:00-14:00", "sun": "closed"}
+    CALLING_WEEKDAY_HOURS: Dict[str, str] = {}
+    # Dates (YYYY-MM-DD) with no calling at all
+    CALLING_HOLIDAYS: List[str] = []
     
     MAX_CALL_DURATION_MINUTES: int = 10
     MAX_CALLS_PER_LEAD_PER_DAY: int = 3
+    CALL_COUNTER_DIR: str = "call_counts"
+    DEFAULT_COUNTRY_CODE: str = "91"
     RATE_LIMIT_CALLS_PER_HOUR: int = 100
+    CAMPAIGN_MAX_CONCURRENCY: int = 10
+    CAMPAIGN_RATE_BURST: int = 5
+    # Finished campaigns are forgotten after the retention period, or oldest
+    # first beyond the cap; each keeps at most the latest N per-lead results
+    CAMPAIGN_RETENTION_SECONDS: float = 86400.0
+    CAMPAIGN_MAX_FINISHED: int = 100
+    CAMPAIGN_MAX_RESULTS: int = 10000
     
     PROFANITY_FILTER_ENABLED: bool = True
+    PROFANITY_LEXICON_PATH: Optional[str] = None
     DNC_CHECK_ENABLED: bool = True
+    DNC_INDEX_DIR: str = "dnc"
+    DNC_COMPACT_THRESHOLD: int = 10000
+    DNC_REFRESH_SECONDS: float = 5.0
     
     # =========================================================================
     # Security
@@ -86,6 +249,18 @@ class Settings(BaseSettings):
     MONGODB_URL: Optional[str] = "mongodb://localhost:27017"
     MONGODB_DATABASE: str = "unlisted_edge_calls"
     
+    # Lead storage: "mongodb" (MONGODB_URL / MONGODB_DATABASE) or "sqlite" (offline stand-in)
+    LEAD_STORE_BACKEND: str = "sqlite"
+    LEAD_STORE_PATH: str = "leads.db"
+    LEADS_COLLECTION: str = "leads"
+    # Saves are coalesced per call and written in bulk when either trigger fires
+    LEAD_FLUSH_BATCH_SIZE: int = 100
+    LEAD_FLUSH_INTERVAL_SECONDS: float = 1.0
+    
+    # Ended calls and their hourly / daily / per-agent rollups (served by /analytics)
+    CALL_RECORDS_PATH: str = "calls.db"
+    CALL_CONNECTED_STATUSES: List[str] = ["completed"]
+    
     # =========================================================================
     # Optional: WhatsApp Configuration
     # =========================================================================
@@ -104,23 +279,45 @@ class Settings(BaseSettings):
     class Config:
         env_file = ".env"
         case_sensitive = True
+    
+    @model_validator(mode="after")
+    def _resolve_data_paths(self):
+        """Anchor relative data paths at DATA_DIR instead of the working directory"""
+        data_dir = os.path.abspath(os.path.expanduser(self.DATA_DIR))
+        self.DATA_DIR = data_dir
+        for name in DATA_PATH_SETTINGS:
+            value = getattr(self, name)
+            if value:
+                setattr(self, name, os.path.join(data_dir, os.path.expanduser(value)))
+        return self
         
+    def require(self, name: str) -> str:
+        """
+        Value of a setting that a service cannot run without
+        
+        Raises:
+            RuntimeError: if the setting is empty
+        """
+        value = getattr(self, name)
+        if not value:
+            raise RuntimeError(f"{name} is not configured")
+        return value
+    
     def get_calling_hours_range(self) -> tuple:
         """Get calling hours as datetime.time objects"""
-        from datetime import datetime
-        
-        start_time = datetime.strptime(self.CALLING_HOURS_START, "%H:%M").time()
-        end_time = datetime.strptime(self.CALLING_HOURS_END, "%H:%M").time()
+        start_time = _parse_hhmm(self.CALLING_HOURS_START)
+        end_time = _parse_hhmm(self.CALLING_HOURS_END)
         
         return start_time, end_time
     
     def is_within_calling_hours(self) -> bool:
-        """Check if current time is within calling hours"""
+        """
+        Check if current time is within the default daily calling hours
+        (services/calling_window.py also applies weekday rules and holidays)
+        """
         from datetime import datetime
-        import pytz
         
-        tz = pytz.timezone(self.TIMEZONE)
-        current_time = datetime.now(tz).time()
+        current_time = datetime.now(get_timezone(self.TIMEZONE)).time()
         start_time, end_time = self.get_calling_hours_range()
         
         return start_time <= current_time <= end_time
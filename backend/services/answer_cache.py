@@ -0,0 +1,177 @@
+"""
+Semantic Answer Cache
+Reuses the final knowledge-search answer for queries that are exact or
+near-duplicate (by embedding cosine similarity) repeats of recent ones
+"""
+
+import os
+import sys
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+from services.embedding_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """
+    Bounded LRU of (query embedding, answer) pairs
+
+    Embeddings live L2-normalized in a preallocated float32 matrix, so a
+    lookup is one matrix-vector product over at most `max_entries` rows.
+    The cache is dropped whenever the knowledge index changes: on writes
+    through VectorStore in this process and, for re-index runs in other
+    processes, when the index manifest file changes.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        threshold: Optional[float] = None,
+        ttl_seconds: Optional[float] = None,
+        manifest_path: Optional[str] = None
+    ):
+        self.max_entries = max_entries or settings.ANSWER_CACHE_SIZE
+        self.threshold = threshold if threshold is not None else settings.ANSWER_CACHE_THRESHOLD
+        self.ttl = ttl_seconds or settings.ANSWER_CACHE_TTL_SECONDS
+        self.manifest_path = manifest_path if manifest_path is not None else settings.VECTOR_MANIFEST_PATH
+
+        self._matrix: Optional[np.ndarray] = None
+        self._active = np.zeros(self.max_entries, dtype=bool)
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # normalized query -> slot
+        self._slots: List[Optional[Dict[str, Any]]] = [None] * self.max_entries
+        self._free = list(range(self.max_entries - 1, -1, -1))
+
+        self._manifest_mtime = self._read_manifest_mtime()
+        self._next_manifest_check = 0.0
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _read_manifest_mtime(self) -> Optional[int]:
+        if not self.manifest_path:
+            return None
+        try:
+            return os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _check_reindex(self):
+        """Drop everything if a re-index run rewrote the manifest (checked at most once a second)"""
+        now = time.monotonic()
+        if now < self._next_manifest_check:
+            return
+        self._next_manifest_check = now + 1.0
+        mtime = self._read_manifest_mtime()
+        if mtime != self._manifest_mtime:
+            self._manifest_mtime = mtime
+            self.invalidate()
+
+    def _release(self, key: str):
+        slot = self._entries.pop(key)
+        self._active[slot] = False
+        self._slots[slot] = None
+        self._free.append(slot)
+
+    def _touch(self, key: str, slot: int) -> Optional[Dict[str, Any]]:
+        entry = self._slots[slot]
+        if entry["expires_at"] <= time.time():
+            self._release(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry["answer"]
+
+    def get_exact(self, query: str) -> Optional[Dict[str, Any]]:
+        """Answer for a query with the same normalized text (no embedding needed)"""
+        self._check_reindex()
+        key = normalize_query(query)
+        slot = self._entries.get(key)
+        if slot is None:
+            return None
+        answer = self._touch(key, slot)
+        if answer is not None:
+            self.exact_hits += 1
+        return answer
+
+    def get_similar(self, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """Answer for the most similar cached query at or above the threshold"""
+        self._check_reindex()
+        if not self._entries:
+            self.misses += 1
+            return None
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if not norm or query.shape[0] != self._matrix.shape[1]:
+            self.misses += 1
+            return None
+
+        scores = self._matrix @ (query / norm)
+        scores[~self._active] = -np.inf
+        slot = int(np.argmax(scores))
+        if scores[slot] >= self.threshold:
+            answer = self._touch(self._slots[slot]["key"], slot)
+            if answer is not None:
+                self.semantic_hits += 1
+                return answer
+
+        self.misses += 1
+        return None
+
+    def put(self, query: str, embedding: List[float], answer: Dict[str, Any]):
+        """Cache the answer given for a query"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if not norm:
+            return
+        if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+            self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            self.invalidate()
+
+        key = normalize_query(query)
+        if key in self._entries:
+            self._release(key)
+        while not self._free:
+            self._release(next(iter(self._entries)))
+
+        slot = self._free.pop()
+        self._matrix[slot] = vector / norm
+        self._active[slot] = True
+        self._slots[slot] = {"key": key, "answer": answer, "expires_at": time.time() + self.ttl}
+        self._entries[key] = slot
+
+    def invalidate(self):
+        """Forget all answers (the knowledge index changed)"""
+        if self._entries:
+            self.invalidations += 1
+        self._active[:] = False
+        self._entries.clear()
+        self._slots = [None] * self.max_entries
+        self._free = list(range(self.max_entries - 1, -1, -1))
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round((self.exact_hits + self.semantic_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+# Create singleton instance
+answer_cache = SemanticAnswerCache()
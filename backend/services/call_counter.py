@@ -0,0 +1,230 @@
+"""
+Per-Lead Daily Call Counter
+Enforces MAX_CALLS_PER_LEAD_PER_DAY with an in-memory count per phone
+number, backed by an append-only journal per calendar day (TIMEZONE)
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Optional
+
+import pytz
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, single worker only
+    fcntl = None
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+from services.phone_numbers import normalize_phone
+
+logger = logging.getLogger(__name__)
+
+
+class CallLimitExceeded(Exception):
+    """Raised when a lead has already been called the maximum times today"""
+
+    def __init__(self, phone: str, count: int, limit: int):
+        super().__init__(f"{phone} already called {count} times today (limit {limit})")
+        self.phone = phone
+        self.count = count
+        self.limit = limit
+
+
+class InvalidPhoneNumber(ValueError):
+    """Raised when a number cannot be normalized, so it cannot be counted or dialled"""
+
+    def __init__(self, phone: Optional[str]):
+        super().__init__(f"Invalid phone number: {phone}")
+        self.phone = phone
+
+
+class CallCounter:
+    """
+    Counts calls per normalized phone number for the current local day
+
+    Every change is appended to `<dir>/<YYYY-MM-DD>.log` as "<phone> <delta>".
+    Lookups are dict reads; the journal is only re-read for bytes appended
+    since the last sync (by this or another worker), so checks stay O(1)
+    while counts survive restarts. Journals of previous days are deleted on
+    rollover. The limit check and its journal append happen under an
+    exclusive lock on the journal, so workers cannot both pass the limit.
+    """
+
+    def __init__(self, directory: Optional[str] = None, limit: Optional[int] = None):
+        self.directory = directory or settings.CALL_COUNTER_DIR
+        self.limit = limit if limit is not None else settings.MAX_CALLS_PER_LEAD_PER_DAY
+        self.tz = pytz.timezone(settings.TIMEZONE)
+
+        self._counts: Dict[str, int] = {}
+        self._day: Optional[str] = None
+        self._rollover_at = 0.0
+        self._fd: Optional[int] = None
+        self._offset = 0
+        self._partial = b""
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Day handling
+    # ------------------------------------------------------------------
+
+    def _roll_if_needed(self):
+        """Switch to a new journal when the local calendar day changes"""
+        if time.time() < self._rollover_at and self._fd is not None:
+            return
+
+        now = datetime.now(self.tz)
+        day = now.strftime("%Y-%m-%d")
+        midnight = self.tz.localize(datetime.combine(now.date() + timedelta(days=1), datetime.min.time()))
+        self._rollover_at = midnight.timestamp()
+
+        if day == self._day and self._fd is not None:
+            return
+
+        self._close()
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._day = day
+        self._counts = {}
+        self._offset = 0
+        self._partial = b""
+        self._fd = os.open(self._journal_path(day), os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        self._sync()
+        self._evict_old_journals()
+
+        logger.info(f"Call counter using {self._journal_path(day)} ({len(self._counts)} leads today)")
+
+    def _journal_path(self, day: str) -> str:
+        return os.path.join(self.directory, f"{day}.log")
+
+    def _evict_old_journals(self):
+        current = f"{self._day}.log"
+        for name in os.listdir(self.directory):
+            if name.endswith(".log") and name != current:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError as e:
+                    logger.warning(f"Could not remove old call journal {name}: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Journal
+    # ------------------------------------------------------------------
+
+    def _sync(self):
+        """Apply journal lines appended since the last sync"""
+        size = os.fstat(self._fd).st_size
+        if size <= self._offset:
+            return
+
+        data = self._partial + os.pread(self._fd, size - self._offset, self._offset)
+        self._offset = size
+
+        lines = data.split(b"\n")
+        self._partial = lines.pop()
+        for line in lines:
+            try:
+                phone, delta = line.decode().split()
+                self._counts[phone] = max(0, self._counts.get(phone, 0) + int(delta))
+            except ValueError:
+                logger.warning(f"Skipping malformed call journal line: {line[:50]!r}")
+
+    def _append(self, phone: str, delta: int):
+        os.write(self._fd, f"{phone} {delta}\n".encode())
+        self._sync()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold today's journal exclusively (threads and other processes)"""
+        with self._lock:
+            self._roll_if_needed()
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def count(self, phone: str) -> int:
+        """Calls recorded today for this number"""
+        key = normalize_phone(phone)
+        if not key:
+            return 0
+        with self._lock:
+            self._roll_if_needed()
+            self._sync()
+            return self._counts.get(key, 0)
+
+    def can_call(self, phone: str) -> bool:
+        """True if the number is still below today's limit"""
+        return self.count(phone) < self.limit
+
+    def check_and_increment(self, phone: str) -> int:
+        """
+        Record a call attempt if the lead is under the daily limit
+
+        Args:
+            phone: Customer phone number (any format)
+
+        Returns:
+            Today's count including this call
+
+        Raises:
+            CallLimitExceeded: if the limit has already been reached
+            InvalidPhoneNumber: if the number cannot be normalized
+        """
+        key = normalize_phone(phone)
+        if not key:
+            raise InvalidPhoneNumber(phone)
+
+        with self._locked():
+            self._sync()
+            current = self._counts.get(key, 0)
+            if current >= self.limit:
+                raise CallLimitExceeded(key, current, self.limit)
+
+            self._append(key, 1)
+            return self._counts[key]
+
+    def release(self, phone: str):
+        """Undo an increment for a call that was never placed"""
+        key = normalize_phone(phone)
+        if key:
+            with self._locked():
+                self._append(key, -1)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._roll_if_needed()
+            self._sync()
+            return {
+                "day": self._day,
+                "leads_called_today": len(self._counts),
+                "calls_today": sum(self._counts.values()),
+                "limit_per_lead": self.limit
+            }
+
+    def close(self):
+        with self._lock:
+            self._close()
+            self._day = None
+
+
+# Create singleton instance
+call_counter = CallCounter()
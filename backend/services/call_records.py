@@ -0,0 +1,322 @@
+"""
+Call Record Store
+SQLite store of ended calls (indexed by call_id, phone and day) with
+rollups per hour, day and agent that are incremented on ingest, so
+analytics never scan call history
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings, get_timezone
+from services.phone_numbers import normalize_phone
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    call_id TEXT PRIMARY KEY,
+    phone TEXT,
+    agent_id TEXT,
+    status TEXT,
+    connected INTEGER NOT NULL,
+    duration REAL,
+    ended_at REAL NOT NULL,
+    day TEXT NOT NULL,
+    hour TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calls_phone ON calls (phone, ended_at);
+CREATE INDEX IF NOT EXISTS calls_day ON calls (day, ended_at);
+CREATE TABLE IF NOT EXISTS call_rollups (
+    kind TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    calls INTEGER NOT NULL,
+    connects INTEGER NOT NULL,
+    duration_sum REAL NOT NULL,
+    PRIMARY KEY (kind, bucket)
+);
+CREATE TABLE IF NOT EXISTS call_outcomes (
+    kind TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    status TEXT NOT NULL,
+    calls INTEGER NOT NULL,
+    PRIMARY KEY (kind, bucket, status)
+);
+"""
+
+_SUMMARY_COLUMNS = "call_id, phone, agent_id, status, connected, duration, ended_at"
+
+# Deltas are added in SQL, so concurrent workers never overwrite each other's counts
+_ADD_ROLLUP = (
+    "INSERT INTO call_rollups (kind, bucket, calls, connects, duration_sum) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (kind, bucket) DO UPDATE SET "
+    "calls = calls + excluded.calls, "
+    "connects = connects + excluded.connects, "
+    "duration_sum = duration_sum + excluded.duration_sum"
+)
+_ADD_OUTCOME = (
+    "INSERT INTO call_outcomes (kind, bucket, status, calls) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (kind, bucket, status) DO UPDATE SET calls = calls + excluded.calls"
+)
+
+# Bucket expressions over the calls table, for rebuilding rollups
+_BUCKETS_SQL = (
+    ("total", "'all'"),
+    ("day", "day"),
+    ("hour", "hour"),
+    ("agent", "COALESCE(agent_id, 'unknown')"),
+)
+
+
+class Rollup:
+    """Counters for one bucket (an hour, a day, an agent or all time)"""
+
+    __slots__ = ("calls", "connects", "duration_sum", "outcomes")
+
+    def __init__(self, calls: int = 0, connects: int = 0, duration_sum: float = 0.0, outcomes: Optional[Dict[str, int]] = None):
+        self.calls = calls
+        self.connects = connects
+        self.duration_sum = duration_sum
+        self.outcomes: Dict[str, int] = outcomes or {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "connects": self.connects,
+            "connect_rate": round(self.connects / self.calls, 4) if self.calls else 0.0,
+            "avg_duration_seconds": round(self.duration_sum / self.connects, 1) if self.connects else 0.0,
+            "outcomes": dict(self.outcomes)
+        }
+
+
+class CallRecordStore:
+    """
+    Ended calls plus incrementally maintained rollups
+
+    Each ingest writes the call row and adds its contribution to the
+    affected rollup rows in one transaction, as SQL increments, so several
+    workers can share the database. `analytics()` reads the rollup rows for
+    the requested buckets (a primary-key range each), however many calls
+    are stored. Re-ingesting a call_id replaces the record and moves its
+    contribution, so rollups stay exact. Hours and days are in TIMEZONE.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.CALL_RECORDS_PATH
+        self.tz = get_timezone(settings.TIMEZONE)
+        self.connected_statuses = frozenset(status.lower() for status in settings.CALL_CONNECTED_STATUSES)
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.executescript(_SCHEMA)
+            self._rebuild_if_missing(self._conn)
+        return self._conn
+
+    @staticmethod
+    def _rebuild_if_missing(conn: sqlite3.Connection):
+        """Derive rollups from stored calls when they are absent (e.g. an older database)"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            has_calls = conn.execute("SELECT 1 FROM calls LIMIT 1").fetchone()
+            has_rollups = conn.execute("SELECT 1 FROM call_rollups LIMIT 1").fetchone()
+            if has_calls and not has_rollups:
+                for kind, bucket in _BUCKETS_SQL:
+                    conn.execute(
+                        f"INSERT INTO call_rollups (kind, bucket, calls, connects, duration_sum) "
+                        f"SELECT '{kind}', {bucket}, COUNT(*), SUM(connected), "
+                        f"TOTAL(CASE WHEN connected THEN duration ELSE 0 END) FROM calls GROUP BY 2"
+                    )
+                    conn.execute(
+                        f"INSERT INTO call_outcomes (kind, bucket, status, calls) "
+                        f"SELECT '{kind}', {bucket}, status, COUNT(*) FROM calls GROUP BY 2, 3"
+                    )
+                logger.info("Rebuilt call rollups from stored calls")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _buckets(self, agent_id: Optional[str], day: str, hour: str) -> List[Tuple[str, str]]:
+        return [("total", "all"), ("day", day), ("hour", hour), ("agent", agent_id or "unknown")]
+
+    def record(self, call: Dict[str, Any], ended_at: Optional[float] = None) -> bool:
+        """
+        Store one ended call and update the rollups
+
+        Args:
+            call: Call data as forwarded to Make.com (call_id, customer_number,
+                  duration_seconds, status, ...) plus an optional agent_id
+            ended_at: Epoch seconds the call ended (default now)
+
+        Returns:
+            True if the call was new, False if it replaced an earlier record
+        """
+        call_id = call.get("call_id")
+        if not call_id:
+            raise ValueError("call_id is required")
+
+        ended_at = ended_at if ended_at is not None else time.time()
+        local = datetime.fromtimestamp(ended_at, self.tz)
+        day, hour = local.strftime("%Y-%m-%d"), local.strftime("%Y-%m-%dT%H")
+        phone = normalize_phone(call.get("customer_number")) or call.get("customer_number")
+        agent_id = call.get("agent_id")
+        status = (call.get("status") or "unknown").lower()
+        duration = float(call.get("duration_seconds") or 0)
+        connected = status in self.connected_statuses and duration > 0
+
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                previous = conn.execute(
+                    "SELECT agent_id, status, connected, duration, day, hour FROM calls WHERE call_id = ?", (call_id,)
+                ).fetchone()
+
+                changes: List[Tuple[Tuple[str, str], str, bool, float, int]] = []
+                if previous:
+                    old_agent, old_status, old_connected, old_duration, old_day, old_hour = previous
+                    for bucket in self._buckets(old_agent, old_day, old_hour):
+                        changes.append((bucket, old_status, bool(old_connected), old_duration or 0.0, -1))
+                for bucket in self._buckets(agent_id, day, hour):
+                    changes.append((bucket, status, connected, duration, 1))
+
+                conn.execute(
+                    "INSERT OR REPLACE INTO calls (call_id, phone, agent_id, status, connected, duration, ended_at, day, hour, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (call_id, phone, agent_id, status, int(connected), duration, ended_at, day, hour, json.dumps(call, default=str))
+                )
+                conn.executemany(_ADD_ROLLUP, [
+                    (kind, bucket, sign, sign * int(was_connected), sign * seconds if was_connected else 0.0)
+                    for (kind, bucket), _, was_connected, seconds, sign in changes
+                ])
+                conn.executemany(_ADD_OUTCOME, [
+                    (kind, bucket, outcome, sign)
+                    for (kind, bucket), outcome, _, _, sign in changes
+                ])
+                if previous:
+                    conn.execute("DELETE FROM call_outcomes WHERE calls <= 0")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        return previous is None
+
+    # ------------------------------------------------------------------
+    # Lookups (all served by an index)
+    # ------------------------------------------------------------------
+
+    def get(self, call_id: str) -> Optional[Dict[str, Any]]:
+        """Full record of one call"""
+        with self._lock:
+            row = self.conn.execute("SELECT data, ended_at FROM calls WHERE call_id = ?", (call_id,)).fetchone()
+        if row is None:
+            return None
+        return {**json.loads(row[0]), "ended_at": row[1]}
+
+    def _summaries(self, where: str, args: Tuple, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {_SUMMARY_COLUMNS} FROM calls WHERE {where} ORDER BY ended_at DESC LIMIT ?",
+                (*args, limit)
+            ).fetchall()
+        return [
+            {
+                "call_id": call_id,
+                "phone": phone,
+                "agent_id": agent_id,
+                "status": status,
+                "connected": bool(connected),
+                "duration_seconds": duration,
+                "ended_at": ended_at
+            }
+            for call_id, phone, agent_id, status, connected, duration, ended_at in rows
+        ]
+
+    def by_phone(self, phone: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent calls to a number"""
+        return self._summaries("phone = ?", (normalize_phone(phone) or phone,), limit)
+
+    def by_day(self, day: str, limit: int = 500) -> List[Dict[str, Any]]:
+        """Most recent calls that ended on a day (YYYY-MM-DD, TIMEZONE)"""
+        return self._summaries("day = ?", (day,), limit)
+
+    # ------------------------------------------------------------------
+    # Analytics
+    # ------------------------------------------------------------------
+
+    def _rollups(self, kind: str, first: Optional[str] = None, last: Optional[str] = None) -> Dict[str, Rollup]:
+        """Rollups of one kind, optionally only buckets in [first, last]"""
+        where, args = "kind = ?", [kind]
+        if first is not None:
+            where, args = where + " AND bucket BETWEEN ? AND ?", args + [first, last]
+
+        with self._lock:
+            conn = self.conn
+            rows = conn.execute(
+                f"SELECT bucket, calls, connects, duration_sum FROM call_rollups WHERE {where}", args
+            ).fetchall()
+            outcomes = conn.execute(
+                f"SELECT bucket, status, calls FROM call_outcomes WHERE {where} AND calls > 0", args
+            ).fetchall()
+
+        rollups = {bucket: Rollup(calls, connects, duration_sum) for bucket, calls, connects, duration_sum in rows}
+        for bucket, status, calls in outcomes:
+            rollups.setdefault(bucket, Rollup()).outcomes[status] = calls
+        return rollups
+
+    def analytics(self, hours: int = 24, days: int = 30, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Totals, the last `hours` hours, the last `days` days and per-agent rollups
+
+        Cost depends on `hours + days + number of agents`, not on how many
+        calls are stored. Reads the database, so calls ingested by other
+        workers are included.
+        """
+        now = (now or datetime.now(self.tz)).astimezone(self.tz)
+        empty = Rollup()
+
+        def series(kind: str, count: int, step: timedelta, fmt: str) -> List[Dict[str, Any]]:
+            buckets = [(now - i * step).strftime(fmt) for i in range(count - 1, -1, -1)]
+            rollups = self._rollups(kind, buckets[0], buckets[-1])
+            return [{"bucket": bucket, **rollups.get(bucket, empty).to_dict()} for bucket in buckets]
+
+        agents = self._rollups("agent")
+        return {
+            "timezone": settings.TIMEZONE,
+            "total": self._rollups("total").get("all", empty).to_dict(),
+            "hourly": series("hour", hours, timedelta(hours=1), "%Y-%m-%dT%H"),
+            "daily": series("day", days, timedelta(days=1), "%Y-%m-%d"),
+            "agents": {bucket: agents[bucket].to_dict() for bucket in sorted(agents) if agents[bucket].calls}
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Create singleton instance
+call_records = CallRecordStore()
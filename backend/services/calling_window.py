@@ -0,0 +1,226 @@
+"""
+Calling Window
+Precomputed calling-hours rules (per weekday, holidays) that answer both
+"may we call now?" and "when is the next permitted instant?"
+"""
+
+import os
+import sys
+import heapq
+import itertools
+import logging
+from datetime import datetime, date, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings, get_timezone
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+Hours = Optional[Tuple[time, time]]
+
+
+def _parse_time(value: str) -> time:
+    return datetime.strptime(value.strip(), "%H:%M").time()
+
+
+def _spoken_time(value: datetime) -> str:
+    """Clock time as spoken: 09:00 -> 9 AM, 14:30 -> 2:30 PM"""
+    hour = value.hour % 12 or 12
+    suffix = "AM" if value.hour < 12 else "PM"
+    return f"{hour} {suffix}" if not value.minute else f"{hour}:{value.minute:02d} {suffix}"
+
+
+def _parse_hours(value: str) -> Hours:
+    """'09:00-19:00' -> (09:00, 19:00); '' / 'closed' -> None"""
+    value = (value or "").strip().lower()
+    if not value or value == "closed":
+        return None
+    start, end = value.split("-")
+    return _parse_time(start), _parse_time(end)
+
+
+class CallingWindow:
+    """
+    Weekly calling-hours schedule in one timezone
+
+    All parsing happens once in the constructor; checks only convert the
+    instant to local time and compare against the precomputed rules.
+    """
+
+    def __init__(
+        self,
+        timezone: str,
+        default_hours: Tuple[time, time],
+        weekday_hours: Optional[Dict[int, Hours]] = None,
+        holidays: Optional[Iterable[date]] = None
+    ):
+        self.tz = get_timezone(timezone)
+        self.hours: List[Hours] = [
+            (weekday_hours or {}).get(day, default_hours) for day in range(7)
+        ]
+        self.holidays = set(holidays or ())
+
+    @classmethod
+    def from_settings(cls) -> "CallingWindow":
+        """
+        Build from CALLING_HOURS_START/END, CALLING_WEEKDAY_HOURS
+        ({"sat": "10:00-14:00", "sun": "closed"}) and CALLING_HOLIDAYS
+        (["2026-01-26", ...])
+        """
+        weekday_hours = {}
+        for name, value in settings.CALLING_WEEKDAY_HOURS.items():
+            key = name.strip().lower()[:3]
+            if key not in WEEKDAYS:
+                raise ValueError(f"Unknown weekday in CALLING_WEEKDAY_HOURS: {name}")
+            weekday_hours[WEEKDAYS.index(key)] = _parse_hours(value)
+
+        return cls(
+            timezone=settings.TIMEZONE,
+            default_hours=(_parse_time(settings.CALLING_HOURS_START), _parse_time(settings.CALLING_HOURS_END)),
+            weekday_hours=weekday_hours,
+            holidays=[date.fromisoformat(day) for day in settings.CALLING_HOLIDAYS]
+        )
+
+    def _localize(self, at: Optional[datetime], tz) -> datetime:
+        if at is None:
+            return datetime.now(tz)
+        if at.tzinfo is None:
+            return tz.localize(at)
+        return at.astimezone(tz)
+
+    def _hours_on(self, day: date) -> Hours:
+        if day in self.holidays:
+            return None
+        return self.hours[day.weekday()]
+
+    def is_open(self, at: Optional[datetime] = None, timezone: Optional[str] = None) -> bool:
+        """
+        Check if calling is allowed at `at` (default: now)
+
+        Args:
+            at: Instant to check (naive values are taken as local time)
+            timezone: Lead's timezone, if different from TIMEZONE
+        """
+        local = self._localize(at, get_timezone(timezone) if timezone else self.tz)
+        hours = self._hours_on(local.date())
+        if hours is None:
+            return False
+        current = local.time().replace(tzinfo=None)
+        return hours[0] <= current <= hours[1]
+
+    def next_allowed(self, at: Optional[datetime] = None, timezone: Optional[str] = None) -> datetime:
+        """
+        Earliest instant at or after `at` when calling is allowed
+
+        Args:
+            at: Starting instant (default: now)
+            timezone: Lead's timezone, if different from TIMEZONE
+
+        Returns:
+            Timezone-aware datetime (equal to `at` if the window is open)
+        """
+        tz = get_timezone(timezone) if timezone else self.tz
+        local = self._localize(at, tz)
+
+        for offset in range(366):
+            day = local.date() + timedelta(days=offset)
+            hours = self._hours_on(day)
+            if hours is None:
+                continue
+
+            start, end = hours
+            if offset == 0:
+                current = local.time().replace(tzinfo=None)
+                if current > end:
+                    continue
+                if current >= start:
+                    return local
+            return tz.normalize(tz.localize(datetime.combine(day, start)))
+
+        raise ValueError("No calling window in the next year - check CALLING_WEEKDAY_HOURS/CALLING_HOLIDAYS")
+
+    def next_window(self, at: Optional[datetime] = None, timezone: Optional[str] = None) -> Tuple[datetime, datetime]:
+        """
+        Start and end of the next (or current) calling window
+
+        Returns:
+            (start, end) as timezone-aware datetimes; start equals `at` if
+            the window is open
+        """
+        start = self.next_allowed(at, timezone)
+        hours = self._hours_on(start.date())
+        end = start.tzinfo.normalize(start.tzinfo.localize(datetime.combine(start.date(), hours[1])))
+        return start, end
+
+    def describe_next_window(self, at: Optional[datetime] = None, timezone: Optional[str] = None) -> str:
+        """
+        Next calling window as a spoken phrase, e.g. "tomorrow between 9 AM
+        and 7 PM IST" or "on Monday between 10 AM and 2 PM IST"
+        """
+        now = self._localize(at, get_timezone(timezone) if timezone else self.tz)
+        start, end = self.next_window(now, timezone)
+
+        days = (start.date() - now.date()).days
+        if days == 0:
+            day = "today"
+        elif days == 1:
+            day = "tomorrow"
+        elif days < 7:
+            day = f"on {start:%A}"
+        else:
+            day = f"on {start:%A} {start.day} {start:%B}"
+        return f"{day} between {_spoken_time(start)} and {_spoken_time(end)} {start:%Z}"
+
+    def seconds_until_open(self, at: Optional[datetime] = None, timezone: Optional[str] = None) -> float:
+        """0 if open now, otherwise seconds until the next window"""
+        now = self._localize(at, self.tz)
+        return max(0.0, (self.next_allowed(now, timezone) - now).total_seconds())
+
+    def describe(self) -> Dict[str, Any]:
+        """Rules as strings, for health/status endpoints"""
+        return {
+            "timezone": self.tz.zone,
+            "hours": {
+                WEEKDAYS[day]: f"{h[0]:%H:%M}-{h[1]:%H:%M}" if h else "closed"
+                for day, h in enumerate(self.hours)
+            },
+            "holidays": sorted(day.isoformat() for day in self.holidays)
+        }
+
+
+class DeferredQueue:
+    """Time-ordered queue of items waiting for their calling window"""
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._seq = itertools.count()
+
+    def push(self, due: datetime, item: Any):
+        heapq.heappush(self._heap, (due.timestamp(), next(self._seq), item))
+
+    def next_due(self) -> Optional[float]:
+        """Epoch seconds of the earliest item, or None if empty"""
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> List[Any]:
+        """Remove and return every item due at or before `now`"""
+        items = []
+        while self._heap and self._heap[0][0] <= now:
+            items.append(heapq.heappop(self._heap)[2])
+        return items
+
+    def drain(self) -> List[Any]:
+        items = [entry[2] for entry in sorted(self._heap)]
+        self._heap = []
+        return items
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+# Create singleton instance
+calling_window = CallingWindow.from_settings()
@@ -0,0 +1,374 @@
+"""
+Campaign Dialer
+Fans a list of leads out to Bolna with bounded concurrency, throttled by a
+token bucket sized from RATE_LIMIT_CALLS_PER_HOUR. Leads that come up
+outside the calling window wait in a time-ordered queue.
+"""
+
+import os
+import sys
+import time
+import uuid
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Iterable
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+from bolna_service import bolna_service
+from services.call_counter import CallLimitExceeded, InvalidPhoneNumber
+from services.dnc_index import dnc_index
+from services.calling_window import calling_window, DeferredQueue
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Async token bucket rate limiter
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    Waiters are served in FIFO order, so a long campaign cannot starve
+    other callers sharing the same bucket.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take tokens without waiting; False if not enough are available"""
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens: float = 1):
+        """Wait until `tokens` are available and take them"""
+        async with self._lock:
+            while not self.try_acquire(tokens):
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+
+class Campaign:
+    """Progress and per-lead results of one bulk dialing run"""
+
+    def __init__(self, name: Optional[str], total: int, max_results: Optional[int] = None):
+        self.id = uuid.uuid4().hex
+        self.name = name or f"campaign-{self.id[:8]}"
+        self.total = total
+        self.status = "queued"
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        # Latest results only; counters above cover every lead
+        self.results: deque = deque(maxlen=max_results or None)
+        self.results_dropped = 0
+        self.deferred = DeferredQueue()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.failed + self.skipped
+
+    def record(self, index: int, phone: Optional[str], status: str, **details):
+        """Store the outcome for one lead and update counters"""
+        if status == "initiated":
+            self.succeeded += 1
+        elif status == "failed":
+            self.failed += 1
+        else:
+            self.skipped += 1
+
+        if self.results.maxlen is not None and len(self.results) == self.results.maxlen:
+            self.results_dropped += 1
+        self.results.append({"index": index, "phone": phone, "status": status, **details})
+
+    def progress(self) -> Dict:
+        """Summary suitable for the status endpoint"""
+        elapsed = None
+        if self.started_at:
+            elapsed = ((self.finished_at or datetime.now()) - self.started_at).total_seconds()
+
+        return {
+            "campaign_id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "deferred": len(self.deferred),
+            "results_dropped": self.results_dropped,
+            "next_window_at": (
+                datetime.fromtimestamp(self.deferred.next_due()).isoformat()
+                if len(self.deferred) else None
+            ),
+            "percent_complete": round(100.0 * self.processed / self.total, 2) if self.total else 100.0,
+            "calls_per_minute": round(60.0 * self.processed / elapsed, 2) if elapsed else 0.0,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class CampaignDialer:
+    """
+    Runs campaigns in the background of the FastAPI event loop
+
+    All campaigns share one token bucket, so the combined outbound call rate
+    never exceeds RATE_LIMIT_CALLS_PER_HOUR. Finished campaigns are kept for
+    CAMPAIGN_RETENTION_SECONDS, and at most CAMPAIGN_MAX_FINISHED of them.
+    """
+
+    def __init__(self, bolna=None):
+        self.bolna = bolna or bolna_service
+        self.max_concurrency = max(1, settings.CAMPAIGN_MAX_CONCURRENCY)
+        self.bucket = TokenBucket(
+            rate=settings.RATE_LIMIT_CALLS_PER_HOUR / 3600.0,
+            capacity=settings.CAMPAIGN_RATE_BURST
+        )
+        self.retention_seconds = settings.CAMPAIGN_RETENTION_SECONDS
+        self.max_finished = max(0, settings.CAMPAIGN_MAX_FINISHED)
+        self.max_results = max(1, settings.CAMPAIGN_MAX_RESULTS)
+        self.campaigns: Dict[str, Campaign] = {}
+        self.dialing = 0
+
+    @staticmethod
+    def parse_lead(raw: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Normalize a lead row from JSON or CSV
+
+        Accepts `phone`, `phone_number` or `customer_number` for the number,
+        `name` or `customer_name` for the name and an optional `timezone`
+        for the lead's calling window; every other non-empty field is
+        attached to the call as metadata. A row that is not an object is
+        kept as an invalid lead (with an `error`), so it is reported in the
+        campaign results.
+        """
+        if not isinstance(raw, dict):
+            return {
+                "phone": None,
+                "name": None,
+                "timezone": None,
+                "metadata": {},
+                "error": f"lead must be an object, got {type(raw).__name__}"
+            }
+
+        lead = {k.strip(): v for k, v in raw.items() if k}
+        phone = lead.pop("phone", None) or lead.pop("phone_number", None) or lead.pop("customer_number", None)
+        name = lead.pop("name", None) or lead.pop("customer_name", None)
+        timezone = lead.pop("timezone", None) or None
+        metadata = {k: v for k, v in lead.items() if v not in (None, "")}
+
+        return {
+            "phone": str(phone).strip() if phone else None,
+            "name": name,
+            "timezone": timezone,
+            "metadata": metadata
+        }
+
+    def start(self, leads: Iterable[Dict[str, Any]], name: Optional[str] = None) -> Campaign:
+        """
+        Create a campaign and start dialing in the background
+
+        Args:
+            leads: Lead rows (see parse_lead)
+            name: Optional campaign name
+
+        Returns:
+            The running Campaign
+
+        Raises:
+            ValueError: if there are no leads (nothing is registered or started)
+        """
+        parsed = [self.parse_lead(lead) for lead in leads]
+        if not parsed:
+            raise ValueError("No leads provided")
+        self.evict()
+        campaign = Campaign(name, len(parsed), max_results=self.max_results)
+        self.campaigns[campaign.id] = campaign
+        campaign.task = asyncio.create_task(self._run(campaign, parsed))
+
+        logger.info(f"Campaign {campaign.id} ({campaign.name}) queued with {campaign.total} leads")
+        return campaign
+
+    def get(self, campaign_id: str) -> Optional[Campaign]:
+        self.evict()
+        return self.campaigns.get(campaign_id)
+
+    def evict(self) -> int:
+        """Forget finished campaigns past retention or beyond the cap; returns how many"""
+        now = datetime.now()
+        finished = sorted(
+            (c for c in self.campaigns.values() if c.finished_at is not None),
+            key=lambda c: c.finished_at
+        )
+        expired = [c for c in finished if (now - c.finished_at).total_seconds() > self.retention_seconds]
+        kept = [c for c in finished if (now - c.finished_at).total_seconds() <= self.retention_seconds]
+        expired += kept[:max(0, len(kept) - self.max_finished)]
+
+        for campaign in expired:
+            del self.campaigns[campaign.id]
+        return len(expired)
+
+    def backlog(self) -> Dict[str, int]:
+        """Leads waiting to be dialled now and leads deferred to a later calling window"""
+        queued = deferred = 0
+        for campaign in self.campaigns.values():
+            if campaign.finished_at is not None:
+                continue
+            waiting = len(campaign.deferred)
+            deferred += waiting
+            queued += max(0, campaign.total - campaign.processed - waiting)
+        return {"queued": max(0, queued - self.dialing), "deferred": deferred}
+
+    def cancel(self, campaign_id: str) -> bool:
+        """Stop dialing; leads not yet started are marked cancelled"""
+        campaign = self.campaigns.get(campaign_id)
+        if not campaign or not campaign.task or campaign.task.done():
+            return False
+        campaign.task.cancel()
+        return True
+
+    async def _run(self, campaign: Campaign, leads: List[Dict[str, Any]]):
+        queue: asyncio.Queue = asyncio.Queue()
+        for index, lead in enumerate(leads):
+            queue.put_nowait((index, lead))
+
+        campaign.status = "running"
+        campaign.started_at = datetime.now()
+        workers = [
+            asyncio.create_task(self._worker(campaign, queue))
+            for _ in range(min(self.max_concurrency, max(1, campaign.total)))
+        ]
+
+        try:
+            while True:
+                await queue.join()
+                if not len(campaign.deferred):
+                    break
+
+                # Everything left is outside the calling window - sleep until the earliest slot
+                campaign.status = "waiting_for_window"
+                await asyncio.sleep(max(0.0, campaign.deferred.next_due() - time.time()))
+                for item in campaign.deferred.pop_due(time.time()):
+                    queue.put_nowait(item)
+                campaign.status = "running"
+
+            campaign.status = "completed"
+        except asyncio.CancelledError:
+            campaign.status = "cancelled"
+            leftover = campaign.deferred.drain()
+            while not queue.empty():
+                leftover.append(queue.get_nowait())
+            for index, lead in leftover:
+                campaign.record(index, lead["phone"], "cancelled")
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            campaign.finished_at = datetime.now()
+            logger.info(
+                f"Campaign {campaign.id} {campaign.status}: "
+                f"{campaign.succeeded} initiated, {campaign.failed} failed, {campaign.skipped} skipped"
+            )
+            self.evict()
+
+    async def _worker(self, campaign: Campaign, queue: asyncio.Queue):
+        while True:
+            index, lead = await queue.get()
+            try:
+                await self._dial(campaign, index, lead)
+            finally:
+                queue.task_done()
+
+    async def _dial(self, campaign: Campaign, index: int, lead: Dict[str, Any]):
+        phone = lead["phone"]
+        if lead.get("error"):
+            campaign.record(index, phone, "invalid", error=lead["error"])
+            return
+        if not phone:
+            campaign.record(index, phone, "invalid", error="missing phone number")
+            return
+
+        if settings.DNC_CHECK_ENABLED and dnc_index.contains(phone):
+            campaign.record(index, phone, "dnc")
+            return
+
+        if self._defer_if_closed(campaign, index, lead):
+            return
+
+        try:
+            await self.bucket.acquire()
+            # The window may have closed while waiting for a token
+            if self._defer_if_closed(campaign, index, lead):
+                return
+
+            self.dialing += 1
+            try:
+                result = await self.bolna.create_call(
+                    phone,
+                    customer_name=lead["name"],
+                    metadata={**lead["metadata"], "campaign_id": campaign.id}
+                )
+            finally:
+                self.dialing -= 1
+            campaign.record(index, phone, "initiated", call_id=result.get("call_id"))
+        except CallLimitExceeded as e:
+            campaign.record(index, phone, "limit_reached", error=str(e))
+        except InvalidPhoneNumber as e:
+            campaign.record(index, phone, "invalid", error=str(e))
+        except asyncio.CancelledError:
+            campaign.record(index, phone, "cancelled")
+            raise
+        except Exception as e:
+            campaign.record(index, phone, "failed", error=str(e))
+
+    @staticmethod
+    def _defer_if_closed(campaign: Campaign, index: int, lead: Dict[str, Any]) -> bool:
+        """Queue the lead for its next calling window instead of dialling now"""
+        try:
+            if calling_window.is_open(timezone=lead["timezone"]):
+                return False
+            due = calling_window.next_allowed(timezone=lead["timezone"])
+        except Exception as e:
+            campaign.record(index, lead["phone"], "invalid", error=f"bad timezone: {str(e)}")
+            return True
+
+        campaign.deferred.push(due, (index, lead))
+        return True
+
+    async def aclose(self):
+        """Cancel running campaigns (called on shutdown)"""
+        tasks = [c.task for c in self.campaigns.values() if c.task and not c.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Create singleton instance
+campaign_dialer = CampaignDialer()
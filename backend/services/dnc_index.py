@@ -0,0 +1,289 @@
+"""
+Do-Not-Call Index
+Sorted int64 array of E.164 numbers in a memory-mapped file with
+binary-search lookup, plus an append-only delta for incremental additions
+"""
+
+import os
+import sys
+import csv
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Set
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, single worker only
+    fcntl = None
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+from services.phone_numbers import phone_to_int
+
+logger = logging.getLogger(__name__)
+
+_ITEM_SIZE = np.dtype(np.int64).itemsize
+
+
+class DNCIndex:
+    """
+    Do-Not-Call registry shared by every worker on the host
+
+    Files in `directory`:
+        base.i64   sorted, unique int64 numbers (memory-mapped read-only,
+                   so all workers share the same page cache)
+        delta.i64  raw int64 numbers appended since the last compaction
+        .lock      flock guarding appends and compaction
+
+    Lookups are a binary search over the base array plus a set lookup in
+    the delta. Once the delta grows past DNC_COMPACT_THRESHOLD it is merged
+    into a new base file, which is swapped in atomically; other workers
+    notice the new file on their next refresh.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.DNC_INDEX_DIR
+        self.compact_threshold = settings.DNC_COMPACT_THRESHOLD
+        self.refresh_interval = settings.DNC_REFRESH_SECONDS
+
+        self.base_path = os.path.join(self.directory, "base.i64")
+        self.delta_path = os.path.join(self.directory, "delta.i64")
+        self.lock_path = os.path.join(self.directory, ".lock")
+
+        self._base = np.empty(0, dtype=np.int64)
+        self._base_id = None
+        self._delta: Set[int] = set()
+        self._delta_id = None
+        self._delta_offset = 0
+        self._next_refresh = 0.0
+
+    # ------------------------------------------------------------------
+    # File handling
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _file_id(path: str):
+        try:
+            st = os.stat(path)
+            return (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_base(self):
+        base_id = self._file_id(self.base_path)
+        if base_id == self._base_id:
+            return
+
+        if base_id and base_id[2] >= _ITEM_SIZE:
+            self._base = np.memmap(self.base_path, dtype=np.int64, mode="r")
+        else:
+            self._base = np.empty(0, dtype=np.int64)
+        self._base_id = base_id
+
+    def _load_delta(self):
+        delta_id = self._file_id(self.delta_path)
+        if delta_id is None:
+            self._delta, self._delta_id, self._delta_offset = set(), None, 0
+            return
+
+        # A new inode means the delta was compacted away by some worker
+        if self._delta_id is None or delta_id[0] != self._delta_id[0]:
+            self._delta, self._delta_offset = set(), 0
+        self._delta_id = delta_id
+
+        size = delta_id[2] - delta_id[2] % _ITEM_SIZE
+        if size > self._delta_offset:
+            with open(self.delta_path, "rb") as f:
+                f.seek(self._delta_offset)
+                new = np.frombuffer(f.read(size - self._delta_offset), dtype=np.int64)
+            self._delta.update(new.tolist())
+            self._delta_offset = size
+
+    def refresh(self, force: bool = False):
+        """Pick up compactions and appends made by other workers"""
+        now = time.monotonic()
+        if not force and now < self._next_refresh:
+            return
+        self._next_refresh = now + self.refresh_interval
+
+        self._load_base()
+        self._load_delta()
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def _contains_int(self, value: int) -> bool:
+        if value in self._delta:
+            return True
+        base = self._base
+        i = int(np.searchsorted(base, value))
+        return i < len(base) and int(base[i]) == value
+
+    def contains(self, phone: str) -> bool:
+        """
+        Check if a number is on the DNC list
+
+        Args:
+            phone: Phone number in any common format
+
+        Returns:
+            True if the normalized number is registered
+        """
+        value = phone_to_int(phone)
+        if value is None:
+            return False
+        self.refresh()
+        return self._contains_int(value)
+
+    __contains__ = contains
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._base) + len(self._delta)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def add(self, phones: Iterable[str]) -> int:
+        """
+        Append numbers to the registry
+
+        Args:
+            phones: Phone numbers in any common format
+
+        Returns:
+            Number of new entries added
+        """
+        self.refresh(force=True)
+        values = {v for v in (phone_to_int(p) for p in phones) if v is not None}
+        new = [v for v in values if not self._contains_int(v)]
+        if not new:
+            return 0
+
+        with self._locked():
+            with open(self.delta_path, "ab") as f:
+                f.write(np.asarray(new, dtype=np.int64).tobytes())
+        self.refresh(force=True)
+
+        if len(self._delta) >= self.compact_threshold:
+            self.compact()
+
+        logger.info(f"Added {len(new)} numbers to DNC index")
+        return len(new)
+
+    def _write_base(self, values: np.ndarray):
+        tmp_path = self.base_path + ".tmp"
+        values.astype(np.int64).tofile(tmp_path)
+        os.replace(tmp_path, self.base_path)
+
+    def _reset_delta(self):
+        # Replace rather than truncate, so other workers see a new inode
+        empty_path = self.delta_path + ".tmp"
+        open(empty_path, "wb").close()
+        os.replace(empty_path, self.delta_path)
+
+    def compact(self):
+        """Merge the delta into a new base file"""
+        with self._locked():
+            self.refresh(force=True)
+            if not self._delta:
+                return
+
+            delta = np.fromiter(self._delta, dtype=np.int64, count=len(self._delta))
+            merged = np.union1d(np.asarray(self._base), delta)
+            self._write_base(merged)
+
+            self._reset_delta()
+
+            self.refresh(force=True)
+
+        logger.info(f"Compacted DNC index: {len(self._base)} numbers")
+
+    def load_csv(self, path: str, column: Optional[str] = None, chunk_size: int = 1_000_000) -> int:
+        """
+        Bulk-load a CSV or sheet export into the base file
+
+        Args:
+            path: CSV file path
+            column: Column holding the phone number (default: first column,
+                    or `phone` if there is a header with that name)
+            chunk_size: Rows parsed per batch
+
+        Returns:
+            Total entries in the index after loading
+        """
+        chunks = []
+        buffer = []
+
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            first = next(reader, None)
+            if first is None:
+                return len(self)
+
+            header = [h.strip().lower() for h in first]
+            if column and column.lower() in header:
+                col = header.index(column.lower())
+            elif "phone" in header:
+                col = header.index("phone")
+            else:
+                col = 0
+                # No header row - the first line is data
+                if phone_to_int(first[0]) is not None:
+                    buffer.append(phone_to_int(first[0]))
+
+            for row in reader:
+                if len(row) > col:
+                    value = phone_to_int(row[col])
+                    if value is not None:
+                        buffer.append(value)
+                if len(buffer) >= chunk_size:
+                    chunks.append(np.unique(np.asarray(buffer, dtype=np.int64)))
+                    buffer = []
+
+        if buffer:
+            chunks.append(np.unique(np.asarray(buffer, dtype=np.int64)))
+
+        with self._locked():
+            self.refresh(force=True)
+            parts = [np.asarray(self._base)] + chunks
+            if self._delta:
+                parts.append(np.fromiter(self._delta, dtype=np.int64, count=len(self._delta)))
+            self._write_base(np.unique(np.concatenate(parts)))
+
+            self._reset_delta()
+
+            self.refresh(force=True)
+
+        logger.info(f"Loaded DNC export {path}: {len(self._base)} numbers in index")
+        return len(self._base)
+
+    def stats(self) -> Dict:
+        self.refresh()
+        return {
+            "base_entries": len(self._base),
+            "delta_entries": len(self._delta),
+            "base_file_bytes": self._base_id[2] if self._base_id else 0
+        }
+
+
+# Create singleton instance
+dnc_index = DNCIndex()
@@ -0,0 +1,146 @@
+"""
+Embedding Cache
+Two-tier cache (in-process LRU + SQLite on disk) for query embeddings,
+keyed by normalized text and embedding model
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation"""
+    return " ".join(text.casefold().split()).rstrip(" ?!.,")
+
+
+class EmbeddingCache:
+    """
+    LRU of recent embeddings in memory, backed by SQLite so repeated
+    questions stay free across restarts
+
+    Vectors are stored on disk as float32 blobs (~6 KB for 1536 dims).
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, path: Optional[str] = None):
+        self.max_entries = max_entries or settings.EMBEDDING_CACHE_SIZE
+        self.path = path if path is not None else settings.EMBEDDING_CACHE_PATH
+
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        # Embeddings may be requested from worker threads (hedged calls)
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        return hashlib.sha1(f"{model}\0{normalize_query(text)}".encode()).hexdigest()
+
+    @property
+    def conn(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None and self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, text TEXT NOT NULL, "
+                "vector BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+        return self._conn
+
+    def _remember(self, key: str, embedding: List[float]):
+        with self._lock:
+            self._memory[key] = embedding
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """
+        Cached embedding for `text` under `model`, or None
+        """
+        key = self.key(model, text)
+
+        with self._lock:
+            embedding = self._memory.get(key)
+            if embedding is not None:
+                self._memory.move_to_end(key)
+        if embedding is not None:
+            self.memory_hits += 1
+            return embedding
+
+        if self.path:
+            try:
+                row = self.conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                logger.error(f"Embedding cache read error: {str(e)}")
+                row = None
+            if row is not None:
+                embedding = array("f", row[0]).tolist()
+                self._remember(key, embedding)
+                self.disk_hits += 1
+                return embedding
+
+        self.misses += 1
+        return None
+
+    def put(self, model: str, text: str, embedding: List[float]):
+        """Store an embedding in both tiers"""
+        key = self.key(model, text)
+        self._remember(key, embedding)
+
+        if self.path:
+            try:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, model, text, vector, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, model, normalize_query(text)[:500], array("f", embedding).tobytes(), time.time())
+                )
+            except sqlite3.Error as e:
+                logger.error(f"Embedding cache write error: {str(e)}")
+
+    def clear(self):
+        """Drop both tiers (e.g. after switching embedding model)"""
+        self._memory.clear()
+        if self.path:
+            self.conn.execute("DELETE FROM embeddings")
+
+    def stats(self) -> Dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        disk_entries = None
+        if self.path:
+            try:
+                disk_entries = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            except sqlite3.Error:
+                pass
+        return {
+            "memory_entries": len(self._memory),
+            "disk_entries": disk_entries,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+# Create singleton instance
+embedding_cache = EmbeddingCache()
@@ -0,0 +1,118 @@
+"""
+Shared HTTP Client Pool
+Long-lived, connection-pooled httpx clients for outbound API calls
+(Bolna, Make.com, ...), owned by the FastAPI startup/shutdown lifecycle
+"""
+
+import os
+import sys
+import logging
+from typing import Dict
+from urllib.parse import urlsplit
+
+import httpx
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class HTTPClientPool:
+    """
+    One pooled `httpx.AsyncClient` per upstream host
+
+    Clients are created lazily on first use and reused for every request to
+    the same scheme://host:port, so TCP/TLS connections are kept alive
+    between calls instead of being set up per request.
+    """
+
+    def __init__(self):
+        """Read pool configuration from settings"""
+        self.limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+        )
+        self.timeout = httpx.Timeout(
+            settings.HTTP_DEFAULT_TIMEOUT_SECONDS,
+            connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS
+        )
+        self.http2 = settings.HTTP2_ENABLED and _http2_available()
+        if settings.HTTP2_ENABLED and not self.http2:
+            logger.warning("HTTP2_ENABLED is set but 'h2' is not installed, using HTTP/1.1")
+
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        """Reduce a URL to its scheme://host[:port] origin"""
+        parts = urlsplit(url)
+        if not parts.scheme or not parts.netloc:
+            raise ValueError(f"Not an absolute URL: {url}")
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    def get(self, url: str) -> httpx.AsyncClient:
+        """
+        Get the shared client for the host of `url`
+
+        Args:
+            url: Any absolute URL on the upstream host
+
+        Returns:
+            Pooled AsyncClient for that host
+        """
+        origin = self._origin(url)
+        client = self._clients.get(origin)
+
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2
+            )
+            self._clients[origin] = client
+            logger.info(f"Opened pooled HTTP client for {origin} (http2={self.http2})")
+
+        return client
+
+    def stats(self) -> Dict:
+        """Open clients and pool configuration"""
+        return {
+            "hosts": sorted(origin for origin, c in self._clients.items() if not c.is_closed),
+            "http2": self.http2,
+            "max_connections": settings.HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.HTTP_MAX_KEEPALIVE_CONNECTIONS
+        }
+
+    async def startup(self):
+        """Pre-open clients for the configured upstreams"""
+        for url in (settings.BOLNA_API_URL, settings.MAKE_WEBHOOK_CALL_ENDED):
+            if url:
+                try:
+                    self.get(url)
+                except ValueError as e:
+                    logger.warning(f"Skipping HTTP client warm-up: {str(e)}")
+
+    async def aclose(self):
+        """Close every pooled client (clients are re-created on next use)"""
+        clients, self._clients = self._clients, {}
+        for origin, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing HTTP client for {origin}: {str(e)}")
+
+
+# Create singleton instance
+http_clients = HTTPClientPool()
@@ -0,0 +1,158 @@
+"""
+Webhook Idempotency
+Remembers recently processed (event type, call_id) pairs so retried
+deliveries are acknowledged without re-running side effects
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyCache:
+    """
+    Bounded LRU + TTL set of processed event keys
+
+    The in-memory OrderedDict answers repeat deliveries in O(1). With a
+    `path`, keys are also claimed in SQLite via INSERT OR IGNORE, which makes
+    the check atomic across workers and keeps it across restarts.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        path: Optional[str] = None
+    ):
+        self.max_entries = max_entries or settings.IDEMPOTENCY_MAX_ENTRIES
+        self.ttl = ttl_seconds or settings.IDEMPOTENCY_TTL_SECONDS
+        self.path = path if path is not None else settings.IDEMPOTENCY_DB_PATH
+
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+        self.duplicates = 0
+        self.first_seen = 0
+
+    @staticmethod
+    def key(event_type: str, call_id: str) -> str:
+        return f"{event_type}:{call_id}"
+
+    @property
+    def conn(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None and self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+        return self._conn
+
+    def _prune_memory(self, now: float):
+        seen = self._seen
+        while seen:
+            key, expires_at = next(iter(seen.items()))
+            if expires_at > now and len(seen) <= self.max_entries:
+                break
+            seen.popitem(last=False)
+
+    def _claim_persistent(self, key: str, now: float) -> bool:
+        """True if this worker claimed the key (first delivery)"""
+        conn = self.conn
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO seen (key, expires_at) VALUES (?, ?)",
+            (key, now + self.ttl)
+        )
+        if cursor.rowcount == 0:
+            # Present already - only reclaim it if the old entry has expired
+            cursor = conn.execute(
+                "UPDATE seen SET expires_at = ? WHERE key = ? AND expires_at <= ?",
+                (now + self.ttl, key, now)
+            )
+            if cursor.rowcount == 0:
+                return False
+
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            conn.execute("DELETE FROM seen WHERE expires_at <= ?", (now,))
+        return True
+
+    def check_and_mark(self, event_type: str, call_id: Optional[str]) -> bool:
+        """
+        Mark an event as processed
+
+        Args:
+            event_type: Webhook type, e.g. "call_ended"
+            call_id: Bolna call ID (events without one are never deduplicated)
+
+        Returns:
+            True for a first delivery, False for a duplicate
+        """
+        if not call_id:
+            return True
+
+        key = self.key(event_type, call_id)
+        now = time.time()
+
+        expires_at = self._seen.get(key)
+        if expires_at is not None and expires_at > now:
+            self._seen.move_to_end(key)
+            self.duplicates += 1
+            return False
+
+        if self.path:
+            try:
+                # Keys claimed by another worker are not cached here, so a
+                # discard() by that worker is visible to this one
+                if not self._claim_persistent(key, now):
+                    self.duplicates += 1
+                    return False
+            except sqlite3.Error as e:
+                # Fall back to memory-only rather than failing the webhook
+                logger.error(f"Idempotency store error: {str(e)}")
+
+        self._seen[key] = now + self.ttl
+        self._seen.move_to_end(key)
+        self._prune_memory(now)
+        self.first_seen += 1
+        return True
+
+    def discard(self, event_type: str, call_id: Optional[str]):
+        """Forget a key whose processing failed, so a retry is processed again"""
+        if not call_id:
+            return
+        key = self.key(event_type, call_id)
+        self._seen.pop(key, None)
+        if self.path:
+            try:
+                self.conn.execute("DELETE FROM seen WHERE key = ?", (key,))
+            except sqlite3.Error as e:
+                logger.error(f"Idempotency store error: {str(e)}")
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._seen),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "persistent": bool(self.path),
+            "first_seen": self.first_seen,
+            "duplicates": self.duplicates
+        }
+
+
+# Create singleton instance
+webhook_idempotency = IdempotencyCache()
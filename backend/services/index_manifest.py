@@ -0,0 +1,114 @@
+"""
+Vector Index Manifest
+Content hashes of indexed knowledge chunks, so re-indexing only embeds
+new or changed chunks and removes deleted ones
+"""
+
+import os
+import sys
+import json
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_hash(chunk: Dict[str, Any]) -> str:
+    """Hash of everything that ends up in the index for a chunk"""
+    payload = json.dumps(
+        {"text": chunk.get("text", ""), "metadata": chunk.get("metadata") or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def index_target() -> str:
+    """Identity of the configured index; a different target starts a fresh manifest"""
+    backend = settings.VECTOR_BACKEND.lower()
+    if backend == "local":
+        return f"local:{os.path.abspath(settings.LOCAL_VECTOR_DIR)}"
+    return f"{backend}:{settings.PINECONE_INDEX_NAME}"
+
+
+class IndexManifest:
+    """
+    JSON file of {chunk id: content hash} for one index and embedding model
+
+    If the embedding model or index target differs from the stored one,
+    the manifest is treated as empty and everything is re-indexed.
+    """
+
+    def __init__(self, path: Optional[str] = None, model: Optional[str] = None, target: Optional[str] = None):
+        self.path = path or settings.VECTOR_MANIFEST_PATH
+        self.model = model or settings.OPENAI_EMBEDDING_MODEL
+        self.target = target or index_target()
+        self.hashes: Dict[str, str] = {}
+        self.seen: Set[str] = set()
+        self.pending: Dict[str, str] = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Unreadable index manifest {self.path}, re-indexing everything: {str(e)}")
+            return
+
+        if data.get("model") != self.model or data.get("target") != self.target:
+            logger.info(
+                f"Index manifest was built for {data.get('model')} on {data.get('target')}; "
+                f"re-indexing for {self.model} on {self.target}"
+            )
+            return
+        self.hashes = data.get("chunks") or {}
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model, "target": self.target, "chunks": self.hashes}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def iter_changed(self, chunks: Iterable[Dict[str, Any]], force: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yield chunks that are new or changed (every chunk if `force`)
+
+        Every id passed through is recorded in `seen` (for `orphans()`) and
+        the hashes of yielded chunks wait in `pending` until `commit()`.
+        Stored hashes are kept either way, so `orphans()` still finds ids
+        that were indexed before.
+        """
+        for chunk in chunks:
+            chunk_id = chunk["id"]
+            self.seen.add(chunk_id)
+            digest = chunk_hash(chunk)
+            if force or self.hashes.get(chunk_id) != digest:
+                self.pending[chunk_id] = digest
+                yield chunk
+
+    def orphans(self) -> List[str]:
+        """Ids indexed before but not seen by `iter_changed` (call once it is exhausted)"""
+        return [chunk_id for chunk_id in self.hashes if chunk_id not in self.seen]
+
+    def commit(self, failed_ids: Iterable[str] = ()):
+        """Record pending hashes, except for chunks that failed to index"""
+        failed_ids = set(failed_ids)
+        for chunk_id, digest in self.pending.items():
+            if chunk_id not in failed_ids:
+                self.hashes[chunk_id] = digest
+        self.pending = {}
+
+    def mark_deleted(self, chunk_id: str):
+        self.hashes.pop(chunk_id, None)
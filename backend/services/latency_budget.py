@@ -0,0 +1,239 @@
+"""
+Latency Budgets
+Per-endpoint deadlines with safe fallbacks, hedged downstream calls and
+rolling latency percentiles for tuning both
+"""
+
+import os
+import sys
+import time
+import asyncio
+import inspect
+import logging
+import functools
+import contextvars
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyStats:
+    """Rolling window of latencies (seconds) for one operation"""
+
+    __slots__ = ("samples", "count", "timeouts", "hedges", "hedge_wins", "errors", "_p95", "_p95_at")
+
+    def __init__(self, window: int):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.errors = 0
+        self._p95: Optional[float] = None
+        self._p95_at = 0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+    def p95(self) -> Optional[float]:
+        """p95, recomputed every 32 samples (called on every hedged request)"""
+        if self._p95 is None or self.count - self._p95_at >= 32:
+            self._p95 = self.percentile(95)
+            self._p95_at = self.count
+        return self._p95
+
+    def snapshot(self) -> Dict[str, Any]:
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "count": self.count,
+            "p50_ms": ms(self.percentile(50)),
+            "p95_ms": ms(self.percentile(95)),
+            "p99_ms": ms(self.percentile(99)),
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins
+        }
+
+
+class Deadline:
+    """Absolute deadline for the current request"""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Deadline of the endpoint being served, if it has a budget"""
+    return _current_deadline.get()
+
+
+class LatencyTracker:
+    """Latency stats per endpoint / downstream operation"""
+
+    def __init__(self, window: Optional[int] = None):
+        self.window = window or settings.LATENCY_WINDOW
+        self._stats: Dict[str, LatencyStats] = {}
+        self.budgets: Dict[str, float] = {}
+
+    def stats(self, name: str) -> LatencyStats:
+        entry = self._stats.get(name)
+        if entry is None:
+            entry = self._stats[name] = LatencyStats(self.window)
+        return entry
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for name, entry in sorted(self._stats.items()):
+            result[name] = entry.snapshot()
+            if name in self.budgets:
+                result[name]["budget_ms"] = round(self.budgets[name] * 1000, 1)
+        return result
+
+
+latency_tracker = LatencyTracker()
+
+
+def latency_budget(name: str, seconds: float, fallback: Dict[str, Any]) -> Callable:
+    """
+    Bound an async endpoint to `seconds`
+
+    On timeout the handler is cancelled and a copy of `fallback` is
+    returned. The deadline is visible to downstream calls through
+    `current_deadline()`, so they can degrade before it is hit.
+
+    Usage:
+        @app.post("/functions/x")
+        @latency_budget("x", settings.BUDGET_X_SECONDS, {"result": "..."})
+        async def handler(request: Request): ...
+    """
+    latency_tracker.budgets[name] = seconds
+
+    def decorator(handler: Callable) -> Callable:
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            stats = latency_tracker.stats(name)
+            token = _current_deadline.set(Deadline(seconds))
+            start = time.monotonic()
+            try:
+                return await asyncio.wait_for(handler(*args, **kwargs), timeout=seconds)
+            except asyncio.TimeoutError:
+                stats.timeouts += 1
+                logger.warning(f"{name} exceeded its {seconds:.2f}s budget, returning fallback")
+                return dict(fallback)
+            finally:
+                stats.record(time.monotonic() - start)
+                _current_deadline.reset(token)
+
+        return wrapper
+
+    return decorator
+
+
+async def hedged(
+    name: str,
+    fn: Callable,
+    *args,
+    timeout: Optional[float] = None,
+    hedge_after: Optional[float] = None,
+    **kwargs
+) -> Any:
+    """
+    Call `fn` and, if it has not answered by the observed p95, start one
+    duplicate; return whichever finishes first and cancel the other
+
+    Synchronous functions run in a worker thread. The timeout defaults to
+    what is left of the current endpoint's deadline.
+
+    Raises:
+        asyncio.TimeoutError: if no attempt succeeded in time
+        Exception: the last attempt's error if every attempt failed
+    """
+    stats = latency_tracker.stats(name)
+    if timeout is None:
+        deadline = current_deadline()
+        timeout = deadline.remaining() if deadline else None
+    if hedge_after is None:
+        p95 = stats.p95() if stats.count >= settings.HEDGE_MIN_SAMPLES else None
+        hedge_after = p95 if p95 is not None else settings.HEDGE_DEFAULT_DELAY_SECONDS
+
+    def attempt() -> asyncio.Future:
+        started = time.monotonic()
+        if inspect.iscoroutinefunction(fn):
+            future = asyncio.ensure_future(fn(*args, **kwargs))
+        else:
+            future = asyncio.ensure_future(asyncio.to_thread(fn, *args, **kwargs))
+
+        def done(f: asyncio.Future):
+            if f.cancelled():
+                return
+            if f.exception() is None:
+                stats.record(time.monotonic() - started)
+            else:
+                stats.errors += 1
+
+        future.add_done_callback(done)
+        return future
+
+    loop = asyncio.get_running_loop()
+    expires_at = loop.time() + timeout if timeout is not None else None
+
+    def left() -> Optional[float]:
+        return max(0.0, expires_at - loop.time()) if expires_at is not None else None
+
+    primary = attempt()
+    pending = {primary}
+    hedge = None
+    error: Optional[BaseException] = None
+
+    try:
+        while pending:
+            wait = left()
+            if hedge is None:
+                wait = hedge_after if wait is None else min(wait, hedge_after)
+            done, pending = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        stats.hedge_wins += 1
+                    return future.result()
+                error = future.exception()
+
+            if left() == 0.0:
+                break
+            if hedge is None and (not done or not pending):
+                # Slow (or failed) primary: send the duplicate
+                hedge = attempt()
+                stats.hedges += 1
+                pending.add(hedge)
+    finally:
+        for future in pending:
+            future.cancel()
+
+    if error is not None and (expires_at is None or left() > 0.0):
+        raise error
+    stats.timeouts += 1
+    raise asyncio.TimeoutError(f"{name} timed out")
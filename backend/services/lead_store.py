@@ -0,0 +1,431 @@
+"""
+Lead Repository
+Upserts leads collected during calls (keyed by call_id, else phone),
+coalescing repeated saves in memory and writing them in bulk to MongoDB or
+a local SQLite stand-in, off the request path
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+from services.metrics import metrics
+from services.phone_numbers import normalize_phone
+
+logger = logging.getLogger(__name__)
+
+# Filled in when a lead is first stored, never overwritten by later saves
+LEAD_DEFAULTS = {"interest_level": "unknown"}
+
+
+def lead_key(lead: Dict[str, Any]) -> Optional[str]:
+    """Upsert key: the call, or the customer's normalized phone if there is no call id"""
+    if lead.get("call_id"):
+        return f"call:{lead['call_id']}"
+    phone = normalize_phone(lead.get("phone"))
+    return f"phone:{phone}" if phone else None
+
+
+def _union(existing: List[Any], new: Iterable[Any]) -> List[Any]:
+    merged = list(existing)
+    for item in new:
+        if item not in merged:
+            merged.append(item)
+    return merged
+
+
+def merge_lead(base: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply a later save on top of an earlier one
+
+    Empty values never erase what was collected before; list fields
+    (sectors, questions) accumulate without duplicates.
+    """
+    merged = dict(base)
+    for key, value in update.items():
+        if value is None or value == "" or (isinstance(value, (list, dict)) and not value):
+            continue
+        if isinstance(value, list) and isinstance(merged.get(key), list):
+            merged[key] = _union(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+class LeadBackend(ABC):
+    """Bulk upsert target for coalesced leads"""
+
+    name = "base"
+
+    @abstractmethod
+    def bulk_upsert(self, leads: Dict[str, Dict[str, Any]]):
+        """Merge each {key: partial lead} into the stored lead (one round trip)"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored leads for `keys` in one round trip (missing keys are left out)"""
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    def close(self):
+        pass
+
+
+class MongoLeadBackend(LeadBackend):
+    """MongoDB collection; one `bulk_write` of upserting UpdateOne ops per flush"""
+
+    name = "mongodb"
+
+    def __init__(self):
+        from pymongo import MongoClient
+
+        self.client = MongoClient(settings.require("MONGODB_URL"))
+        self.collection = self.client[settings.MONGODB_DATABASE][settings.LEADS_COLLECTION]
+        self.collection.create_index("call_id")
+        self.collection.create_index("phone")
+
+    def bulk_upsert(self, leads: Dict[str, Dict[str, Any]]):
+        from pymongo import UpdateOne
+
+        now = time.time()
+        operations = []
+        for key, lead in leads.items():
+            fields = {k: v for k, v in lead.items() if not isinstance(v, list)}
+            lists = {k: {"$each": v} for k, v in lead.items() if isinstance(v, list)}
+            on_insert = {"created_at": now, **{k: v for k, v in LEAD_DEFAULTS.items() if k not in lead}}
+            update = {"$set": {**fields, "updated_at": now}, "$setOnInsert": on_insert}
+            if lists:
+                update["$addToSet"] = lists
+            operations.append(UpdateOne({"_id": key}, update, upsert=True))
+
+        if operations:
+            with metrics.outbound("mongodb", "bulk_write"):
+                self.collection.bulk_write(operations, ordered=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with metrics.outbound("mongodb", "find_one"):
+            document = self.collection.find_one({"_id": key})
+        if document is not None:
+            document.pop("_id", None)
+        return document
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        with metrics.outbound("mongodb", "find"):
+            documents = list(self.collection.find({"_id": {"$in": list(keys)}}))
+        return {document.pop("_id"): document for document in documents}
+
+    def count(self) -> int:
+        return self.collection.estimated_document_count()
+
+    def close(self):
+        self.client.close()
+
+
+class SQLiteLeadBackend(LeadBackend):
+    """
+    Local stand-in with the same merge semantics as the MongoDB upsert
+
+    One transaction per flush: read the existing rows for the batch, merge,
+    write them back with executemany.
+    """
+
+    name = "sqlite"
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS leads (
+        id TEXT PRIMARY KEY,
+        call_id TEXT,
+        phone TEXT,
+        data TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS leads_call_id ON leads (call_id);
+    CREATE INDEX IF NOT EXISTS leads_phone ON leads (phone);
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.LEAD_STORE_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.executescript(self._SCHEMA)
+        # Flushes run in worker threads; the connection is shared
+        self._lock = threading.Lock()
+
+    def bulk_upsert(self, leads: Dict[str, Dict[str, Any]]):
+        keys = list(leads)
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing: Dict[str, Dict[str, Any]] = {}
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    rows = self.conn.execute(
+                        f"SELECT id, data FROM leads WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                    )
+                    existing.update((row_id, json.loads(data)) for row_id, data in rows)
+
+                rows = []
+                for key, lead in leads.items():
+                    stored = existing.get(key) or {**LEAD_DEFAULTS, "created_at": now}
+                    merged = merge_lead(stored, lead)
+                    merged["updated_at"] = now
+                    rows.append((key, merged.get("call_id"), merged.get("phone"), json.dumps(merged, default=str), now))
+
+                self.conn.executemany(
+                    "INSERT INTO leads (id, call_id, phone, data, updated_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET call_id = excluded.call_id, phone = excluded.phone, "
+                    "data = excluded.data, updated_at = excluded.updated_at",
+                    rows
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM leads WHERE id = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        keys = list(keys)
+        leads: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT id, data FROM leads WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                )
+                leads.update((row_id, json.loads(data)) for row_id, data in rows)
+        return leads
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+BACKENDS = {
+    "mongodb": MongoLeadBackend,
+    "sqlite": SQLiteLeadBackend,
+}
+
+
+def create_lead_backend(name: Optional[str] = None) -> LeadBackend:
+    name = (name or settings.LEAD_STORE_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LEAD_STORE_BACKEND {name!r} (expected one of {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
+
+
+# ============================================================================
+# REPOSITORY
+# ============================================================================
+
+class LeadRepository:
+    """
+    Write-behind lead store
+
+    `save()` only merges into an in-memory pending map, so a mid-call
+    function response never waits on the database. Repeated saves for the
+    same call collapse into one pending entry. A background task flushes the
+    map with one bulk upsert when it reaches LEAD_FLUSH_BATCH_SIZE leads or
+    LEAD_FLUSH_INTERVAL_SECONDS after the first unflushed save; a failed
+    flush is merged back and retried. Saves made less than one interval
+    before a crash are lost, everything else is in the database.
+    """
+
+    def __init__(self, backend: Optional[LeadBackend] = None):
+        self._backend = backend
+        self.batch_size = settings.LEAD_FLUSH_BATCH_SIZE
+        self.interval = settings.LEAD_FLUSH_INTERVAL_SECONDS
+
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.saves_total = 0
+        self.coalesced_total = 0
+        self.written_total = 0
+        self.flushes_total = 0
+        self.flush_errors_total = 0
+        self.last_error: Optional[str] = None
+        self.last_flush_seconds: Optional[float] = None
+
+    @property
+    def backend(self) -> LeadBackend:
+        """MongoDB or SQLite, per LEAD_STORE_BACKEND (connected on first use)"""
+        if self._backend is None:
+            self._backend = create_lead_backend()
+        return self._backend
+
+    def save(self, lead: Dict[str, Any]) -> Optional[str]:
+        """
+        Queue a lead upsert (returns immediately)
+
+        Args:
+            lead: Lead fields; needs a call_id or a phone number
+
+        Returns:
+            The lead key, or None if the lead has neither identifier
+        """
+        key = lead_key(lead)
+        if key is None:
+            return None
+
+        # Drop empty fields up front, so no write can blank a stored value
+        lead = merge_lead({}, lead)
+        phone = normalize_phone(lead.get("phone"))
+        if phone:
+            lead["phone"] = phone
+
+        self.saves_total += 1
+        pending = self._pending.get(key)
+        if pending is None:
+            self._pending[key] = lead
+        else:
+            self._pending[key] = merge_lead(pending, lead)
+            self.coalesced_total += 1
+
+        if self._wakeup is not None and (len(self._pending) >= self.batch_size or pending is None):
+            self._wakeup.set()
+        return key
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Stored lead with any not-yet-flushed saves applied"""
+        stored = await asyncio.to_thread(self.backend.get, key)
+        pending = self._pending.get(key)
+        if pending is None:
+            return stored
+        return merge_lead(stored or dict(LEAD_DEFAULTS), pending)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Like `get` for several keys, with one backend round trip"""
+        stored = await asyncio.to_thread(self.backend.get_many, keys) if keys else {}
+        leads = {}
+        for key in keys:
+            pending = self._pending.get(key)
+            if pending is not None:
+                leads[key] = merge_lead(stored.get(key) or dict(LEAD_DEFAULTS), pending)
+            elif key in stored:
+                leads[key] = stored[key]
+        return leads
+
+    async def flush(self) -> int:
+        """Write all pending leads in one bulk upsert; returns how many were written"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            start = time.monotonic()
+            try:
+                await asyncio.to_thread(self.backend.bulk_upsert, batch)
+            except Exception as e:
+                # Put the batch back underneath anything saved meanwhile
+                for key, lead in batch.items():
+                    newer = self._pending.get(key)
+                    self._pending[key] = merge_lead(lead, newer) if newer else lead
+                self.flush_errors_total += 1
+                self.last_error = f"{type(e).__name__}: {str(e)}"
+                logger.error(f"Error writing {len(batch)} leads, will retry: {str(e)}")
+                return 0
+
+            self.last_flush_seconds = time.monotonic() - start
+            self.flushes_total += 1
+            self.written_total += len(batch)
+            return len(batch)
+
+    async def _run(self):
+        while not self._stopping:
+            await self._wakeup.wait()
+            if not self._stopping and len(self._pending) < self.batch_size:
+                # Give further saves of the same call a chance to coalesce
+                try:
+                    await asyncio.wait_for(self._until_full(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+            if not await self.flush() and self._pending and not self._stopping:
+                # Backend down: back off for an interval before retrying
+                await asyncio.sleep(self.interval)
+                self._wakeup.set()
+
+    async def _until_full(self):
+        while len(self._pending) < self.batch_size and not self._stopping:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    async def start(self):
+        """Start the background flusher (called on app startup)"""
+        if self._task and not self._task.done():
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        if self._pending:
+            self._wakeup.set()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush what is pending and stop (called on shutdown)"""
+        self._stopping = True
+        if self._task:
+            # Let an in-flight bulk write finish rather than cancel it midway
+            self._wakeup.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        if self._pending:
+            logger.warning(f"Lead repository stopped with {len(self._pending)} unsaved leads")
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": settings.LEAD_STORE_BACKEND,
+            "pending": len(self._pending),
+            "saves_total": self.saves_total,
+            "coalesced_total": self.coalesced_total,
+            "written_total": self.written_total,
+            "flushes_total": self.flushes_total,
+            "flush_errors_total": self.flush_errors_total,
+            "last_flush_ms": round(self.last_flush_seconds * 1000, 2) if self.last_flush_seconds is not None else None,
+            "last_error": self.last_error
+        }
+
+
+# Create singleton instance
+lead_repository = LeadRepository()
@@ -0,0 +1,264 @@
+"""
+Lexical (BM25) Index
+In-process keyword index over the same chunks as the vector store, used
+as an instant fallback when embeddings are unavailable and for hybrid
+(reciprocal-rank fused) retrieval
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import logging
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+from services.vector_backends import matches_filter
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[\w\u0900-\u097F]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i if in is it its "
+    "me my of on or so that the their them then there these they this to was we what "
+    "when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens without stopwords; trailing plural 's' folded"""
+    tokens = []
+    for token in _TOKEN.findall(text.casefold()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class LexicalIndex:
+    """
+    BM25 over chunk texts
+
+    Documents ({id: {"text", "metadata"}}) are persisted as JSON next to the
+    vector index and written through VectorStore, so a re-index run in
+    another process is picked up on the next refresh. Postings are compiled
+    in memory as one int32 doc-id array and one uint16 term-frequency array
+    per term; a query scores only the postings of its own terms.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.2, b: float = 0.75):
+        self.path = path if path is not None else settings.LEXICAL_INDEX_PATH
+        self.k1 = k1
+        self.b = b
+        self.refresh_interval = settings.LOCAL_VECTOR_REFRESH_SECONDS
+
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._ids: List[str] = []
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._doc_lengths = np.zeros(0, dtype=np.float32)
+        self._avg_length = 0.0
+        self._compiled = False
+
+        self._mtime = None
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def refresh(self, force: bool = False):
+        """Reload the documents if another process rewrote them"""
+        if not self.path:
+            return
+        now = time.monotonic()
+        if not force and now < self._next_refresh:
+            return
+        self._next_refresh = now + self.refresh_interval
+
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                docs = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading lexical index {self.path}: {str(e)}")
+            return
+
+        self._docs = docs
+        self._mtime = mtime
+        self._compiled = False
+
+    def _save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._docs, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    def _compile(self):
+        ids = list(self._docs)
+        lengths = np.zeros(len(ids), dtype=np.float32)
+        term_docs: Dict[str, List[Tuple[int, int]]] = {}
+
+        for doc_index, doc_id in enumerate(ids):
+            counts = Counter(tokenize(self._docs[doc_id]["text"]))
+            lengths[doc_index] = sum(counts.values())
+            for term, tf in counts.items():
+                term_docs.setdefault(term, []).append((doc_index, min(tf, 65535)))
+
+        self._postings = {
+            term: (
+                np.fromiter((d for d, _ in entries), dtype=np.int32, count=len(entries)),
+                np.fromiter((tf for _, tf in entries), dtype=np.uint16, count=len(entries))
+            )
+            for term, entries in term_docs.items()
+        }
+        self._ids = ids
+        self._doc_lengths = lengths
+        self._avg_length = float(lengths.mean()) if len(ids) else 0.0
+        self._compiled = True
+
+    # ------------------------------------------------------------------
+    # Writes (called by VectorStore)
+    # ------------------------------------------------------------------
+
+    def upsert(self, documents: Iterable[Dict[str, Any]]):
+        """Add or replace documents ({"id", "text", "metadata"})"""
+        with self._lock:
+            self.refresh(force=True)
+            # Copy on write, so a search in another thread keeps a consistent view
+            docs = dict(self._docs)
+            for doc in documents:
+                metadata = {key: value for key, value in (doc.get("metadata") or {}).items() if key != "text"}
+                docs[doc["id"]] = {"text": doc["text"], "metadata": metadata}
+            self._docs = docs
+            self._compiled = False
+            self._save()
+
+    def delete(self, ids: Iterable[str]):
+        with self._lock:
+            self.refresh(force=True)
+            docs = dict(self._docs)
+            removed = [docs.pop(doc_id, None) for doc_id in ids]
+            if any(doc is not None for doc in removed):
+                self._docs = docs
+                self._compiled = False
+                self._save()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, top_k: int = 3, filter: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        """
+        BM25 search
+
+        Returns:
+            Results shaped like VectorStore.search. "score" is the share of
+            the query's IDF weight found in the chunk (0-1), which is
+            comparable across queries; the raw BM25 value is in "bm25".
+        """
+        self.refresh()
+        with self._lock:
+            if not self._compiled:
+                self._compile()
+            docs, ids, postings, lengths = self._docs, self._ids, self._postings, self._doc_lengths
+
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not ids or not terms or top_k <= 0:
+            return []
+
+        n = len(ids)
+        scores = np.zeros(n, dtype=np.float32)
+        coverage = np.zeros(n, dtype=np.float32)
+        total_idf = 0.0
+        norm = self.k1 * (1 - self.b + self.b * lengths / (self._avg_length or 1.0))
+
+        for term in terms:
+            entry = postings.get(term)
+            df = len(entry[0]) if entry else 0
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            total_idf += idf
+            if not entry:
+                continue
+            doc_ids, tfs = entry
+            tf = tfs.astype(np.float32)
+            scores[doc_ids] += idf * tf * (self.k1 + 1) / (tf + norm[doc_ids])
+            coverage[doc_ids] += idf
+
+        candidates = np.flatnonzero(scores > 0)
+        if filter:
+            candidates = np.array(
+                [i for i in candidates if matches_filter(docs[ids[i]]["metadata"], filter)],
+                dtype=np.int64
+            )
+        if not len(candidates):
+            return []
+
+        k = min(top_k, len(candidates))
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for i in top:
+            doc = docs[ids[i]]
+            results.append({
+                "id": ids[i],
+                "score": round(float(coverage[i] / total_idf), 4) if total_idf else 0.0,
+                "bm25": float(scores[i]),
+                "text": doc["text"],
+                "metadata": dict(doc["metadata"], text=doc["text"]),
+                "retrieval": "lexical"
+            })
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        self.refresh()
+        return {
+            "documents": len(self._docs),
+            "terms": len(self._postings) if self._compiled else None,
+            "path": self.path
+        }
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict[str, Any]]], k: int = 60) -> List[Dict[str, Any]]:
+    """
+    Merge ranked result lists by summed 1 / (k + rank)
+
+    The first list's entry is kept for each id (so vector results keep
+    their cosine "score"); the fused value is added as "rrf_score".
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, 1):
+            entry = fused.get(result["id"])
+            if entry is None:
+                entry = fused[result["id"]] = dict(result, rrf_score=0.0)
+            entry["rrf_score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda result: result["rrf_score"], reverse=True)
+
+
+# Create singleton instance
+lexical_index = LexicalIndex()
@@ -0,0 +1,219 @@
+"""
+Knowledge-Base Chunker
+Streams Markdown / plain-text documents line by line and yields
+heading-scoped, token-budgeted chunks (with overlap) for the vector indexer
+"""
+
+import os
+import re
+import sys
+import glob
+import unicodedata
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_ATX_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_QUESTION = re.compile(r"^Q\s*:\s*\S", re.IGNORECASE)
+_STEP = re.compile(r"^Step\s+\d+\s*[:.\-–]\s*\S", re.IGNORECASE)
+_SENTENCE_END = re.compile(r"(?<=[.!?।])\s+")
+
+# Symbols used as bullet markers rather than section icons
+_BULLET_SYMBOLS = set("✅❌✔✖✓✗•➤\U0001f449")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)"""
+    return max(1, (len(text) + 3) // 4)
+
+
+def slugify(text: str, max_length: int = 48) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "_", text.casefold()).strip("_")
+    return slug[:max_length].rstrip("_") or "section"
+
+
+def heading_level(line: str, first_line: bool = False) -> Optional[Tuple[int, str]]:
+    """
+    Classify a line as a heading
+
+    The knowledge-base exports are mostly plain text, so besides ATX `#`
+    headings this recognises the document title (first line), icon-led
+    section lines ("🔒 Legal & Regulatory Questions"), FAQ questions
+    ("Q: ...") and process steps ("Step 1: ...").
+
+    Returns:
+        (level, title) or None for body text
+    """
+    match = _ATX_HEADING.match(line)
+    if match:
+        return len(match.group(1)), match.group(2)
+    if first_line and len(line) <= 100:
+        return 1, line
+    first = line[0]
+    if first not in _BULLET_SYMBOLS and unicodedata.category(first) == "So" and len(line) <= 80:
+        return 2, line[1:].lstrip("\ufe0f ") or line
+    if _QUESTION.match(line):
+        # Inline "Q: ... A: ..." lines: the question alone is the heading
+        return 3, re.split(r"\s+A\s*:\s", line, maxsplit=1)[0]
+    if _STEP.match(line):
+        return 4, line
+    return None
+
+
+def _split_long_line(line: str, max_tokens: int) -> List[str]:
+    """Split a line over the budget at sentence, then word, boundaries"""
+    pieces: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_END.split(line):
+        words = [sentence] if estimate_tokens(sentence) <= max_tokens else sentence.split()
+        for word in words:
+            candidate = f"{current} {word}" if current else word
+            if current and estimate_tokens(candidate) > max_tokens:
+                pieces.append(current)
+                current = word
+            else:
+                current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+class MarkdownChunker:
+    """
+    Heading-aware chunker with a token budget
+
+    A new chunk starts at every heading. A section that outgrows
+    `max_tokens` is split at line boundaries; each continuation repeats the
+    last `overlap_tokens` worth of lines and the heading breadcrumb, so a
+    chunk always reads on its own. A lead-in shorter than
+    `min_section_tokens` ("Here's the process:") is folded into its first
+    sub-section instead of becoming a chunk of its own. Only the current
+    section is held in memory, so files of any size stream through.
+    """
+
+    min_section_tokens = 32
+
+    def __init__(self, max_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None):
+        self.max_tokens = max_tokens or settings.CHUNK_MAX_TOKENS
+        self.overlap_tokens = overlap_tokens if overlap_tokens is not None else settings.CHUNK_OVERLAP_TOKENS
+        if self.overlap_tokens >= self.max_tokens:
+            raise ValueError("CHUNK_OVERLAP_TOKENS must be smaller than CHUNK_MAX_TOKENS")
+
+    def chunk_lines(self, lines: Iterable[str], source: str) -> Iterator[Dict[str, Any]]:
+        """
+        Chunk a stream of lines from one document
+
+        Args:
+            lines: Lines of the document (e.g. an open file)
+            source: Document name, used for ids and metadata
+
+        Yields:
+            {"id", "text", "metadata"} dicts ready for VectorStore.add_documents
+        """
+        stem = os.path.splitext(os.path.basename(source))[0]
+        category = slugify(stem)
+        headings: List[Tuple[int, str]] = []
+        body: Deque[Tuple[str, int]] = deque()
+        body_tokens = 0
+        has_content = False
+        part = 0
+        used_ids: Dict[str, int] = {}
+        first_line = True
+
+        def breadcrumb() -> str:
+            return " > ".join(title for _, title in headings)
+
+        def emit() -> Dict[str, Any]:
+            base = f"{category}__{slugify(headings[-1][1]) if headings else 'intro'}"
+            if part:
+                base = f"{base}__{part}"
+            seen = used_ids.get(base, 0)
+            used_ids[base] = seen + 1
+            chunk_id = base if not seen else f"{base}__dup{seen}"
+
+            prefix = breadcrumb()
+            text = "\n".join(line for line, _ in body)
+            return {
+                "id": chunk_id,
+                "text": f"{prefix}\n{text}" if prefix else text,
+                "metadata": {
+                    "category": category,
+                    "source": os.path.basename(source),
+                    "section": next((title for level, title in headings if level == 2), headings[0][1] if headings else ""),
+                    "heading": headings[-1][1] if headings else "",
+                    "part": part
+                }
+            }
+
+        for raw in lines:
+            line = " ".join(raw.split())
+            if not line:
+                continue
+
+            heading = heading_level(line, first_line)
+            first_line = False
+
+            if heading is not None:
+                level, title = heading
+                lead_in = (
+                    has_content
+                    and body_tokens < self.min_section_tokens
+                    and headings and level > headings[-1][0]
+                )
+                if not lead_in:
+                    if has_content:
+                        yield emit()
+                    body.clear()
+                    body_tokens = 0
+                    has_content = False
+                part = 0
+
+                while headings and headings[-1][0] >= level:
+                    headings.pop()
+                headings.append((level, title))
+                if title == line:
+                    # The heading is already in the breadcrumb
+                    continue
+                # Inline "Q: ... A: ..." keeps the full line as body
+
+            budget = self.max_tokens - estimate_tokens(breadcrumb())
+            for piece in _split_long_line(line, max(budget, 1)):
+                tokens = estimate_tokens(piece)
+                if has_content and body_tokens + tokens > budget:
+                    yield emit()
+                    part += 1
+                    # Carry the tail of the previous chunk as overlap
+                    overlap = 0
+                    kept: Deque[Tuple[str, int]] = deque()
+                    while body and overlap + body[-1][1] <= self.overlap_tokens:
+                        kept.appendleft(body.pop())
+                        overlap += kept[0][1]
+                    body = kept
+                    body_tokens = overlap
+                body.append((piece, tokens))
+                body_tokens += tokens
+                has_content = True
+
+        if has_content:
+            yield emit()
+
+    def chunk_file(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Stream one file into chunks"""
+        with open(path, encoding="utf-8") as f:
+            yield from self.chunk_lines(f, path)
+
+    def chunk_directory(self, directory: str, pattern: str = "*.md") -> Iterator[Dict[str, Any]]:
+        """Stream every matching file in a directory (sorted, non-recursive)"""
+        for path in sorted(glob.glob(os.path.join(directory, pattern))):
+            logger.info(f"Chunking {path}")
+            yield from self.chunk_file(path)
+
+
+# Create singleton instance
+markdown_chunker = MarkdownChunker()
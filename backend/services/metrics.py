@@ -0,0 +1,327 @@
+"""
+Metrics
+Prometheus-compatible counters, histograms and gauges for the /metrics
+endpoint, without a client library and without locks on the hot path
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[str, ...]
+
+# Seconds; covers sub-millisecond cache hits up to the 30s Bolna timeout
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Sharded:
+    """
+    Per-thread storage
+
+    Each thread only ever writes its own dict, so increments need no lock;
+    a scrape sums every shard. Shards of finished threads are kept, since
+    counters must never go down.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[Dict[Labels, Any]] = []
+        self._register_lock = threading.Lock()
+
+    def _shard(self) -> Dict[Labels, Any]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard: Dict[Labels, Any] = {}
+            with self._register_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def _items(self):
+        for shard in list(self._shards):
+            # Copy first: the owning thread may insert a new label set meanwhile
+            yield from list(shard.items())
+
+
+class Counter(_Sharded):
+    """Monotonic counter with a fixed set of label names"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Labels = ()):
+        super().__init__()
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+
+    def inc(self, labels: Labels = (), value: float = 1.0):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + value
+
+    def values(self) -> Dict[Labels, float]:
+        totals: Dict[Labels, float] = {}
+        for labels, value in self._items():
+            totals[labels] = totals.get(labels, 0.0) + value
+        return totals
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.values().items())
+        ]
+
+
+class Histogram(_Sharded):
+    """
+    Histogram with fixed bucket bounds
+
+    Per label set a shard holds one count per bucket (plus +Inf) and the
+    running sum; cumulative bucket counts are only built at scrape time.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Labels = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__()
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: Labels = ()):
+        shard = self._shard()
+        entry = shard.get(labels)
+        if entry is None:
+            entry = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    def values(self) -> Dict[Labels, List[float]]:
+        totals: Dict[Labels, List[float]] = {}
+        for labels, entry in self._items():
+            total = totals.get(labels)
+            if total is None:
+                totals[labels] = list(entry)
+            else:
+                for i, value in enumerate(entry):
+                    total[i] += value
+        return totals
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, entry in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), entry[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {_format_value(entry[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """
+    Gauge read from a callback at scrape time
+
+    The callback returns a number, or a {labels tuple: number} dict for a
+    labelled gauge, so nothing is tracked between scrapes.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], Any], labels: Labels = ()):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.labels = tuple(labels)
+
+    def render(self) -> List[str]:
+        value = self.fn()
+        if not isinstance(value, dict):
+            value = {(): value}
+        return [
+            f"{self.name}{_format_labels(self.labels, labels)} {_format_value(number)}"
+            for labels, number in sorted(value.items())
+            if number is not None
+        ]
+
+
+class _OutboundTimer:
+    """Context manager timing one call to an external service"""
+
+    __slots__ = ("registry", "labels", "start")
+
+    def __init__(self, registry: "MetricsRegistry", labels: Labels):
+        self.registry = registry
+        self.labels = labels
+
+    def __enter__(self) -> "_OutboundTimer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.registry.outbound_duration.observe(time.perf_counter() - self.start, self.labels)
+        # A cancelled attempt (e.g. the losing half of a hedged request) is not an error
+        if exc_type is not None and not issubclass(exc_type, asyncio.CancelledError):
+            self.fail()
+        return False
+
+    def fail(self):
+        """Count an error for a call that returned normally (e.g. an HTTP 5xx)"""
+        self.registry.outbound_errors.inc(self.labels)
+
+
+class MetricsRegistry:
+    """All metrics exposed by the service"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+        self.http_duration = self.histogram(
+            "http_request_duration_seconds",
+            "Time to serve webhook and function requests",
+            ("route", "method", "status")
+        )
+        # Only changed on the event loop thread
+        self.http_in_flight = 0
+        self.gauge("http_requests_in_flight", "Requests being served", lambda: self.http_in_flight)
+
+        self.outbound_duration = self.histogram(
+            "outbound_request_duration_seconds",
+            "Latency of calls to external services",
+            ("service", "operation")
+        )
+        self.outbound_errors = self.counter(
+            "outbound_request_errors_total",
+            "Failed calls to external services",
+            ("service", "operation")
+        )
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Labels = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Labels = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, fn: Callable[[], Any], labels: Labels = ()) -> Gauge:
+        return self._register(Gauge(name, help, fn, labels))
+
+    def outbound(self, service: str, operation: str) -> _OutboundTimer:
+        """
+        Time a call to an external service
+
+        Usage:
+            with metrics.outbound("bolna", "create_call"):
+                response = await client.post(...)
+        """
+        return _OutboundTimer(self, (service, operation))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        for name, metric in self._metrics.items():
+            try:
+                samples = metric.render()
+            except Exception as e:
+                logger.error(f"Error collecting metric {name}: {str(e)}")
+                continue
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+# Create singleton instance
+metrics = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording http_request_duration_seconds per route
+
+    Routes are labelled by their path template ("/calls/{call_id}/transcript"),
+    never the raw path, so label cardinality stays bounded; requests that
+    match no route share the "unmatched" label.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+        self._templates: Dict[Any, str] = {}
+
+    def _route_template(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        template = self._templates.get(endpoint)
+        if template is None:
+            app = scope.get("app")
+            for route in getattr(app, "routes", ()):
+                if getattr(route, "endpoint", None) is endpoint:
+                    template = route.path
+                    break
+            else:
+                template = getattr(endpoint, "__name__", "unknown")
+            self._templates[endpoint] = template
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        registry = self.registry
+        registry.http_in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.http_in_flight -= 1
+            registry.http_duration.observe(
+                time.perf_counter() - start,
+                (self._route_template(scope), scope["method"], str(status))
+            )
@@ -0,0 +1,285 @@
+"""
+Durable Outbox
+SQLite-backed queue for outbound webhook deliveries (Make.com), so request
+handlers return immediately and nothing is lost if the target is down
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+from services.http_clients import http_clients
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic TEXT NOT NULL,
+    url TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    dead INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (dead, next_attempt_at);
+"""
+
+
+class Outbox:
+    """
+    Append-and-forget delivery queue with a background sender
+
+    Rows are claimed in batches under a short lease (so several workers can
+    share one database without double-sending), POSTed concurrently over the
+    pooled HTTP client, deleted on success and rescheduled with exponential
+    backoff on failure. After OUTBOX_MAX_ATTEMPTS a row is kept as dead
+    instead of being dropped.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.OUTBOX_PATH
+        self.batch_size = settings.OUTBOX_BATCH_SIZE
+        self.max_attempts = settings.OUTBOX_MAX_ATTEMPTS
+        self.lease_seconds = settings.OUTBOX_LEASE_SECONDS
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.sent_total = 0
+        self.failed_attempts_total = 0
+        self.dead_total = 0
+        self.last_error: Optional[str] = None
+        self.last_delivery_lag: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def enqueue(self, url: str, payload: Dict[str, Any], topic: str = "webhook") -> int:
+        """
+        Persist a delivery and wake the sender
+
+        Args:
+            url: Target URL for the POST
+            payload: JSON-serializable body
+            topic: Label for stats/debugging
+
+        Returns:
+            Outbox row id
+        """
+        now = time.time()
+        cursor = self.conn.execute(
+            "INSERT INTO outbox (topic, url, payload, created_at, next_attempt_at) VALUES (?, ?, ?, ?, ?)",
+            (topic, url, json.dumps(payload, default=str), now, now)
+        )
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return cursor.lastrowid
+
+    def _claim_batch(self) -> List[Tuple[int, str, str, float, int]]:
+        """Take due rows and push their next attempt past the lease"""
+        now = time.time()
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, url, payload, created_at, attempts FROM outbox "
+                "WHERE dead = 0 AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+                (now, self.batch_size)
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE outbox SET next_attempt_at = ? WHERE id = ?",
+                    [(now + self.lease_seconds, row[0]) for row in rows]
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return rows
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(settings.OUTBOX_RETRY_MAX_SECONDS, settings.OUTBOX_RETRY_BASE_SECONDS * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _complete(self, delivered: List[int], failed: List[Tuple[int, int, str]]):
+        now = time.time()
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("DELETE FROM outbox WHERE id = ?", [(row_id,) for row_id in delivered])
+            for row_id, attempts, error in failed:
+                dead = 1 if attempts >= self.max_attempts else 0
+                conn.execute(
+                    "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ?, dead = ? WHERE id = ?",
+                    (attempts, now + self._backoff(attempts), error[:500], dead, row_id)
+                )
+                if dead:
+                    self.dead_total += 1
+                    logger.error(f"Outbox row {row_id} gave up after {attempts} attempts: {error}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ------------------------------------------------------------------
+    # Sending
+    # ------------------------------------------------------------------
+
+    async def _deliver(self, row: Tuple[int, str, str, float, int]) -> Optional[str]:
+        """POST one row; returns an error string or None on success"""
+        _, url, payload, _, _ = row
+        try:
+            with metrics.outbound("make", "webhook") as timer:
+                response = await http_clients.get(url).post(
+                    url,
+                    content=payload,
+                    headers={"Content-Type": "application/json"},
+                    timeout=settings.OUTBOX_REQUEST_TIMEOUT_SECONDS
+                )
+                if response.status_code >= 400:
+                    timer.fail()
+                    return f"HTTP {response.status_code}"
+            return None
+        except Exception as e:
+            return f"{type(e).__name__}: {str(e)}"
+
+    async def process_batch(self) -> int:
+        """Send one batch of due rows; returns how many rows were attempted"""
+        rows = self._claim_batch()
+        if not rows:
+            return 0
+
+        errors = await asyncio.gather(*(self._deliver(row) for row in rows))
+
+        delivered, failed = [], []
+        now = time.time()
+        for row, error in zip(rows, errors):
+            if error is None:
+                delivered.append(row[0])
+                self.last_delivery_lag = now - row[3]
+            else:
+                failed.append((row[0], row[4] + 1, error))
+                self.last_error = error
+
+        self._complete(delivered, failed)
+        self.sent_total += len(delivered)
+        self.failed_attempts_total += len(failed)
+
+        if failed:
+            logger.warning(f"Outbox batch: {len(delivered)} delivered, {len(failed)} failed ({self.last_error})")
+        return len(rows)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                if await self.process_batch():
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox worker error: {str(e)}")
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self):
+        """Start the background sender (called on app startup)"""
+        if self._task and not self._task.done():
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Outbox worker started ({self.path}, depth {self.stats()['depth']})")
+
+    async def stop(self, drain_timeout: Optional[float] = None):
+        """
+        Drain due rows for up to `drain_timeout` seconds, then stop
+
+        Rows that are still pending (or backing off) stay in the database and
+        are sent after the next start.
+        """
+        if drain_timeout is None:
+            drain_timeout = settings.OUTBOX_DRAIN_TIMEOUT_SECONDS
+
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if self._task:
+            try:
+                await asyncio.wait_for(self._task, timeout=drain_timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+
+        deadline = time.monotonic() + drain_timeout
+        try:
+            while time.monotonic() < deadline and await self.process_batch():
+                pass
+        except Exception as e:
+            logger.error(f"Error draining outbox: {str(e)}")
+
+        pending = self.stats()["depth"]
+        if pending:
+            logger.warning(f"Outbox stopped with {pending} pending deliveries (kept on disk)")
+
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, lag and delivery counters"""
+        depth, oldest = self.conn.execute(
+            "SELECT COUNT(*), MIN(created_at) FROM outbox WHERE dead = 0"
+        ).fetchone()
+        dead = self.conn.execute("SELECT COUNT(*) FROM outbox WHERE dead = 1").fetchone()[0]
+
+        return {
+            "depth": depth,
+            "dead": dead,
+            "oldest_pending_age_seconds": round(time.time() - oldest, 3) if oldest else 0.0,
+            "last_delivery_lag_seconds": round(self.last_delivery_lag, 3) if self.last_delivery_lag is not None else None,
+            "sent_total": self.sent_total,
+            "failed_attempts_total": self.failed_attempts_total,
+            "dead_total": self.dead_total,
+            "last_error": self.last_error,
+            "running": bool(self._task and not self._task.done())
+        }
+
+
+# Create singleton instance
+outbox = Outbox()
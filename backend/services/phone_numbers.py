@@ -0,0 +1,64 @@
+"""
+Phone Number Helpers
+Normalization of customer numbers to E.164 so every store keys on the
+same representation
+"""
+
+import os
+import sys
+from typing import Optional
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+
+
+def normalize_phone(number: Optional[str], country_code: Optional[str] = None) -> Optional[str]:
+    """
+    Normalize a phone number to E.164 (e.g. "+919876543210")
+
+    Handles "+91 98765-43210", "0091...", "09876543210" and bare 10-digit
+    national numbers (prefixed with `country_code`, DEFAULT_COUNTRY_CODE
+    by default).
+
+    Args:
+        number: Raw phone number
+        country_code: Country calling code for national numbers
+
+    Returns:
+        E.164 string, or None if the input is not a plausible number
+    """
+    if not number:
+        return None
+
+    raw = str(number).strip()
+    digits = "".join(ch for ch in raw if ch.isdigit())
+    if not digits:
+        return None
+
+    country_code = country_code or settings.DEFAULT_COUNTRY_CODE
+
+    if raw.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith("0"):
+        digits = country_code + digits[1:]
+    elif len(digits) == 10:
+        digits = country_code + digits
+
+    # E.164 allows at most 15 digits; anything under 8 is not dialable
+    if not 8 <= len(digits) <= 15 or digits.startswith("0"):
+        return None
+
+    return "+" + digits
+
+
+def phone_to_int(number: Optional[str]) -> Optional[int]:
+    """
+    Normalize a phone number and pack it into an int (E.164 digits)
+
+    E.164 numbers have at most 15 digits, so they always fit in int64.
+    """
+    normalized = normalize_phone(number)
+    return int(normalized[1:]) if normalized else None
@@ -0,0 +1,224 @@
+"""
+Profanity / Abuse Matcher
+Multi-pattern, word-boundary aware matcher compiled once from a lexicon of
+English, Hindi and Hinglish terms
+
+Uses an Aho-Corasick automaton (pyahocorasick) when installed, otherwise a
+trie-shaped regex; both scan the text once regardless of lexicon size.
+"""
+
+import os
+import re
+import sys
+import json
+import logging
+from typing import Dict, List, NamedTuple, Optional
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Category -> terms. Extended via PROFANITY_LEXICON_PATH (same JSON shape).
+DEFAULT_LEXICON: Dict[str, List[str]] = {
+    "profanity": [
+        # English
+        "fuck", "fucker", "fucking", "motherfucker", "shit", "bullshit",
+        "damn", "bastard", "asshole", "bitch", "dick", "crap",
+        # Hinglish transliterations
+        "bhenchod", "behenchod", "madarchod", "chutiya",
+        "chutiye", "bhosdike", "bhosdiwale", "gaandu", "lund", "lauda",
+        "lavda", "randi",
+        # Hindi (Devanagari)
+        "भेनचोद", "बहनचोद", "मादरचोद", "चूतिया", "भोसडीके", "गांडू", "रंडी",
+    ],
+    "insult": [
+        "idiot", "moron", "dumbass",
+        "kamina", "kamine", "kutta", "kutte", "harami", "haramkhor",
+        "saala", "saale", "ullu ka pattha", "bewakoof", "gadha",
+        "कमीना", "कुत्ता", "हरामी", "हरामखोर", "साला", "उल्लू का पट्ठा", "बेवकूफ", "गधा",
+    ],
+    "threat": [
+        "kill you", "i will find you",
+        "maar dunga", "jaan se maar", "dekh lunga",
+        "मार दूंगा", "जान से मार", "देख लूंगा",
+    ],
+}
+
+# A match must not be glued to other letters/digits/underscores or to
+# Devanagari characters (whose vowel signs are not \w in `re`).
+_WORD_CHARS = r"\w\u0900-\u097F"
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+class ProfanityMatch(NamedTuple):
+    term: str
+    category: str
+    start: int
+    end: int
+
+
+def _normalize(term: str) -> str:
+    return " ".join(term.casefold().split())
+
+
+# Length-preserving whitespace folding, so phrases match across newlines/tabs
+_OTHER_WHITESPACE = re.compile(r"[\t\n\r\x0b\x0c\u00a0]")
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_" or "\u0900" <= ch <= "\u097F"
+
+
+def _trie_pattern(terms: List[str]) -> str:
+    """
+    Build a regex from a character trie of the terms
+
+    Shared prefixes are factored out, so the compiled pattern walks each
+    position in the text once instead of trying every term separately.
+    """
+    trie: Dict = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: Dict) -> str:
+        terminal = "" in node
+        branches = []
+        for ch in sorted(k for k in node if k):
+            atom = r"\s+" if ch == " " else re.escape(ch)
+            branches.append(atom + build(node[ch]))
+
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            # Greedy optional: prefer the longer term, fall back to the prefix
+            body = "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class ProfanityFilter:
+    """
+    Finds lexicon terms in text in a single pass
+
+    The lexicon is compiled once into an Aho-Corasick automaton (or a
+    trie-shaped regex) and hits are kept only on word boundaries, so "damn"
+    matches in "damn it" but not in "Amsterdam".
+    """
+
+    def __init__(self, lexicon: Optional[Dict[str, List[str]]] = None):
+        if lexicon is None:
+            lexicon = self.load_lexicon(settings.PROFANITY_LEXICON_PATH)
+
+        self.categories: Dict[str, str] = {}
+        for category, terms in lexicon.items():
+            for term in terms:
+                normalized = _normalize(term)
+                if normalized:
+                    self.categories.setdefault(normalized, category)
+
+        self._regex = None
+        self._automaton = None
+        self._has_phrases = any(" " in term for term in self.categories)
+
+        if self.categories:
+            # The regex also backs the automaton for text whose length changes when lowercased
+            self._regex = re.compile(
+                rf"(?<![{_WORD_CHARS}])(?:{_trie_pattern(list(self.categories))})(?![{_WORD_CHARS}])",
+                re.IGNORECASE
+            )
+            if ahocorasick is not None:
+                self._automaton = ahocorasick.Automaton()
+                for term, category in self.categories.items():
+                    self._automaton.add_word(term, (term, category))
+                self._automaton.make_automaton()
+
+        logger.info(
+            f"Profanity filter compiled with {len(self.categories)} terms "
+            f"({'aho-corasick' if self._automaton else 'regex'})"
+        )
+
+    @staticmethod
+    def load_lexicon(path: Optional[str]) -> Dict[str, List[str]]:
+        """
+        Default lexicon merged with an optional JSON file of {category: [terms]}
+        """
+        lexicon = {category: list(terms) for category, terms in DEFAULT_LEXICON.items()}
+        if not path:
+            return lexicon
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                extra = json.load(f)
+            for category, terms in extra.items():
+                lexicon.setdefault(category, []).extend(terms)
+        except Exception as e:
+            logger.error(f"Error loading profanity lexicon {path}: {str(e)}")
+
+        return lexicon
+
+    def find(self, text: str) -> List[ProfanityMatch]:
+        """
+        All lexicon terms in `text`
+
+        Args:
+            text: Transcript or utterance
+
+        Returns:
+            Matches in text order with their category and span
+        """
+        if not text or self._regex is None:
+            return []
+
+        if self._automaton is not None:
+            lowered = _OTHER_WHITESPACE.sub(" ", text.lower())
+            # Phrases separated by runs of spaces only match the regex's \s+
+            if len(lowered) == len(text) and not (self._has_phrases and "  " in lowered):
+                return self._find_automaton(lowered)
+
+        matches = []
+        for m in self._regex.finditer(text):
+            term = _normalize(m.group())
+            matches.append(ProfanityMatch(term, self.categories.get(term, "unknown"), m.start(), m.end()))
+        return matches
+
+    def _find_automaton(self, lowered: str) -> List[ProfanityMatch]:
+        matches = []
+        last = len(lowered) - 1
+        for end, (term, category) in self._automaton.iter(lowered):
+            start = end - len(term) + 1
+            if start > 0 and _is_word_char(lowered[start - 1]):
+                continue
+            if end < last and _is_word_char(lowered[end + 1]):
+                continue
+            matches.append(ProfanityMatch(term, category, start, end + 1))
+
+        # Keep the longest term when several end/start inside each other
+        matches.sort(key=lambda m: (m.start, -m.end))
+        result = []
+        for m in matches:
+            if not result or m.start >= result[-1].end:
+                result.append(m)
+        return result
+
+    def contains(self, text: str) -> bool:
+        """True if `text` contains any lexicon term"""
+        if not text or self._regex is None:
+            return False
+        if self._automaton is not None:
+            return bool(self.find(text))
+        return self._regex.search(text) is not None
+
+
+# Create singleton instance
+profanity_filter = ProfanityFilter()
@@ -0,0 +1,549 @@
+"""
+Google Sheets Sync
+Direct, batched sync with the company spreadsheet: lead rows are upserted
+and the analytics table refreshed with one append + one batchUpdate request
+per flush, and new DNC rows are read incrementally into the local DNC index
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from itertools import islice
+from urllib.parse import quote
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are serialized within one process only
+    fcntl = None
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+from services.http_clients import http_clients
+from services.metrics import metrics
+from services.campaign_dialer import TokenBucket
+from services.lead_store import lead_repository
+from services.call_records import call_records
+from services.dnc_index import dnc_index
+
+logger = logging.getLogger(__name__)
+
+LEAD_COLUMNS = [
+    "lead_key", "call_id", "name", "phone", "email", "interest_level",
+    "budget", "preferred_sectors", "questions", "timestamp"
+]
+ANALYTICS_COLUMNS = ["day", "calls", "connects", "connect_rate", "avg_duration_seconds"]
+
+_RANGE_START_ROW = re.compile(r"![A-Z]+(\d+)")
+
+
+def a1(sheet: str, cells: str) -> str:
+    """A1 range on a named sheet ("'DNC List'!A2:A")"""
+    return "'{}'!{}".format(sheet.replace("'", "''"), cells)
+
+
+def _column(index: int) -> str:
+    """0 -> A, 25 -> Z, 26 -> AA"""
+    name = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        name = chr(65 + rem) + name
+    return name
+
+
+def _cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple, set)):
+        return ", ".join(str(item) for item in value)
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return value
+
+
+class SheetsClient:
+    """
+    Minimal Sheets API v4 (values) client on the pooled HTTP client
+
+    Every request waits for a token from a shared bucket, so bursts are
+    spread out to stay within SHEETS_REQUESTS_PER_MINUTE.
+    """
+
+    def __init__(self, spreadsheet_id: str, api_url: Optional[str] = None):
+        self.spreadsheet_id = spreadsheet_id
+        self.api_url = (api_url or settings.GOOGLE_SHEETS_API_URL).rstrip("/")
+        per_minute = max(1, settings.SHEETS_REQUESTS_PER_MINUTE)
+        self.bucket = TokenBucket(rate=per_minute / 60.0, capacity=min(per_minute, 10))
+        self._credentials = None
+        self.requests_total = 0
+
+    async def _auth_headers(self) -> Dict[str, str]:
+        if settings.GOOGLE_SERVICE_ACCOUNT_FILE:
+            if self._credentials is None:
+                from google.oauth2 import service_account
+
+                self._credentials = service_account.Credentials.from_service_account_file(
+                    settings.GOOGLE_SERVICE_ACCOUNT_FILE,
+                    scopes=["https://www.googleapis.com/auth/spreadsheets"]
+                )
+            if not self._credentials.valid:
+                from google.auth.transport.requests import Request as GoogleAuthRequest
+
+                await asyncio.to_thread(self._credentials.refresh, GoogleAuthRequest())
+            return {"Authorization": f"Bearer {self._credentials.token}"}
+        if settings.GOOGLE_SHEETS_ACCESS_TOKEN:
+            return {"Authorization": f"Bearer {settings.GOOGLE_SHEETS_ACCESS_TOKEN}"}
+        return {}
+
+    async def _request(self, operation: str, method: str, path: str, **kwargs) -> Dict[str, Any]:
+        await self.bucket.acquire()
+        url = f"{self.api_url}/spreadsheets/{self.spreadsheet_id}{path}"
+        headers = await self._auth_headers()
+        self.requests_total += 1
+        with metrics.outbound("sheets", operation):
+            response = await http_clients.get(url).request(method, url, headers=headers, **kwargs)
+            response.raise_for_status()
+        return response.json() if response.content else {}
+
+    async def get_values(self, range_: str) -> List[List[Any]]:
+        result = await self._request("get_values", "GET", f"/values/{quote(range_, safe='')}")
+        return result.get("values", [])
+
+    async def append(self, range_: str, rows: List[List[Any]]) -> Dict[str, Any]:
+        """Append rows after the table found in `range_`; returns the `updates` block"""
+        result = await self._request(
+            "append",
+            "POST",
+            f"/values/{quote(range_, safe='')}:append",
+            params={"valueInputOption": "RAW", "insertDataOption": "INSERT_ROWS"},
+            json={"values": rows}
+        )
+        return result.get("updates", {})
+
+    async def batch_update(self, data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Overwrite several ranges (any sheets) in one request"""
+        return await self._request(
+            "batch_update",
+            "POST",
+            "/values:batchUpdate",
+            json={"valueInputOption": "RAW", "data": data}
+        )
+
+
+class SheetsState:
+    """
+    Sync state shared by every worker (SQLite at SHEETS_STATE_PATH)
+
+    Holds the sheet row of each lead key, so updates target the right row
+    after a restart or from another worker, and small values such as the
+    next DNC row. `append_lock()` serializes appends to the Leads sheet
+    across processes, so two workers never both append the same new lead.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS lead_rows (
+        spreadsheet_id TEXT NOT NULL,
+        lead_key TEXT NOT NULL,
+        row INTEGER NOT NULL,
+        PRIMARY KEY (spreadsheet_id, lead_key)
+    );
+    CREATE TABLE IF NOT EXISTS sync_state (
+        spreadsheet_id TEXT NOT NULL,
+        name TEXT NOT NULL,
+        value TEXT NOT NULL,
+        PRIMARY KEY (spreadsheet_id, name)
+    );
+    """
+
+    def __init__(self, spreadsheet_id: str, path: Optional[str] = None):
+        self.spreadsheet_id = spreadsheet_id
+        self.path = path or settings.SHEETS_STATE_PATH
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._lock_fd: Optional[int] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.executescript(self._SCHEMA)
+        return self._conn
+
+    def get(self, name: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value FROM sync_state WHERE spreadsheet_id = ? AND name = ?", (self.spreadsheet_id, name)
+            ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, name: str, value: Any):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (spreadsheet_id, name, value) VALUES (?, ?, ?)",
+                (self.spreadsheet_id, name, json.dumps(value))
+            )
+
+    def rows(self, keys: List[str]) -> Dict[str, int]:
+        """Known sheet rows for `keys`"""
+        found: Dict[str, int] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                found.update(self.conn.execute(
+                    f"SELECT lead_key, row FROM lead_rows WHERE spreadsheet_id = ? "
+                    f"AND lead_key IN ({','.join('?' * len(chunk))})",
+                    [self.spreadsheet_id, *chunk]
+                ))
+        return found
+
+    def set_rows(self, rows: Dict[str, int], replace: bool = False):
+        """Record sheet rows; `replace` drops every previously known row first"""
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if replace:
+                    conn.execute("DELETE FROM lead_rows WHERE spreadsheet_id = ?", (self.spreadsheet_id,))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO lead_rows (spreadsheet_id, lead_key, row) VALUES (?, ?, ?)",
+                    [(self.spreadsheet_id, key, row) for key, row in rows.items()]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def count_rows(self) -> int:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM lead_rows WHERE spreadsheet_id = ?", (self.spreadsheet_id,)
+            ).fetchone()[0]
+
+    def acquire_append_lock(self):
+        """Block until this process may append lead rows (call from a worker thread)"""
+        if fcntl is None:
+            return
+        if self._lock_fd is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._lock_fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+
+    def release_append_lock(self):
+        if fcntl is not None and self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+class SheetsSync:
+    """
+    Buffers sheet writes and reads DNC rows incrementally
+
+    - Leads: `queue_lead()` only marks the lead dirty; a flush reads the
+      current merged leads from the lead repository in one lookup, updates
+      rows already on the sheet in a single batchUpdate and appends new
+      leads in a single append. Row numbers (from one initial read of the
+      key column and from append responses) live in SheetsState, so every
+      worker and every restart updates the same row instead of appending.
+    - Analytics: the daily table from the call-record rollups rides along in
+      the same batchUpdate every SHEETS_ANALYTICS_INTERVAL_SECONDS, when it
+      changed.
+    - DNC: only rows below the last synced row are requested; the position
+      is kept in SheetsState. The DNC sheet is treated as append-only.
+
+    A failed flush keeps its leads dirty and is retried on the next cycle.
+    Rows are assumed to stay where they were written (no sorting or deleting
+    rows on the Leads sheet).
+    """
+
+    def __init__(self, client: Optional[SheetsClient] = None, state: Optional[SheetsState] = None):
+        self.enabled = bool(client or settings.GOOGLE_SHEETS_ID)
+        self.client = client or (SheetsClient(settings.GOOGLE_SHEETS_ID) if self.enabled else None)
+        self.state = state or SheetsState(settings.GOOGLE_SHEETS_ID or "")
+        self.interval = settings.SHEETS_FLUSH_INTERVAL_SECONDS
+        self.batch_size = settings.SHEETS_BATCH_SIZE
+
+        self._dirty: Dict[str, None] = {}  # insertion-ordered set of lead keys
+        self._analytics_due = 0.0
+        self._analytics_calls: Optional[int] = None
+        self._dnc_due = 0.0
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.rows_appended = 0
+        self.rows_updated = 0
+        self.dnc_rows_read = 0
+        self.flushes_total = 0
+        self.errors_total = 0
+        self.last_error: Optional[str] = None
+
+    # ------------------------------------------------------------------
+    # Leads & analytics
+    # ------------------------------------------------------------------
+
+    def queue_lead(self, key: str):
+        """Mark a lead for the next flush (repeated saves collapse into one row write)"""
+        if not self.enabled:
+            return
+        self._dirty[key] = None
+        if self._wakeup is not None and len(self._dirty) >= self.batch_size:
+            self._wakeup.set()
+
+    def _row_update(self, number: int, row: List[Any]) -> Dict[str, Any]:
+        last_column = _column(len(LEAD_COLUMNS) - 1)
+        return {"range": a1(settings.LEADS_SHEET_NAME, f"A{number}:{last_column}{number}"), "values": [row]}
+
+    async def _load_lead_rows(self) -> int:
+        """
+        Read the key column once per spreadsheet (under the append lock)
+
+        Returns:
+            Number of requests sent (0 if another worker already did it)
+        """
+        if await asyncio.to_thread(self.state.get, "lead_rows_loaded", False):
+            return 0
+        keys = await self.client.get_values(a1(settings.LEADS_SHEET_NAME, "A:A"))
+        rows = {row[0]: number for number, row in enumerate(keys, 1) if row and row[0]}
+        await asyncio.to_thread(self.state.set_rows, rows, True)
+        await asyncio.to_thread(self.state.set, "needs_header", not keys)
+        await asyncio.to_thread(self.state.set, "lead_rows_loaded", True)
+        return 1
+
+    async def _append_leads(self, keys: List[str], rows: List[List[Any]]) -> int:
+        """
+        Append new leads while holding the cross-process append lock
+
+        Leads another worker appended in the meantime are updated instead.
+
+        Returns:
+            Number of requests sent
+        """
+        await asyncio.to_thread(self.state.acquire_append_lock)
+        try:
+            requests = await self._load_lead_rows()
+            known = await asyncio.to_thread(self.state.rows, keys)
+            if known:
+                await self.client.batch_update([
+                    self._row_update(known[key], row) for key, row in zip(keys, rows) if key in known
+                ])
+                requests += 1
+                self.rows_updated += len(known)
+                remaining = [(key, row) for key, row in zip(keys, rows) if key not in known]
+                keys = [key for key, _ in remaining]
+                rows = [row for _, row in remaining]
+            if not keys:
+                return requests
+
+            header = await asyncio.to_thread(self.state.get, "needs_header", False)
+            values = ([LEAD_COLUMNS] if header else []) + list(rows)
+            result = await self.client.append(a1(settings.LEADS_SHEET_NAME, "A1"), values)
+            requests += 1
+            self.rows_appended += len(rows)
+
+            match = _RANGE_START_ROW.search(result.get("updatedRange", ""))
+            if match:
+                first = int(match.group(1)) + (1 if header else 0)
+                await asyncio.to_thread(self.state.set_rows, {key: first + offset for offset, key in enumerate(keys)})
+                if header:
+                    await asyncio.to_thread(self.state.set, "needs_header", False)
+            else:
+                # Row numbers unknown: re-read the key column before the next flush
+                await asyncio.to_thread(self.state.set, "lead_rows_loaded", False)
+            return requests
+        finally:
+            self.state.release_append_lock()
+
+    def _analytics_update(self) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        if now < self._analytics_due:
+            return None
+        report = call_records.analytics(hours=1, days=30)
+        if report["total"]["calls"] == self._analytics_calls:
+            self._analytics_due = now + settings.SHEETS_ANALYTICS_INTERVAL_SECONDS
+            return None
+        rows = [ANALYTICS_COLUMNS] + [
+            [day["bucket"], day["calls"], day["connects"], day["connect_rate"], day["avg_duration_seconds"]]
+            for day in reversed(report["daily"])
+        ]
+        return {
+            "range": a1(settings.ANALYTICS_SHEET_NAME, f"A1:{_column(len(ANALYTICS_COLUMNS) - 1)}{len(rows)}"),
+            "values": rows,
+            "_calls": report["total"]["calls"]
+        }
+
+    async def flush(self) -> int:
+        """
+        Write dirty leads (and the analytics table, if due)
+
+        Returns:
+            Number of requests sent
+        """
+        if not self.enabled:
+            return 0
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            keys = list(islice(self._dirty, self.batch_size))
+            analytics = self._analytics_update()
+            if not keys and analytics is None:
+                return 0
+            for key in keys:
+                self._dirty.pop(key, None)
+
+            requests = 0
+            try:
+                updates: List[Dict[str, Any]] = []
+                new_keys: List[str] = []
+                new_rows: List[List[Any]] = []
+
+                if keys:
+                    leads = await lead_repository.get_many(keys)
+                    known = await asyncio.to_thread(self.state.rows, keys)
+                    for key in keys:
+                        lead = leads.get(key)
+                        if lead is None:
+                            continue
+                        row = [_cell(key if column == "lead_key" else lead.get(column)) for column in LEAD_COLUMNS]
+                        if key in known:
+                            updates.append(self._row_update(known[key], row))
+                        else:
+                            new_keys.append(key)
+                            new_rows.append(row)
+                lead_updates = len(updates)
+
+                if analytics is not None:
+                    updates.append({"range": analytics["range"], "values": analytics["values"]})
+
+                if updates:
+                    await self.client.batch_update(updates)
+                    requests += 1
+                    self.rows_updated += lead_updates
+                    if analytics is not None:
+                        self._analytics_calls = analytics["_calls"]
+                        self._analytics_due = time.monotonic() + settings.SHEETS_ANALYTICS_INTERVAL_SECONDS
+
+                if new_keys:
+                    requests += await self._append_leads(new_keys, new_rows)
+            except Exception as e:
+                # Retry these leads with the next flush
+                for key in keys:
+                    self._dirty[key] = None
+                self.errors_total += 1
+                self.last_error = f"{type(e).__name__}: {str(e)}"
+                logger.error(f"Error syncing Google Sheets: {str(e)}")
+                return requests
+
+            self.flushes_total += 1
+            return requests
+
+    # ------------------------------------------------------------------
+    # DNC
+    # ------------------------------------------------------------------
+
+    async def sync_dnc(self) -> int:
+        """Read DNC rows added since the last sync into the DNC index; returns rows read"""
+        if not self.enabled:
+            return 0
+        next_row = int(await asyncio.to_thread(self.state.get, "dnc_next_row", 1))
+        try:
+            rows = await self.client.get_values(a1(settings.DNC_SHEET_NAME, f"A{next_row}:A"))
+        except Exception as e:
+            self.errors_total += 1
+            self.last_error = f"{type(e).__name__}: {str(e)}"
+            logger.error(f"Error reading DNC sheet: {str(e)}")
+            return 0
+        if not rows:
+            return 0
+
+        phones = [row[0] for row in rows if row and row[0]]
+        added = await asyncio.to_thread(dnc_index.add, phones) if phones else 0
+        await asyncio.to_thread(self.state.set, "dnc_next_row", next_row + len(rows))
+        self.dnc_rows_read += len(rows)
+        logger.info(f"DNC sheet: {len(rows)} new rows, {added} new numbers")
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # Background task
+    # ------------------------------------------------------------------
+
+    async def _run(self):
+        while not self._stopping:
+            if time.monotonic() >= self._dnc_due:
+                await self.sync_dnc()
+                self._dnc_due = time.monotonic() + settings.SHEETS_DNC_POLL_SECONDS
+            await self.flush()
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self):
+        """Start the background sync (no-op unless GOOGLE_SHEETS_ID is set)"""
+        if not self.enabled or (self._task and not self._task.done()):
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Google Sheets sync started (flush every {self.interval:.0f}s)")
+
+    async def stop(self):
+        """Flush pending rows and stop"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        for _ in range(len(self._dirty) // self.batch_size + 1):
+            if not self._dirty or not await self.flush():
+                break
+        if self._dirty:
+            logger.warning(f"Google Sheets sync stopped with {len(self._dirty)} leads not written")
+        self.state.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "pending_leads": len(self._dirty),
+            "known_lead_rows": self.state.count_rows() if self.enabled else 0,
+            "rows_appended": self.rows_appended,
+            "rows_updated": self.rows_updated,
+            "dnc_rows_read": self.dnc_rows_read,
+            "dnc_next_row": self.state.get("dnc_next_row", 1) if self.enabled else 1,
+            "flushes_total": self.flushes_total,
+            "requests_total": self.client.requests_total if self.client else 0,
+            "errors_total": self.errors_total,
+            "last_error": self.last_error
+        }
+
+
+# Create singleton instance
+sheets_sync = SheetsSync()
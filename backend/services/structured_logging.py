@@ -0,0 +1,255 @@
+"""
+Structured Logging
+Queue-based log pipeline: records are handed to a background thread that
+redacts PII, truncates large fields and writes one JSON object per line,
+so request handlers never format or write logs themselves
+"""
+
+import os
+import re
+import sys
+import json
+import queue
+import atexit
+import logging
+import itertools
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterable, Optional, TextIO
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE = re.compile(r"(?<![\w+])\+?(?:\d[\s-]?){9,12}\d(?!\w)")
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = frozenset(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", "taskName"}
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+def _mask_phone(match: "re.Match") -> str:
+    if _DATE.match(match.group(0)):
+        return match.group(0)
+    digits = re.sub(r"\D", "", match.group(0))
+    return "*" * (len(digits) - 4) + digits[-4:]
+
+
+def scrub(text: str) -> str:
+    """Mask email addresses and phone numbers in free text (last 4 digits kept)"""
+    if "@" in text:
+        text = _EMAIL.sub("[email]", text)
+    return _PHONE.sub(_mask_phone, text)
+
+
+class Redactor:
+    """
+    Makes a log field safe to write
+
+    Values under PII keys are masked, strings are truncated to `max_chars`
+    and scrubbed of emails / phone numbers, long lists are cut short and
+    nesting is limited, so one multi-kilobyte transcript cannot bloat a line.
+    """
+
+    def __init__(
+        self,
+        fields: Optional[Iterable[str]] = None,
+        max_chars: Optional[int] = None,
+        max_items: int = 50,
+        max_depth: int = 6
+    ):
+        fields = fields if fields is not None else settings.LOG_REDACT_FIELDS
+        self.fields = frozenset(field.casefold() for field in fields)
+        self.max_chars = max_chars or settings.LOG_MAX_FIELD_CHARS
+        self.max_items = max_items
+        self.max_depth = max_depth
+
+    def text(self, value: str) -> str:
+        if len(value) > self.max_chars:
+            value = f"{value[:self.max_chars]}...[+{len(value) - self.max_chars} chars]"
+        return scrub(value)
+
+    def mask(self, value: Any) -> Any:
+        if value in (None, ""):
+            return value
+        digits = re.sub(r"\D", "", str(value))
+        if len(digits) >= 8 and "@" not in str(value):
+            return "*" * (len(digits) - 4) + digits[-4:]
+        return "[redacted]"
+
+    def __call__(self, value: Any, key: Optional[str] = None, depth: int = 0) -> Any:
+        if key is not None and key.casefold() in self.fields:
+            return self.mask(value) if not isinstance(value, (dict, list, tuple)) else "[redacted]"
+        if isinstance(value, str):
+            return self.text(value)
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        if depth >= self.max_depth:
+            return "[nested]"
+        if isinstance(value, dict):
+            return {str(k): self(v, str(k), depth + 1) for k, v in itertools.islice(value.items(), self.max_items)}
+        if isinstance(value, (list, tuple, set)):
+            items = [self(v, None, depth + 1) for v in itertools.islice(value, self.max_items)]
+            if len(value) > self.max_items:
+                items.append(f"...[+{len(value) - self.max_items} items]")
+            return items
+        return self.text(str(value))
+
+
+def _extras(record: logging.LogRecord) -> Dict[str, Any]:
+    return {key: value for key, value in record.__dict__.items() if key not in _RECORD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, message, extra fields"""
+
+    def __init__(self, redactor: Optional[Redactor] = None):
+        super().__init__()
+        self.redactor = redactor or Redactor()
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": self.redactor.text(record.getMessage())
+        }
+        for key, value in _extras(record).items():
+            entry[key] = self.redactor(value, key)
+        if record.exc_info:
+            entry["exc"] = self.redactor.text(self.formatException(record.exc_info))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The classic text format, redacted, with extra fields appended as JSON"""
+
+    def __init__(self, redactor: Optional[Redactor] = None):
+        super().__init__(TEXT_FORMAT)
+        self.redactor = redactor or Redactor()
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        record.message = self.redactor.text(record.message)
+        line = super().formatMessage(record)
+        extras = _extras(record)
+        if extras:
+            line = f"{line} {json.dumps(self.redactor(extras), ensure_ascii=False, default=str)}"
+        return line
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep 1 in N records of high-volume events
+
+    The event name comes from `extra={"event": ...}`. Kept records carry
+    `sample_every` so the true volume can be recovered from the logs.
+    Warnings and errors are never sampled.
+    """
+
+    def __init__(self, every: Optional[Dict[str, int]] = None):
+        super().__init__()
+        self.every = {event: n for event, n in (every if every is not None else settings.LOG_SAMPLE_EVERY).items() if n > 1}
+        self._seen: Dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, "event", None)
+        n = self.every.get(event) if event is not None else None
+        if n is None or record.levelno >= logging.WARNING:
+            return True
+        seen = self._seen.get(event, 0)
+        self._seen[event] = seen + 1
+        if seen % n:
+            return False
+        record.sample_every = n
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread as they are
+
+    The stock QueueHandler formats the message in the calling thread (to
+    make records picklable); the queue never leaves the process here, so
+    all formatting is left to the listener. A full queue drops the record
+    instead of blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LoggingPipeline:
+    """Installs the queue handler on the root logger and runs the writer thread"""
+
+    def __init__(self):
+        self.handler: Optional[NonBlockingQueueHandler] = None
+        self.listener: Optional[QueueListener] = None
+
+    def start(
+        self,
+        level: Optional[str] = None,
+        format: Optional[str] = None,
+        stream: Optional[TextIO] = None
+    ) -> "LoggingPipeline":
+        """
+        Route all logging through the pipeline (replaces logging.basicConfig)
+
+        Args:
+            level: Root log level (default LOG_LEVEL)
+            format: "json" or "text" (default LOG_FORMAT)
+            stream: Output stream (default stderr)
+        """
+        if self.listener is not None:
+            return self
+
+        redactor = Redactor()
+        fmt = (format or settings.LOG_FORMAT).lower()
+        output = logging.StreamHandler(stream)
+        output.setFormatter(JsonFormatter(redactor) if fmt == "json" else TextFormatter(redactor))
+
+        log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        self.handler = NonBlockingQueueHandler(log_queue)
+        self.handler.addFilter(SamplingFilter())
+
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(getattr(logging, (level or settings.LOG_LEVEL).upper()))
+
+        self.listener = QueueListener(log_queue, output, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        """Write out everything still queued and stop the writer thread"""
+        if self.listener is None:
+            return
+        self.listener.stop()
+        self.listener = None
+        logging.getLogger().removeHandler(self.handler)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.listener is not None,
+            "queued": self.handler.queue.qsize() if self.handler else 0,
+            "dropped": self.handler.dropped if self.handler else 0
+        }
+
+
+# Create singleton instance
+logging_pipeline = LoggingPipeline()
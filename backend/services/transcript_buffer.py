@@ -0,0 +1,189 @@
+"""
+Live Transcript Buffer
+Assembles streamed transcript chunks per call (ordered, bounded, with TTL
+eviction) so the live transcript can be served and reused on call end
+"""
+
+import os
+import sys
+import time
+import bisect
+import itertools
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _as_sequence(value: Any) -> Optional[int]:
+    """Chunk sequence number as an int; None for missing or non-integer values"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else None
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            return None
+    return None
+
+
+class CallTranscript:
+    """Ordered chunks of one call's transcript"""
+
+    __slots__ = ("chunks", "sequences", "last_sequence", "chars", "truncated", "started_at", "updated_at")
+
+    def __init__(self):
+        # (sequence, arrival, line); chunks without a sequence take the last
+        # sequence seen, so with no sequences at all this is arrival order
+        self.chunks: List[Tuple[float, int, str]] = []
+        self.sequences = set()
+        self.last_sequence = float("-inf")
+        self.chars = 0
+        self.truncated = False
+        self.started_at = time.time()
+        self.updated_at = self.started_at
+
+    def text(self) -> str:
+        return "\n".join(chunk[2] for chunk in self.chunks)
+
+
+class TranscriptBuffer:
+    """
+    Per-call transcript assembly with bounded memory
+
+    - At most TRANSCRIPT_MAX_CHARS_PER_CALL characters per call; the oldest
+      chunks are dropped first and the transcript is flagged truncated
+    - At most TRANSCRIPT_MAX_CALLS calls; the least recently updated call is
+      evicted first
+    - Calls idle for TRANSCRIPT_TTL_SECONDS are evicted
+    """
+
+    def __init__(
+        self,
+        max_calls: Optional[int] = None,
+        max_chars_per_call: Optional[int] = None,
+        ttl_seconds: Optional[float] = None
+    ):
+        self.max_calls = max_calls or settings.TRANSCRIPT_MAX_CALLS
+        self.max_chars = max_chars_per_call or settings.TRANSCRIPT_MAX_CHARS_PER_CALL
+        self.ttl = ttl_seconds or settings.TRANSCRIPT_TTL_SECONDS
+
+        self._calls: "OrderedDict[str, CallTranscript]" = OrderedDict()
+        self._arrival = itertools.count()
+
+        self.chunks_total = 0
+        self.duplicates_total = 0
+        self.evicted_total = 0
+
+    def _evict(self, now: float):
+        calls = self._calls
+        while calls:
+            call_id, transcript = next(iter(calls.items()))
+            if len(calls) <= self.max_calls and now - transcript.updated_at < self.ttl:
+                break
+            calls.popitem(last=False)
+            self.evicted_total += 1
+
+    def append(
+        self,
+        call_id: str,
+        text: str,
+        sequence: Optional[Any] = None,
+        speaker: Optional[str] = None
+    ) -> bool:
+        """
+        Add a chunk to a call's transcript
+
+        Args:
+            call_id: Bolna call ID
+            text: Chunk text
+            sequence: Chunk sequence number, if Bolna sends one (values that
+                      are not integers are ignored)
+            speaker: "agent" / "user" label, prefixed to the line
+
+        Returns:
+            False if the chunk was a redelivery of an already stored sequence
+        """
+        if not call_id or not text:
+            return False
+
+        now = time.time()
+        transcript = self._calls.get(call_id)
+        if transcript is None:
+            transcript = self._calls[call_id] = CallTranscript()
+        else:
+            self._calls.move_to_end(call_id)
+
+        sequence = _as_sequence(sequence)
+        if sequence is not None:
+            if sequence in transcript.sequences:
+                self.duplicates_total += 1
+                return False
+            transcript.sequences.add(sequence)
+            transcript.last_sequence = sequence
+
+        order = sequence if sequence is not None else transcript.last_sequence
+        line = f"{speaker}: {text}" if speaker else text
+        bisect.insort(transcript.chunks, (order, next(self._arrival), line))
+
+        transcript.chars += len(line)
+        while transcript.chars > self.max_chars and len(transcript.chunks) > 1:
+            transcript.chars -= len(transcript.chunks.pop(0)[2])
+            transcript.truncated = True
+
+        transcript.updated_at = now
+        self.chunks_total += 1
+        self._evict(now)
+        return True
+
+    def get(self, call_id: str) -> Optional[CallTranscript]:
+        """Live transcript of a call (None if unknown or evicted)"""
+        transcript = self._calls.get(call_id)
+        if transcript is not None and time.time() - transcript.updated_at >= self.ttl:
+            self._calls.pop(call_id, None)
+            self.evicted_total += 1
+            return None
+        return transcript
+
+    def pop(self, call_id: str) -> Optional[CallTranscript]:
+        """Remove and return a call's transcript (on call end)"""
+        return self._calls.pop(call_id, None) if call_id else None
+
+    def snapshot(self, call_id: str) -> Optional[Dict[str, Any]]:
+        """API representation of a live transcript"""
+        transcript = self.get(call_id)
+        if transcript is None:
+            return None
+        return {
+            "call_id": call_id,
+            "transcript": transcript.text(),
+            "chunks": len(transcript.chunks),
+            "chars": transcript.chars,
+            "truncated": transcript.truncated,
+            "started_at": datetime.fromtimestamp(transcript.started_at).isoformat(),
+            "updated_at": datetime.fromtimestamp(transcript.updated_at).isoformat()
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        self._evict(time.time())
+        return {
+            "active_calls": len(self._calls),
+            "buffered_chars": sum(t.chars for t in self._calls.values()),
+            "chunks_total": self.chunks_total,
+            "duplicates_total": self.duplicates_total,
+            "evicted_total": self.evicted_total
+        }
+
+
+# Create singleton instance
+transcript_buffer = TranscriptBuffer()
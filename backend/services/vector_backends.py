@@ -0,0 +1,373 @@
+"""
+Vector Search Backends
+Storage/query backends behind VectorStore: Pinecone (remote) or a local
+memory-mapped NumPy matrix with exact cosine top-k
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class VectorBackend(ABC):
+    """
+    Interface implemented by every backend
+
+    Vectors are dicts of {"id", "values", "metadata"}; query results are
+    dicts of {"id", "score", "metadata"} ordered by descending score.
+
+    `upsert_batch_size` / `parallel_upserts` tell bulk ingestion how to split
+    writes; None means send everything in one call.
+    """
+
+    name = "base"
+    upsert_batch_size: Optional[int] = None
+    parallel_upserts = False
+
+    @abstractmethod
+    def upsert(self, vectors: List[Dict[str, Any]]):
+        ...
+
+    @abstractmethod
+    def query(self, vector: List[float], top_k: int, filter: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        ...
+
+    @abstractmethod
+    def describe(self) -> Dict[str, Any]:
+        ...
+
+
+# ============================================================================
+# PINECONE
+# ============================================================================
+
+class PineconeBackend(VectorBackend):
+    """Pinecone index (pinecone-client 2.x)"""
+
+    name = "pinecone"
+    parallel_upserts = True
+
+    def __init__(self):
+        import pinecone
+
+        pinecone.init(
+            api_key=settings.require("PINECONE_API_KEY"),
+            environment=settings.PINECONE_ENVIRONMENT
+        )
+
+        if settings.PINECONE_INDEX_NAME not in pinecone.list_indexes():
+            raise LookupError(
+                f"Index {settings.PINECONE_INDEX_NAME} not found. Please create it in Pinecone dashboard."
+            )
+
+        self.index = pinecone.Index(settings.PINECONE_INDEX_NAME)
+        self.upsert_batch_size = settings.VECTOR_UPSERT_BATCH_SIZE
+        logger.info(f"Connected to Pinecone index: {settings.PINECONE_INDEX_NAME}")
+
+    def upsert(self, vectors: List[Dict[str, Any]]):
+        with metrics.outbound("pinecone", "upsert"):
+            self.index.upsert(vectors=vectors)
+
+    def query(self, vector: List[float], top_k: int, filter: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        with metrics.outbound("pinecone", "query"):
+            results = self.index.query(
+                vector=vector,
+                top_k=top_k,
+                include_metadata=True,
+                filter=filter
+            )
+        return [
+            {"id": match.id, "score": float(match.score), "metadata": match.metadata or {}}
+            for match in results.matches
+        ]
+
+    def delete(self, ids: List[str]):
+        with metrics.outbound("pinecone", "delete"):
+            self.index.delete(ids=ids)
+
+    def describe(self) -> Dict[str, Any]:
+        with metrics.outbound("pinecone", "describe_index_stats"):
+            stats = self.index.describe_index_stats()
+        return {
+            "total_vectors": stats.total_vector_count,
+            "dimension": stats.dimension,
+            "index_fullness": stats.index_fullness
+        }
+
+
+# ============================================================================
+# LOCAL (NumPy)
+# ============================================================================
+
+_OPERATORS = {
+    "$eq": lambda value, arg: value == arg,
+    "$ne": lambda value, arg: value != arg,
+    "$in": lambda value, arg: value in arg,
+    "$nin": lambda value, arg: value not in arg,
+    "$gt": lambda value, arg: value is not None and value > arg,
+    "$gte": lambda value, arg: value is not None and value >= arg,
+    "$lt": lambda value, arg: value is not None and value < arg,
+    "$lte": lambda value, arg: value is not None and value <= arg,
+}
+
+
+def matches_filter(metadata: Dict[str, Any], filter: Optional[Dict]) -> bool:
+    """
+    Evaluate a Pinecone-style metadata filter
+
+    Supports {"field": value}, {"field": {"$in": [...]}} (and the other
+    comparison operators), plus "$and" / "$or" lists.
+    """
+    if not filter:
+        return True
+
+    for field, condition in filter.items():
+        if field == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif field == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(field)
+            for op, arg in condition.items():
+                if op not in _OPERATORS:
+                    raise ValueError(f"Unsupported filter operator: {op}")
+                if not _OPERATORS[op](value, arg):
+                    return False
+        elif metadata.get(field) != condition:
+            return False
+
+    return True
+
+
+class LocalVectorBackend(VectorBackend):
+    """
+    Exact cosine search over a memory-mapped float32 matrix
+
+    Files in `directory`:
+        vectors.npy   (N, D) float32, rows L2-normalized
+        index.json    {"count": N, "ids": [...], "metadata": [...]}
+
+    Rows are normalized on insert, so a query is one matrix-vector product
+    plus `argpartition` for the top k. Writes replace both files atomically
+    (vectors first, index last); readers in other processes reload when
+    index.json changes and its count matches the matrix. Every write
+    rewrites the matrix, so bulk upserts arrive as a single batch.
+    """
+
+    name = "local"
+
+    def __init__(self, directory: Optional[str] = None, dimension: Optional[int] = None):
+        self.directory = directory or settings.LOCAL_VECTOR_DIR
+        self.dimension = dimension or settings.EMBEDDING_DIMENSION
+        self.vectors_path = os.path.join(self.directory, "vectors.npy")
+        self.index_path = os.path.join(self.directory, "index.json")
+        self.refresh_interval = settings.LOCAL_VECTOR_REFRESH_SECONDS
+
+        self._matrix = np.empty((0, self.dimension), dtype=np.float32)
+        self._ids: List[str] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        self._filter_masks: Dict[str, np.ndarray] = {}
+        self._index_mtime = None
+        self._next_refresh = 0.0
+        self._write_lock = threading.Lock()
+
+        self.refresh(force=True)
+        logger.info(f"Local vector index at {self.directory}: {len(self._ids)} vectors")
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def refresh(self, force: bool = False):
+        """Reload if another process rewrote the index"""
+        now = time.monotonic()
+        if not force and now < self._next_refresh:
+            return
+        self._next_refresh = now + self.refresh_interval
+
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._index_mtime:
+            return
+
+        with open(self.index_path, encoding="utf-8") as f:
+            index = json.load(f)
+        matrix = np.load(self.vectors_path, mmap_mode="r")
+
+        if matrix.shape[0] != index["count"]:
+            # Caught between the two file swaps of a writer; retry on the next refresh
+            return
+
+        self._matrix = matrix
+        self._ids = index["ids"]
+        self._metadata = index["metadata"]
+        self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        self._filter_masks = {}
+        self._index_mtime = mtime
+        if matrix.shape[0]:
+            self.dimension = matrix.shape[1]
+
+    def _persist(self, matrix: np.ndarray, ids: List[str], metadata: List[Dict[str, Any]]):
+        os.makedirs(self.directory, exist_ok=True)
+
+        tmp_vectors = self.vectors_path + ".tmp.npy"
+        np.save(tmp_vectors, matrix)
+        os.replace(tmp_vectors, self.vectors_path)
+
+        tmp_index = self.index_path + ".tmp"
+        with open(tmp_index, "w", encoding="utf-8") as f:
+            json.dump({"count": len(ids), "ids": ids, "metadata": metadata}, f)
+        os.replace(tmp_index, self.index_path)
+
+        self.refresh(force=True)
+
+    # ------------------------------------------------------------------
+    # Backend interface
+    # ------------------------------------------------------------------
+
+    def upsert(self, vectors: List[Dict[str, Any]]):
+        if not vectors:
+            return
+        with self._write_lock:
+            self._upsert(vectors)
+
+    def _upsert(self, vectors: List[Dict[str, Any]]):
+        self.refresh(force=True)
+
+        matrix = np.array(self._matrix, dtype=np.float32)
+        ids = list(self._ids)
+        metadata = list(self._metadata)
+        positions = dict(self._positions)
+
+        new_rows = []
+        for vector in vectors:
+            values = np.asarray(vector["values"], dtype=np.float32)
+            if values.shape != (self.dimension,):
+                raise ValueError(f"Vector {vector['id']} has dimension {values.shape[0]}, expected {self.dimension}")
+            norm = float(np.linalg.norm(values))
+            if norm:
+                values = values / norm
+
+            position = positions.get(vector["id"])
+            if position is None:
+                positions[vector["id"]] = len(ids)
+                ids.append(vector["id"])
+                metadata.append(vector.get("metadata") or {})
+                new_rows.append(values)
+            elif position < len(matrix):
+                matrix[position] = values
+                metadata[position] = vector.get("metadata") or {}
+            else:
+                # Same id twice in one batch
+                new_rows[position - len(matrix)] = values
+                metadata[position] = vector.get("metadata") or {}
+
+        if new_rows:
+            matrix = np.vstack([matrix, np.stack(new_rows)])
+
+        self._persist(matrix, ids, metadata)
+
+    def _filter_mask(self, filter: Dict) -> np.ndarray:
+        """Boolean row mask for a filter, cached until the index changes"""
+        key = json.dumps(filter, sort_keys=True, default=str)
+        mask = self._filter_masks.get(key)
+        if mask is None:
+            mask = np.fromiter(
+                (matches_filter(meta, filter) for meta in self._metadata),
+                dtype=bool,
+                count=len(self._metadata)
+            )
+            self._filter_masks[key] = mask
+        return mask
+
+    def query(self, vector: List[float], top_k: int, filter: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        self.refresh()
+        matrix = self._matrix
+        if not len(matrix) or top_k <= 0:
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm:
+            query = query / norm
+
+        scores = matrix @ query
+        candidates = None
+        if filter:
+            candidates = np.flatnonzero(self._filter_mask(filter))
+            if not len(candidates):
+                return []
+            scores = scores[candidates]
+
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for i in top:
+            row = int(candidates[i]) if candidates is not None else int(i)
+            results.append({"id": self._ids[row], "score": float(scores[i]), "metadata": self._metadata[row]})
+        return results
+
+    def delete(self, ids: List[str]):
+        with self._write_lock:
+            self._delete(ids)
+
+    def _delete(self, ids: List[str]):
+        self.refresh(force=True)
+        remove = {self._positions[doc_id] for doc_id in ids if doc_id in self._positions}
+        if not remove:
+            return
+
+        keep = [i for i in range(len(self._ids)) if i not in remove]
+        matrix = np.asarray(self._matrix)[keep] if keep else np.empty((0, self.dimension), dtype=np.float32)
+        self._persist(
+            np.ascontiguousarray(matrix, dtype=np.float32),
+            [self._ids[i] for i in keep],
+            [self._metadata[i] for i in keep]
+        )
+
+    def describe(self) -> Dict[str, Any]:
+        self.refresh()
+        return {
+            "total_vectors": len(self._ids),
+            "dimension": self.dimension,
+            "index_fullness": 0.0
+        }
+
+
+BACKENDS = {
+    PineconeBackend.name: PineconeBackend,
+    LocalVectorBackend.name: LocalVectorBackend,
+}
+
+
+def create_backend(name: Optional[str] = None) -> VectorBackend:
+    """Instantiate the backend selected by VECTOR_BACKEND"""
+    name = (name or settings.VECTOR_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown VECTOR_BACKEND '{name}' (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
@@ -1,13 +1,21 @@
 import os
 import sys
-from typing import List, Dict, Optional
+from typing import Any, Iterable, List, Dict, Optional
 import logging
-from openai import OpenAI
-import pinecone
+import asyncio
+import functools
+import threading
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config.settings import settings
+from services.embedding_cache import embedding_cache
+from services.answer_cache import answer_cache
+from services.metrics import metrics
+from services.vector_backends import VectorBackend, create_backend
+from services.lexical_index import lexical_index, reciprocal_rank_fusion
 
 logger = logging.getLogger(__name__)
 
@@ -17,45 +25,129 @@ class VectorStore:
     """
     
     def __init__(self):
-        """Initialize Pinecone and OpenAI clients"""
-        try:
-            # Initialize OpenAI for embeddings
-            self.openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
-            
-            # Initialize Pinecone
-            pinecone.init(
-                api_key=settings.PINECONE_API_KEY,
-                environment=settings.PINECONE_ENVIRONMENT
+        """
+        Nothing is imported or contacted here; the OpenAI client and the
+        vector backend are created on first use, so importing this module
+        stays fast and works offline
+        """
+        self._openai_client = None
+        self._async_openai_client = None
+        self._backend: Optional[VectorBackend] = None
+        self._backend_ready = False
+        self._init_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    @property
+    def openai_client(self):
+        """OpenAI client for embeddings (created on first use)"""
+        if self._openai_client is None:
+            with self._init_lock:
+                if self._openai_client is None:
+                    from openai import OpenAI
+                    self._openai_client = OpenAI(api_key=settings.require("OPENAI_API_KEY"))
+        return self._openai_client
+    
+    @property
+    def async_openai_client(self):
+        """AsyncOpenAI client for embeddings from async handlers (created on first use)"""
+        if self._async_openai_client is None:
+            with self._init_lock:
+                if self._async_openai_client is None:
+                    from openai import AsyncOpenAI
+                    self._async_openai_client = AsyncOpenAI(api_key=settings.require("OPENAI_API_KEY"))
+        return self._async_openai_client
+    
+    async def _offload(self, fn, *args, **kwargs):
+        """
+        Run a blocking backend call on the store's bounded thread pool, so
+        the event loop keeps serving other requests meanwhile
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.VECTOR_THREAD_POOL_SIZE,
+                thread_name_prefix="vector-store"
             )
-            
-            # Get or create index
-            if settings.PINECONE_INDEX_NAME not in pinecone.list_indexes():
-                logger.warning(f"Index {settings.PINECONE_INDEX_NAME} not found. Please create it in Pinecone dashboard.")
-                self.index = None
-            else:
-                self.index = pinecone.Index(settings.PINECONE_INDEX_NAME)
-                logger.info(f"Connected to Pinecone index: {settings.PINECONE_INDEX_NAME}")
-                
-        except Exception as e:
-            logger.error(f"Error initializing VectorStore: {str(e)}")
-            raise
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+    
+    @property
+    def backend(self) -> Optional[VectorBackend]:
+        """
+        Pinecone or local NumPy index, per VECTOR_BACKEND (connected on first use)
+        
+        None if the index does not exist; other connection errors are
+        logged and retried on the next call.
+        """
+        if not self._backend_ready:
+            with self._init_lock:
+                if not self._backend_ready:
+                    try:
+                        self._backend = create_backend()
+                        self._backend_ready = True
+                    except LookupError as e:
+                        logger.warning(str(e))
+                        self._backend_ready = True
+                    except Exception as e:
+                        logger.error(f"Error initializing vector backend: {str(e)}")
+        return self._backend
     
-    def create_embedding(self, text: str) -> List[float]:
+    def create_embedding(self, text: str, use_cache: bool = True) -> List[float]:
         """
         Create embedding vector for text using OpenAI
         
         Args:
             text: Text to create embedding for
+            use_cache: Look up / store the embedding in the query cache
+                       (keyed by normalized text, so only use it for queries)
             
         Returns:
             List of floats representing the embedding
         """
+        model = settings.OPENAI_EMBEDDING_MODEL  # text-embedding-3-small: cheaper and faster
+        
+        if use_cache:
+            cached = embedding_cache.get(model, text)
+            if cached is not None:
+                return cached
+        
         try:
-            response = self.openai_client.embeddings.create(
-                model="text-embedding-3-small",  # Cheaper and faster
-                input=text
-            )
-            return response.data[0].embedding
+            with metrics.outbound("openai", "embedding"):
+                response = self.openai_client.embeddings.create(
+                    model=model,
+                    input=text
+                )
+            embedding = response.data[0].embedding
+            
+            if use_cache:
+                embedding_cache.put(model, text, embedding)
+            return embedding
+            
+        except Exception as e:
+            logger.error(f"Error creating embedding: {str(e)}")
+            raise
+    
+    async def acreate_embedding(self, text: str, use_cache: bool = True) -> List[float]:
+        """
+        Async version of create_embedding (AsyncOpenAI, no thread blocked)
+        """
+        model = settings.OPENAI_EMBEDDING_MODEL
+        
+        if use_cache:
+            cached = embedding_cache.get(model, text)
+            if cached is not None:
+                return cached
+        
+        try:
+            with metrics.outbound("openai", "embedding"):
+                response = await self.async_openai_client.embeddings.create(
+                    model=model,
+                    input=text
+                )
+            embedding = response.data[0].embedding
+            
+            if use_cache:
+                embedding_cache.put(model, text, embedding)
+            return embedding
             
         except Exception as e:
             logger.error(f"Error creating embedding: {str(e)}")
@@ -79,26 +171,15 @@ class VectorStore:
             True if successful
         """
         try:
-            if not self.index:
-                logger.error("Pinecone index not initialized")
+            if not self.backend:
+                logger.error("Vector index not initialized")
                 return False
             
-            # Create embedding
-            embedding = self.create_embedding(text)
-            
-            # Prepare metadata
-            if metadata is None:
-                metadata = {}
-            metadata["text"] = text[:1000]  # Store first 1000 chars for reference
-            
-            # Upsert to Pinecone
-            self.index.upsert(
-                vectors=[{
-                    "id": doc_id,
-                    "values": embedding,
-                    "metadata": metadata
-                }]
-            )
+            # Create embedding (documents bypass the query cache)
+            embedding = self.create_embedding(text, use_cache=False)
+            
+            self._store_document(doc_id, text, embedding, metadata)
+            answer_cache.invalidate()
             
             logger.info(f"Added document {doc_id} to vector store")
             return True
@@ -107,54 +188,295 @@ class VectorStore:
             logger.error(f"Error adding document: {str(e)}")
             return False
     
+    async def aadd_document(
+        self,
+        doc_id: str,
+        text: str,
+        metadata: Optional[Dict] = None
+    ) -> bool:
+        """
+        Async version of add_document
+        """
+        try:
+            if not await self._offload(lambda: self.backend):
+                logger.error("Vector index not initialized")
+                return False
+            
+            embedding = await self.acreate_embedding(text, use_cache=False)
+            
+            await self._offload(self._store_document, doc_id, text, embedding, metadata)
+            answer_cache.invalidate()
+            
+            logger.info(f"Added document {doc_id} to vector store")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error adding document: {str(e)}")
+            return False
+    
+    def _store_document(self, doc_id: str, text: str, embedding: List[float], metadata: Optional[Dict]):
+        """Upsert one embedded document into the vector and keyword indexes"""
+        # Prepare metadata
+        if metadata is None:
+            metadata = {}
+        metadata["text"] = text[:1000]  # Store first 1000 chars for reference
+        
+        self.backend.upsert([{
+            "id": doc_id,
+            "values": embedding,
+            "metadata": metadata
+        }])
+        lexical_index.upsert([{"id": doc_id, "text": metadata["text"], "metadata": metadata}])
+    
+    def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several texts in one OpenAI request (no cache)
+        
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            Embeddings in the same order as `texts`
+        """
+        with metrics.outbound("openai", "embedding_batch"):
+            response = self.openai_client.embeddings.create(
+                model=settings.OPENAI_EMBEDDING_MODEL,
+                input=texts
+            )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+    
+    def _embed_batch(self, batch: List[Dict[str, Any]], failed: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """Embed a batch; if the request fails, retry items one by one to isolate bad ones"""
+        try:
+            embeddings = self.create_embeddings([doc["text"] for doc in batch])
+            return [dict(doc, values=embedding) for doc, embedding in zip(batch, embeddings)]
+        except Exception as e:
+            if len(batch) == 1:
+                failed.append({"id": batch[0]["id"], "error": str(e)})
+                return []
+            logger.warning(f"Embedding batch of {len(batch)} failed, retrying individually: {str(e)}")
+        
+        embedded = []
+        for doc in batch:
+            embedded.extend(self._embed_batch([doc], failed))
+        return embedded
+    
+    def add_documents(
+        self,
+        documents: Iterable[Dict[str, Any]],
+        embed_batch_size: Optional[int] = None,
+        upsert_batch_size: Optional[int] = None,
+        parallelism: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Add many documents with batched embedding requests and upserts
+        
+        Documents are consumed lazily in windows of
+        embed_batch_size * parallelism, so a generator (e.g. the knowledge-base
+        chunker) is never held in memory all at once.
+        
+        Args:
+            documents: Dicts with "id", "text" and optional "metadata"
+            embed_batch_size: Texts per embedding request
+            upsert_batch_size: Vectors per upsert (default: backend's preference)
+            parallelism: Embedding / upsert requests in flight at once
+            
+        Returns:
+            {"total", "succeeded", "failed": [{"id", "error"}]}
+        """
+        embed_batch_size = embed_batch_size or settings.VECTOR_EMBED_BATCH_SIZE
+        parallelism = parallelism or settings.VECTOR_INGEST_PARALLELISM
+        failed: List[Dict[str, str]] = []
+        total = 0
+        succeeded = 0
+        
+        if not self.backend:
+            logger.error("Vector index not initialized")
+            failed = [{"id": doc.get("id"), "error": "Index not initialized"} for doc in documents]
+            return {"total": len(failed), "succeeded": 0, "failed": failed}
+        
+        def upsert(batch: List[Dict[str, Any]]) -> int:
+            try:
+                self.backend.upsert(batch)
+                lexical_index.upsert(
+                    {"id": vector["id"], "text": vector["metadata"]["text"], "metadata": vector["metadata"]}
+                    for vector in batch
+                )
+                return len(batch)
+            except Exception as e:
+                logger.error(f"Error upserting batch of {len(batch)}: {str(e)}")
+                failed.extend({"id": vector["id"], "error": str(e)} for vector in batch)
+                return 0
+        
+        documents = iter(documents)
+        with ThreadPoolExecutor(max_workers=parallelism) as pool:
+            while True:
+                window = list(islice(documents, embed_batch_size * parallelism))
+                if not window:
+                    break
+                total += len(window)
+                
+                valid = []
+                for doc in window:
+                    if not doc.get("id") or not (doc.get("text") or "").strip():
+                        failed.append({"id": doc.get("id"), "error": "Missing id or text"})
+                        continue
+                    metadata = dict(doc.get("metadata") or {})
+                    metadata["text"] = doc["text"][:1000]  # Store first 1000 chars for reference
+                    valid.append({"id": doc["id"], "text": doc["text"], "metadata": metadata})
+                
+                embed_batches = [valid[i:i + embed_batch_size] for i in range(0, len(valid), embed_batch_size)]
+                vectors = [
+                    {"id": doc["id"], "values": doc["values"], "metadata": doc["metadata"]}
+                    for batch in pool.map(lambda batch: self._embed_batch(batch, failed), embed_batches)
+                    for doc in batch
+                ]
+                if not vectors:
+                    continue
+                
+                batch_size = upsert_batch_size or self.backend.upsert_batch_size or len(vectors)
+                upsert_batches = [vectors[i:i + batch_size] for i in range(0, len(vectors), batch_size)]
+                if self.backend.parallel_upserts:
+                    succeeded += sum(pool.map(upsert, upsert_batches))
+                else:
+                    succeeded += sum(upsert(batch) for batch in upsert_batches)
+        
+        if succeeded:
+            answer_cache.invalidate()
+        logger.info(f"Added {succeeded}/{total} documents to vector store ({len(failed)} failed)")
+        return {"total": total, "succeeded": succeeded, "failed": failed}
+    
     def search(
         self, 
         query: str, 
         top_k: int = 3,
-        filter_metadata: Optional[Dict] = None
+        filter_metadata: Optional[Dict] = None,
+        query_embedding: Optional[List[float]] = None,
+        mode: Optional[str] = None
     ) -> List[Dict]:
         """
         Semantic search in vector database
         
+        Falls back to the BM25 index when the embedding or vector query
+        fails, so a knowledge answer is still available.
+        
         Args:
             query: Search query text
             top_k: Number of results to return
             filter_metadata: Optional metadata filters
+            query_embedding: Precomputed embedding of `query`, if the caller has one
+            mode: "vector", "hybrid" or "lexical" (default: SEARCH_MODE)
             
         Returns:
             List of matching documents with scores
         """
+        mode = (mode or settings.SEARCH_MODE).lower()
+        
+        if mode == "lexical":
+            return self.lexical_search(query, top_k, filter_metadata)
+        
         try:
-            if not self.index:
-                logger.error("Pinecone index not initialized")
-                return []
+            if not self.backend:
+                raise RuntimeError("Vector index not initialized")
             
             # Create query embedding
-            query_embedding = self.create_embedding(query)
+            if query_embedding is None:
+                query_embedding = self.create_embedding(query)
             
-            # Search in Pinecone
-            results = self.index.query(
-                vector=query_embedding,
+            matches = self.backend.query(
+                query_embedding,
                 top_k=top_k,
-                include_metadata=True,
                 filter=filter_metadata
             )
             
-            # Format results
-            formatted_results = []
-            for match in results.matches:
-                formatted_results.append({
-                    "id": match.id,
-                    "score": float(match.score),
-                    "text": match.metadata.get("text", ""),
-                    "metadata": match.metadata
-                })
+        except Exception as e:
+            logger.error(f"Error searching, falling back to keyword search: {str(e)}")
+            return self.lexical_search(query, top_k, filter_metadata)
+        
+        return self._format_results(query, matches, top_k, filter_metadata, mode)
+    
+    async def asearch(
+        self,
+        query: str,
+        top_k: int = 3,
+        filter_metadata: Optional[Dict] = None,
+        query_embedding: Optional[List[float]] = None,
+        mode: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Async version of search: the embedding is awaited on AsyncOpenAI and
+        the index query runs on the store's bounded thread pool
+        """
+        mode = (mode or settings.SEARCH_MODE).lower()
+        
+        if mode == "lexical":
+            return self.lexical_search(query, top_k, filter_metadata)
+        
+        try:
+            backend = await self._offload(lambda: self.backend)
+            if not backend:
+                raise RuntimeError("Vector index not initialized")
             
-            logger.info(f"Found {len(formatted_results)} results for query: {query[:50]}")
-            return formatted_results
+            if query_embedding is None:
+                query_embedding = await self.acreate_embedding(query)
+            
+            matches = await self._offload(
+                backend.query,
+                query_embedding,
+                top_k=top_k,
+                filter=filter_metadata
+            )
             
         except Exception as e:
-            logger.error(f"Error searching: {str(e)}")
+            logger.error(f"Error searching, falling back to keyword search: {str(e)}")
+            return self.lexical_search(query, top_k, filter_metadata)
+        
+        return self._format_results(query, matches, top_k, filter_metadata, mode)
+    
+    def _format_results(
+        self,
+        query: str,
+        matches: List[Dict],
+        top_k: int,
+        filter_metadata: Optional[Dict],
+        mode: str
+    ) -> List[Dict]:
+        """Shape backend matches as search results, fusing BM25 in hybrid mode"""
+        formatted_results = []
+        for match in matches:
+            formatted_results.append({
+                "id": match["id"],
+                "score": match["score"],
+                "text": match["metadata"].get("text", ""),
+                "metadata": match["metadata"],
+                "retrieval": "vector"
+            })
+        
+        if mode == "hybrid":
+            lexical_results = self.lexical_search(query, top_k * 2, filter_metadata)
+            formatted_results = reciprocal_rank_fusion(
+                [formatted_results, lexical_results],
+                k=settings.RRF_K
+            )[:top_k]
+        
+        logger.info(f"Found {len(formatted_results)} results for query: {query[:50]}")
+        return formatted_results
+    
+    def lexical_search(
+        self,
+        query: str,
+        top_k: int = 3,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        BM25 keyword search over the indexed chunks (no network calls)
+        """
+        try:
+            results = lexical_index.search(query, top_k=top_k, filter=filter_metadata)
+            logger.info(f"Found {len(results)} keyword results for query: {query[:50]}")
+            return results
+        except Exception as e:
+            logger.error(f"Error in keyword search: {str(e)}")
             return []
     
     def delete_document(self, doc_id: str) -> bool:
@@ -168,10 +490,12 @@ class VectorStore:
             True if successful
         """
         try:
-            if not self.index:
+            if not self.backend:
                 return False
             
-            self.index.delete(ids=[doc_id])
+            self.backend.delete([doc_id])
+            lexical_index.delete([doc_id])
+            answer_cache.invalidate()
             logger.info(f"Deleted document {doc_id}")
             return True
             
@@ -187,19 +511,29 @@ class VectorStore:
             Dictionary with stats
         """
         try:
-            if not self.index:
+            if not self.backend:
                 return {"error": "Index not initialized"}
             
-            stats = self.index.describe_index_stats()
-            return {
-                "total_vectors": stats.total_vector_count,
-                "dimension": stats.dimension,
-                "index_fullness": stats.index_fullness
-            }
+            return {"backend": self.backend.name, **self.backend.describe()}
             
         except Exception as e:
             logger.error(f"Error getting stats: {str(e)}")
             return {"error": str(e)}
+    
+    async def aget_stats(self) -> Dict:
+        """
+        Async version of get_stats (describe_index_stats is a network call for Pinecone)
+        """
+        return await self._offload(self.get_stats)
+    
+    async def aclose(self):
+        """Close the async OpenAI client and the offload thread pool"""
+        if self._async_openai_client is not None:
+            await self._async_openai_client.close()
+            self._async_openai_client = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
 
 # Create singleton instance
 vector_store = VectorStore()
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""
+Bolna Webhook Ingestion
+Reads each webhook body once, verifies the HMAC signature and decodes it
+into a typed event model that is handed to the route handler
+"""
+
+import os
+import sys
+import hmac
+import json
+import hashlib
+import logging
+from typing import Any, Callable, Dict, Optional, Type
+
+from fastapi import Header, HTTPException, Request
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.settings import settings
+
+try:
+    import orjson
+
+    def json_loads(data: bytes) -> Any:
+        return orjson.loads(data)
+except ImportError:
+    orjson = None
+
+    def json_loads(data: bytes) -> Any:
+        return json.loads(data)
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookVerifier:
+    """
+    HMAC-SHA256 signature check with the key schedule computed once
+
+    `hmac.new` re-derives the inner/outer padded keys on every call; copying
+    a pre-keyed object skips that work per request.
+    """
+
+    def __init__(self, secret: Optional[str]):
+        self._keyed = hmac.new(secret.encode(), digestmod=hashlib.sha256) if secret else None
+        if self._keyed is None:
+            logger.warning("BOLNA_WEBHOOK_SECRET not set, skipping verification")
+
+    @property
+    def enabled(self) -> bool:
+        """True when a secret is configured and every webhook must be signed"""
+        return self._keyed is not None
+
+    def verify(self, payload: bytes, signature: str) -> bool:
+        """
+        Verify Bolna webhook signature for security
+        """
+        if self._keyed is None:
+            return True
+        mac = self._keyed.copy()
+        mac.update(payload)
+        return hmac.compare_digest(signature, mac.hexdigest())
+
+
+# ============================================================================
+# EVENT MODELS
+# ============================================================================
+
+class BolnaEvent:
+    """Base for webhook events; keeps the decoded payload in `raw`"""
+
+    __slots__ = ("raw", "call_id")
+
+    def __init__(self, raw: Dict[str, Any]):
+        self.raw = raw
+        self.call_id: Optional[str] = raw.get("call_id")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Access fields that have no typed attribute"""
+        return self.raw.get(key, default)
+
+
+class CallStartedEvent(BolnaEvent):
+    __slots__ = ("customer_number", "agent_id")
+
+    def __init__(self, raw: Dict[str, Any]):
+        super().__init__(raw)
+        self.customer_number: Optional[str] = raw.get("customer_number")
+        self.agent_id: Optional[str] = raw.get("agent_id")
+
+
+class CallEndedEvent(BolnaEvent):
+    __slots__ = ("customer_number", "agent_id", "duration", "status", "transcript", "recording_url", "collected_data")
+
+    def __init__(self, raw: Dict[str, Any]):
+        super().__init__(raw)
+        self.customer_number: Optional[str] = raw.get("customer_number")
+        self.agent_id: Optional[str] = raw.get("agent_id")
+        self.duration: Optional[float] = raw.get("duration")
+        self.status: Optional[str] = raw.get("status")
+        self.transcript: str = raw.get("transcript") or ""
+        self.recording_url: Optional[str] = raw.get("recording_url")
+        self.collected_data: Dict[str, Any] = raw.get("collected_data") or {}
+
+
+class TranscriptEvent(BolnaEvent):
+    __slots__ = ("text", "sequence", "timestamp", "speaker")
+
+    def __init__(self, raw: Dict[str, Any]):
+        super().__init__(raw)
+        self.text: str = raw.get("text") or ""
+        self.sequence: Optional[Any] = raw.get("sequence")  # coerced by the transcript buffer
+        self.timestamp: Optional[Any] = raw.get("timestamp")
+        self.speaker: Optional[str] = raw.get("speaker") or raw.get("role")
+
+
+# ============================================================================
+# FASTAPI DEPENDENCY
+# ============================================================================
+
+webhook_verifier = WebhookVerifier(settings.BOLNA_WEBHOOK_SECRET)
+
+
+def decode_event(body: bytes, signature: Optional[str], model: Type[BolnaEvent]) -> BolnaEvent:
+    """
+    Verify and decode one webhook body
+
+    Raises:
+        HTTPException: 401 on a missing or bad signature (when a secret is
+                       configured), 400 on a non-object body
+    """
+    if webhook_verifier.enabled:
+        if not signature:
+            raise HTTPException(status_code=401, detail="Missing webhook signature")
+        if not webhook_verifier.verify(body, signature):
+            raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    try:
+        data = json_loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {str(e)}")
+
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Webhook body must be a JSON object")
+
+    return model(data)
+
+
+def bolna_event(model: Type[BolnaEvent]) -> Callable:
+    """
+    Build a route dependency yielding a verified `model` instance
+
+    Usage:
+        async def handler(event: CallEndedEvent = Depends(bolna_event(CallEndedEvent))):
+    """
+    async def dependency(
+        request: Request,
+        x_bolna_signature: Optional[str] = Header(None)
+    ) -> BolnaEvent:
+        body = await request.body()
+        return decode_event(body, x_bolna_signature, model)
+
+    return dependency
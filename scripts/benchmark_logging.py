@@ -0,0 +1,88 @@
+"""
+Microbenchmark for request logging
+Compares the time a call-ended handler spends logging on the calling
+(event loop) thread with the previous setup (f-string of the full payload,
+formatted and written synchronously by logging.basicConfig's handler)
+and with services/structured_logging (fields handed to a queue; redaction,
+truncation and JSON encoding happen on the writer thread)
+
+Usage: python scripts/benchmark_logging.py [--transcript-kb 1 32 256] [--iterations 2000]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.structured_logging import LoggingPipeline, TEXT_FORMAT
+
+def build_payload(transcript_kb: int) -> dict:
+    line = "Agent: Namaste, am I speaking with Mr. Sharma? User: Yes, my number is +91 98765 43210. "
+    transcript = (line * (transcript_kb * 1024 // len(line) + 1))[:transcript_kb * 1024]
+    return {
+        "call_id": "call_1234567890",
+        "agent_id": "agent_abc",
+        "customer_number": "+919876543210",
+        "duration": 312,
+        "status": "completed",
+        "transcript": transcript,
+        "recording_url": "https://recordings.example.com/call_1234567890.mp3",
+        "collected_data": {"name": "Rahul Sharma", "email": "rahul@example.com", "interest_level": "high"}
+    }
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+
+def old_handler(logger: logging.Logger, payload: dict):
+    logger.info(f"Call ended: {payload}")
+    logger.info(f"Processed call data: {payload}")
+
+def new_handler(logger: logging.Logger, payload: dict):
+    logger.info("Call ended", extra={"event": "call_ended", "call_id": payload["call_id"], "payload": payload})
+    logger.info("Processed call data", extra={"event": "call_processed", "call_id": payload["call_id"], "call_data": payload})
+
+def bench(label: str, fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    per_request = (time.perf_counter() - start) / iterations * 1e6
+    print(f"{label:<44} {per_request:10.1f} µs/request on the caller")
+    return per_request
+
+def main():
+    parser = argparse.ArgumentParser(description="Logging cost per request on the event loop thread")
+    parser.add_argument("--transcript-kb", type=int, nargs="*", default=[1, 32, 256])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("benchmark")
+
+    with open(os.devnull, "w") as devnull:
+        for size in args.transcript_kb:
+            payload = build_payload(size)
+            print(f"Transcript: {size} KB")
+
+            reset_root()
+            logging.basicConfig(level=logging.INFO, format=TEXT_FORMAT, stream=devnull)
+            old = bench("  old (f-string + synchronous StreamHandler)", lambda: old_handler(logger, payload), args.iterations)
+
+            reset_root()
+            pipeline = LoggingPipeline().start(level="INFO", format="json", stream=devnull)
+            new = bench("  new (queue handler + structured fields)", lambda: new_handler(logger, payload), args.iterations)
+            drain_start = time.perf_counter()
+            pipeline.stop()
+            drained = (time.perf_counter() - drain_start) * 1000
+            print(f"  writer thread finished its backlog {drained:.0f} ms later (off the caller)")
+            print(f"  speedup on the caller: {old / new:.1f}x\n")
+
+    reset_root()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark for the compiled profanity matcher
+Compares the old per-word substring scan against services/profanity_filter
+on long synthetic call transcripts built from the knowledge base
+
+Usage: python scripts/benchmark_profanity.py [--size-kb 512] [--repeat 5]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.profanity_filter import ProfanityFilter, DEFAULT_LEXICON, profanity_filter
+
+KNOWLEDGE_BASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "knowledge-base")
+
+def build_transcript(size_bytes: int, seed: int = 42) -> str:
+    """Random mix of knowledge-base words with the occasional swear word"""
+    words = []
+    for name in sorted(os.listdir(KNOWLEDGE_BASE_DIR)):
+        if name.endswith(".md"):
+            with open(os.path.join(KNOWLEDGE_BASE_DIR, name), encoding="utf-8") as f:
+                words.extend(f.read().split())
+    
+    rng = random.Random(seed)
+    lexicon = list(profanity_filter.categories)
+    parts, size = [], 0
+    while size < size_bytes:
+        word = rng.choice(lexicon) if rng.random() < 0.001 else rng.choice(words)
+        parts.append(word)
+        size += len(word) + 1
+    return " ".join(parts)
+
+def synthetic_lexicon(extra_terms: int, seed: int = 7) -> dict:
+    """Default lexicon padded with random made-up words (never in the transcript)"""
+    rng = random.Random(seed)
+    padding = [
+        "".join(rng.choice("bcdfghjklmnpqrstvwxz") for _ in range(rng.randint(6, 9)))
+        for _ in range(extra_terms)
+    ]
+    return {**DEFAULT_LEXICON, "synthetic": padding}
+
+def naive_scan(text: str, terms) -> list:
+    """Previous approach: lowercase + substring test per term"""
+    lowered = text.lower()
+    return [term for term in terms if term in lowered]
+
+def bench(label: str, fn, text: str, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(text)
+        best = min(best, time.perf_counter() - start)
+    mb_per_s = len(text.encode()) / best / 1e6
+    print(f"{label:<32} {best * 1000:9.2f} ms  {mb_per_s:8.1f} MB/s  ({len(result)} hits)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Profanity matcher throughput")
+    parser.add_argument("--size-kb", type=int, default=512, help="Transcript size in KB")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per variant (best is reported)")
+    parser.add_argument("--extra-terms", type=int, nargs="*", default=[500, 2000],
+                        help="Synthetic lexicon sizes to show scaling with lexicon size")
+    args = parser.parse_args()
+    
+    text = build_transcript(args.size_kb * 1024)
+    print(f"Transcript: {len(text.encode()) / 1024:.0f} KB\n")
+    
+    bench("substring scan (4 words)", lambda t: naive_scan(t, ["fuck", "shit", "damn", "bastard"]), text, args.repeat)
+    
+    filters = [profanity_filter] + [ProfanityFilter(synthetic_lexicon(n)) for n in args.extra_terms]
+    for matcher in filters:
+        terms = list(matcher.categories)
+        print(f"\nLexicon: {len(terms)} terms")
+        bench("substring scan", lambda t: naive_scan(t, terms), text, args.repeat)
+        bench("compiled matcher (all matches)", matcher.find, text, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+In-memory stand-in for the Google Sheets API v4 `values` endpoints used by
+services/sheets_sync (get, append, batchUpdate), for exercising the sync
+offline and counting how many requests it makes
+
+Point the backend at it with:
+    GOOGLE_SHEETS_ID=test GOOGLE_SHEETS_API_URL=http://127.0.0.1:8090/v4
+
+Usage: python scripts/fake_sheets_server.py [--port 8090] [--dnc numbers.txt]
+       GET /_requests shows request counts, GET /_sheets the sheet contents
+"""
+
+import re
+import argparse
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request, HTTPException
+
+app = FastAPI(title="Fake Google Sheets API")
+
+# sheet name -> rows (row 1 is index 0)
+SHEETS: Dict[str, List[List[str]]] = {}
+REQUESTS: Counter = Counter()
+
+_RANGE = re.compile(r"^(?:'((?:[^']|'')+)'|([^!]+))!([A-Z]+)(\d*)(?::([A-Z]+)(\d*))?$")
+
+
+def column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+
+def parse_range(range_: str) -> Tuple[str, int, int, Optional[int], Optional[int]]:
+    """(sheet, first col, first row, last col, last row); rows are 0-based, None = open-ended"""
+    match = _RANGE.match(range_)
+    if not match:
+        raise HTTPException(status_code=400, detail=f"Unable to parse range: {range_}")
+    quoted, bare, start_col, start_row, end_col, end_row = match.groups()
+    sheet = quoted.replace("''", "'") if quoted else bare
+    return (
+        sheet,
+        column_index(start_col),
+        int(start_row) - 1 if start_row else 0,
+        column_index(end_col) if end_col else None,
+        int(end_row) - 1 if end_row else None
+    )
+
+
+def write(sheet: str, first_row: int, first_col: int, values: List[List[str]]):
+    rows = SHEETS.setdefault(sheet, [])
+    for offset, values_row in enumerate(values):
+        while len(rows) <= first_row + offset:
+            rows.append([])
+        row = rows[first_row + offset]
+        while len(row) < first_col + len(values_row):
+            row.append("")
+        row[first_col:first_col + len(values_row)] = values_row
+
+
+@app.get("/v4/spreadsheets/{spreadsheet_id}/values/{range_}")
+async def get_values(spreadsheet_id: str, range_: str):
+    REQUESTS["get"] += 1
+    sheet, first_col, first_row, last_col, last_row = parse_range(range_)
+    rows = SHEETS.get(sheet, [])
+    stop = len(rows) if last_row is None else min(len(rows), last_row + 1)
+    values = [row[first_col:(last_col + 1) if last_col is not None else None] for row in rows[first_row:stop]]
+    while values and not any(values[-1]):
+        values.pop()
+    result = {"range": range_, "majorDimension": "ROWS"}
+    if values:
+        result["values"] = values
+    return result
+
+
+@app.post("/v4/spreadsheets/{spreadsheet_id}/values/{range_}:append")
+async def append_values(spreadsheet_id: str, range_: str, request: Request):
+    REQUESTS["append"] += 1
+    body = await request.json()
+    sheet, first_col, _, _, _ = parse_range(range_)
+    rows = SHEETS.setdefault(sheet, [])
+    first_row = len(rows)
+    write(sheet, first_row, first_col, body.get("values", []))
+    count = len(body.get("values", []))
+    return {
+        "spreadsheetId": spreadsheet_id,
+        "updates": {
+            "updatedRange": f"'{sheet}'!A{first_row + 1}:Z{first_row + count}",
+            "updatedRows": count
+        }
+    }
+
+
+@app.post("/v4/spreadsheets/{spreadsheet_id}/values:batchUpdate")
+async def batch_update(spreadsheet_id: str, request: Request):
+    REQUESTS["batchUpdate"] += 1
+    body = await request.json()
+    for entry in body.get("data", []):
+        sheet, first_col, first_row, _, _ = parse_range(entry["range"])
+        write(sheet, first_row, first_col, entry.get("values", []))
+    return {"spreadsheetId": spreadsheet_id, "totalUpdatedRanges": len(body.get("data", []))}
+
+
+@app.get("/_requests")
+async def request_counts():
+    return {"total": sum(REQUESTS.values()), **REQUESTS}
+
+
+@app.get("/_sheets")
+async def sheet_contents():
+    return SHEETS
+
+
+@app.post("/_sheets/{sheet}/rows")
+async def add_rows(sheet: str, request: Request):
+    """Append rows as a person editing the sheet would (e.g. new DNC numbers)"""
+    body = await request.json()
+    write(sheet, len(SHEETS.get(sheet, [])), 0, body.get("values", []))
+    return {"rows": len(SHEETS[sheet])}
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Google Sheets API")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--dnc", help="File with one DNC number per line to preload")
+    parser.add_argument("--dnc-sheet", default="DNC_List")
+    args = parser.parse_args()
+
+    if args.dnc:
+        with open(args.dnc, encoding="utf-8") as f:
+            write(args.dnc_sheet, 0, 0, [["phone"]] + [[line.strip()] for line in f if line.strip()])
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Script to load a Do-Not-Call export (CSV / Google Sheets download) into
+the local memory-mapped DNC index
+
+Usage: python scripts/load_dnc.py dnc_export.csv [--column phone]
+"""
+
+import os
+import sys
+import argparse
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.dnc_index import dnc_index
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="Load DNC numbers into the local index")
+    parser.add_argument("csv_files", nargs="+", help="CSV exports of the DNC sheet/registry")
+    parser.add_argument("--column", help="Column holding phone numbers (default: 'phone' or first column)")
+    args = parser.parse_args()
+    
+    for path in args.csv_files:
+        total = dnc_index.load_csv(path, column=args.column)
+        logger.info(f"✅ Loaded {path} ({total} numbers in index)")
+    
+    logger.info(f"DNC index stats: {dnc_index.stats()}")
+
+if __name__ == "__main__":
+    main()
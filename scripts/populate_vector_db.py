@@ -1,20 +1,28 @@
 """
 Script to populate vector database with company knowledge
-Run this once to index all your documents
+Indexes the curated KNOWLEDGE_CHUNKS below plus the knowledge-base/
+documents; re-runs only embed new or changed chunks and delete removed ones
+
+Usage: python scripts/populate_vector_db.py [--force] [--test]
 """
 
 import os
 import sys
+import argparse
+from itertools import chain
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.services.vector_services import vector_store
+from backend.services.index_manifest import IndexManifest
+from backend.services.markdown_chunker import markdown_chunker
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+KNOWLEDGE_BASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "knowledge-base")
+
 # Company knowledge chunks for vector DB
 # These are smaller, focused pieces of information for semantic search
 KNOWLEDGE_CHUNKS = [
@@ -154,47 +162,77 @@ KNOWLEDGE_CHUNKS = [
     }
 ]
 
-def populate_vector_database():
-    """Populate Pinecone with company knowledge chunks"""
+def iter_chunks():
+    """Curated chunks followed by streamed knowledge-base document chunks"""
+    return chain(KNOWLEDGE_CHUNKS, markdown_chunker.chunk_directory(KNOWLEDGE_BASE_DIR))
+
+def populate_vector_database(force: bool = False) -> bool:
+    """
+    Sync the vector index with the knowledge chunks
+    
+    Returns:
+        True if anything was added or deleted
+    """
+    
+    manifest = IndexManifest()
+    
+    # --force re-embeds everything but keeps the old ids, so removed chunks are still deleted
+    changed = manifest.iter_changed(iter_chunks(), force=force)
+    first = next(changed, None)
+    orphans = manifest.orphans() if first is None else None
+    if first is None and not orphans:
+        logger.info(f"✅ Vector index up to date ({len(manifest.seen)} chunks), nothing to do")
+        return False
+    
+    # Imported only when there is work, so an up-to-date run never connects
+    from backend.services.vector_services import vector_store
     
     logger.info("Starting vector database population...")
-    logger.info(f"Total chunks to add: {len(KNOWLEDGE_CHUNKS)}")
-    
-    success_count = 0
-    error_count = 0
-    
-    for chunk in KNOWLEDGE_CHUNKS:
-        try:
-            success = vector_store.add_document(
-                doc_id=chunk["id"],
-                text=chunk["text"],
-                metadata=chunk["metadata"]
-            )
-            
-            if success:
-                success_count += 1
-                logger.info(f"✅ Added: {chunk['id']}")
-            else:
-                error_count += 1
-                logger.error(f"❌ Failed: {chunk['id']}")
-                
-        except Exception as e:
-            error_count += 1
-            logger.error(f"❌ Error adding {chunk['id']}: {str(e)}")
+    
+    # Chunks stream from the manifest diff straight into the bulk indexer
+    result = vector_store.add_documents(chain([first], changed)) if first is not None else {"succeeded": 0, "failed": []}
+    if orphans is None:
+        orphans = manifest.orphans()
+    logger.info(f"Chunks seen: {len(manifest.seen)}, added/updated: {len(manifest.pending)}, orphans to delete: {len(orphans)}")
+    
+    failed_ids = set()
+    for failure in result["failed"]:
+        failed_ids.add(failure["id"])
+        logger.error(f"❌ Failed: {failure['id']} ({failure['error']})")
+    
+    # Failed chunks keep their old hash, so the next run retries them
+    manifest.commit(failed_ids)
+    
+    deleted_count = 0
+    for chunk_id in orphans:
+        if vector_store.delete_document(chunk_id):
+            manifest.mark_deleted(chunk_id)
+            deleted_count += 1
+        else:
+            logger.error(f"❌ Failed to delete orphan: {chunk_id}")
+    
+    manifest.save()
+    
+    success_count = result["succeeded"]
+    error_count = len(result["failed"]) + len(orphans) - deleted_count
     
     logger.info("\n" + "="*50)
     logger.info(f"Population complete!")
     logger.info(f"✅ Successful: {success_count}")
+    logger.info(f"🗑️ Deleted: {deleted_count}")
     logger.info(f"❌ Failed: {error_count}")
     logger.info("="*50)
     
     # Show stats
     stats = vector_store.get_stats()
     logger.info(f"\nVector Store Stats: {stats}")
+    return True
 
 def test_search():
     """Test semantic search with sample queries"""
     
+    from backend.services.vector_services import vector_store
+    
     logger.info("\n" + "="*50)
     logger.info("Testing semantic search...")
     logger.info("="*50 + "\n")
@@ -216,8 +254,14 @@ def test_search():
             logger.info(f"  {result['text'][:150]}...")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index knowledge chunks into the vector store")
+    parser.add_argument("--force", action="store_true", help="Re-embed every chunk, ignoring the manifest")
+    parser.add_argument("--test", action="store_true", help="Run test searches even if nothing changed")
+    args = parser.parse_args()
+    
     # Populate database
-    populate_vector_database()
+    updated = populate_vector_database(force=args.force)
     
     # Test searches
-    test_search()
\ No newline at end of file
+    if updated or args.test:
+        test_search()
\ No newline at end of file